@@ -0,0 +1,35 @@
+"""
+ETag / If-None-Match helpers for conditional GETs.
+"""
+
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" match each other
+    target = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == target
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Tag the response with etag and return a 304 if the client already has it.
+    Call this before doing the expensive part of a handler.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
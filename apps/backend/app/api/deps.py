@@ -1,9 +1,15 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import models, schemas
+from app.db.session import get_db, get_async_db
 from typing import Generator
 from firebase_admin import auth
 from app.core.security import get_firebase_app
+from app.core.token_cache import token_cache
+from app.core.user_cache import user_cache
+from app.db import query_stats
 
 security = HTTPBearer(auto_error =False)
 
@@ -31,12 +37,17 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
 
     token = credentials.credentials
 
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         decoded = auth.verify_id_token(token)
         if "id" not in decoded:
             decoded["id"] = decoded.get("uid") or decoded.get("user_id")
         if not decoded.get("id"):
             raise HTTPException(status_code=401, detail="Invalid token payload")
+        token_cache.set(token, decoded)
         return decoded
     except auth.ExpiredIdTokenError:
         raise HTTPException(status_code=401, detail = "Token Expired")
@@ -46,3 +57,34 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         raise HTTPException(status_code=401, detail = "Token Invalid")
     except Exception:
         raise HTTPException(status_code=401, detail = "Unauthorized")
+
+
+async def get_current_db_user(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.UserOut:
+    """The signed-in user's row, from user_cache when warm; 404 until /users/sync has run."""
+    uid = current_user["id"]
+    user = await user_cache.aget(uid)
+    if user is not None:
+        return user
+
+    row = (await db.execute(select(models.User).where(models.User.id == uid))).scalar_one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user = schemas.UserOut.model_validate(row)
+    await user_cache.aset(user)
+    return user
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the most SQL statements an endpoint should run, dependencies included:
+    @router.post(..., dependencies=[Depends(deps.query_budget(7))]). Checked by
+    MetricsMiddleware once the response is sent (see app/db/query_stats.py).
+    """
+    async def declare() -> None:
+        tracker = query_stats.current()
+        if tracker is not None:
+            tracker.budget = max_queries
+    return declare
@@ -0,0 +1,127 @@
+"""
+Attribute filters for map (bbox) queries.
+
+GET /washrooms/ accepts wheelchair_access, min_rating and amenity filters.
+On the SQL path they become predicates next to the bbox, written so the
+planner can use the supporting indexes from init_db.py:
+
+- `wheelchair_access` (bare column) implies the predicate of the partial
+  GiST idx_washrooms_geom_accessible, which only holds accessible rows,
+- `overall_rating >= :min_rating` is checked inside the composite GiST
+  idx_washrooms_geom_rating (geom, overall_rating; needs btree_gist), so
+  low-rated rows are skipped without visiting the heap,
+- each amenity is an EXISTS probe on washroom_amenities' primary key,
+- open_at is an EXISTS probe on washroom_hours' primary key (washroom_id,
+  day, ...), with dawn/dusk intervals resolved from OpenAt's parameters
+  (see app/core/opening_hours.py).
+
+The in-memory spatial index and per-tile cache paths hold WashroomOut
+payloads, which carry wheelchair_access and overall_rating but not amenities
+or compiled hours, so they apply the first two filters in Python and amenity
+and open_at filters always go to SQL. tests/test_filters.py EXPLAINs these
+queries to check that each filter can be answered from its index.
+"""
+
+from typing import Optional, Sequence
+
+from sqlalchemy.sql.elements import TextClause
+
+from app.api.serializers import WASHROOM_SELECT, washroom_query
+from app.core.opening_hours import DAWN, DUSK, OpenAt
+
+
+class WashroomFilters:
+    def __init__(
+        self,
+        wheelchair_access: Optional[bool] = None,
+        min_rating: Optional[float] = None,
+        amenities: Sequence[str] = (),
+        open_at: Optional[OpenAt] = None,
+    ):
+        self.wheelchair_access = wheelchair_access
+        self.min_rating = min_rating
+        # Sorted and deduplicated so equal filters build identical SQL
+        self.amenities = tuple(sorted(set(amenities)))
+        self.open_at = open_at
+
+    @property
+    def active(self) -> bool:
+        return (
+            self.wheelchair_access is not None
+            or self.min_rating is not None
+            or bool(self.amenities)
+            or self.open_at is not None
+        )
+
+    @property
+    def sql_only(self) -> bool:
+        """True if matches() cannot decide these filters (cached payloads lack the data)."""
+        return bool(self.amenities) or self.open_at is not None
+
+    def sql(self, table: str = "washrooms") -> tuple[list[str], dict]:
+        """(AND-ed predicates on washrooms, or its alias `table`, bind parameters)."""
+        conditions, params = [], {}
+        if self.wheelchair_access is True:
+            conditions.append(f"{table}.wheelchair_access")
+        elif self.wheelchair_access is False:
+            conditions.append(f"NOT {table}.wheelchair_access")
+        if self.min_rating is not None:
+            conditions.append(f"{table}.overall_rating >= :min_rating")
+            params["min_rating"] = self.min_rating
+        for i, name in enumerate(self.amenities):
+            conditions.append(f"""EXISTS (
+                    SELECT 1 FROM washroom_amenities wa
+                    JOIN amenities a ON a.id = wa.amenity_id
+                    WHERE wa.washroom_id = {table}.id AND a.name = :amenity_{i})""")
+            params[f"amenity_{i}"] = name
+        if self.open_at is not None:
+            conditions.append(f"""EXISTS (
+                    SELECT 1 FROM washroom_hours h
+                    WHERE h.washroom_id = {table}.id AND h.day = :open_day
+                    AND CASE h.open_min WHEN {DAWN} THEN :open_dawn ELSE h.open_min END <= :open_minute
+                    AND :open_minute < CASE h.close_min WHEN {DUSK} THEN :open_dusk ELSE h.close_min END)""")
+            params.update(self.open_at.params())
+        return conditions, params
+
+    def matches(self, payload: dict) -> bool:
+        """In-process equivalent for cached WashroomOut payloads (sql_only filters excluded)."""
+        if self.wheelchair_access is not None and payload["wheelchair_access"] != self.wheelchair_access:
+            return False
+        if self.min_rating is not None and (payload["overall_rating"] or 0.0) < self.min_rating:
+            return False
+        return True
+
+
+def bbox_query(
+    bounds: Optional[tuple[float, float, float, float]],
+    filters: WashroomFilters,
+    after_id: Optional[str],
+    limit: int,
+) -> tuple[TextClause, dict]:
+    """
+    One keyset page (ordered by id) of washrooms inside bounds
+    (min_lat, min_lon, max_lat, max_lon) that pass filters.
+    """
+    conditions, params = filters.sql()
+    # Tombstoned washrooms (see app/db/washroom_import.py) are never listed
+    conditions.append("removed_at IS NULL")
+    if bounds is not None:
+        min_lat, min_lon, max_lat, max_lon = bounds
+        params.update(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon)
+        conditions.insert(0, """ST_Within(
+                    geom,
+                    ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326))""")
+    if after_id is not None:
+        conditions.append("id > CAST(:after_id AS uuid)")
+        params["after_id"] = after_id
+    where = f"WHERE {' AND '.join(conditions)}"
+    params["limit"] = limit
+
+    query = washroom_query(f"""
+        SELECT {WASHROOM_SELECT}
+        FROM washrooms
+        {where}
+        ORDER BY id
+        LIMIT :limit
+    """)
+    return query, params
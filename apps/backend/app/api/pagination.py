@@ -0,0 +1,41 @@
+"""
+Keyset pagination helpers.
+
+Cursors are opaque to clients: the sort key of the last row on a page, JSON
+encoded and base64url'd. Handlers fetch `limit + 1` rows, return `limit` of
+them and put the cursor for the next page in the X-Next-Cursor header.
+"""
+
+import base64
+import json
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([str(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[str]:
+    """The cursor's `size` values, as the strings encode_cursor wrote; 400 for anything else."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (not isinstance(values, list) or len(values) != size
+            or not all(isinstance(v, str) for v in values)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def paginate(rows: Sequence, limit: int, response: Response, key) -> list:
+    """Trim an over-fetched page to `limit` rows and set the next-page cursor header."""
+    page = list(rows[:limit])
+    if len(rows) > limit and page:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(page[-1]))
+    return page
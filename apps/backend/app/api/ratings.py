@@ -0,0 +1,65 @@
+"""
+Review rating aggregates: applying a rating delta to a washroom and
+propagating it to ETags, caches and the in-memory index. Shared by every
+path that adds, edits or removes reviews (reviews and users routers).
+"""
+
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.serializers import washroom_to_dict
+from app.core.cache import response_cache
+from app.core.spatial_index import index_enabled, washroom_index
+from app.core.tile_cache import tile_cache
+from app.db import models, versions
+from app.db.leaderboard import APPLY_RATING_DELTA
+
+
+async def apply_rating_delta(
+    db: AsyncSession, washroom_id: UUID, sum_delta: int, count_delta: int
+) -> Optional[tuple[float, float]]:
+    """
+    Adjust the washroom's review aggregates and its leaderboard row in one
+    atomic statement (see app/db/leaderboard.py). The SET expressions read the
+    row's current values under its row lock, so concurrent reviewers cannot
+    lose each other's updates. Call after flushing the review.
+
+    Returns the washroom's (lat, long) when its aggregates changed, else None.
+    """
+    if not sum_delta and not count_delta:
+        return None
+    row = (await db.execute(APPLY_RATING_DELTA, {
+        "washroom_id": washroom_id, "sum_delta": sum_delta, "count_delta": count_delta,
+    })).one_or_none()
+    return (row.lat, row.long) if row is not None else None
+
+
+def review_scopes(washroom_id: UUID, point: Optional[tuple[float, float]]) -> tuple[str, ...]:
+    """
+    Version scopes / cache tags that a review write on this washroom changes;
+    its map region only when the aggregates moved (point from apply_rating_delta).
+    """
+    scopes = (versions.washroom_scope(washroom_id), versions.washroom_reviews_scope(washroom_id))
+    if point is not None:
+        scopes += (versions.region_scope(*point),)
+    return scopes
+
+
+async def bump_review_versions(db: AsyncSession, washroom_id: UUID, point) -> None:
+    """Invalidate ETags for anything a review write can change; call before commit."""
+    await db.run_sync(versions.bump, *review_scopes(washroom_id, point))
+
+
+async def after_rating_change(db: AsyncSession, washroom_id: UUID, point) -> None:
+    """Propagate committed rating aggregates to caches and the in-memory index."""
+    await response_cache.ainvalidate_tags(*review_scopes(washroom_id, point))
+    # populate_existing: the aggregates were changed by a Core UPDATE, so any
+    # copy already in the identity map is stale
+    washroom = await db.get(models.Washroom, washroom_id, populate_existing=True)
+    if washroom is None:
+        return
+    if index_enabled() and washroom.removed_at is None:
+        washroom_index.upsert(washroom_to_dict(washroom))
+    await tile_cache.ainvalidate_point(washroom.lat, washroom.long)
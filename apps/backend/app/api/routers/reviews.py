@@ -1,77 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, func
-from typing import List
-
-from app.db import models, schemas
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, tuple_
+from typing import List, Optional
+from datetime import datetime
+from pydantic import TypeAdapter
+
+from app.db import models, schemas, versions
 from app.api import deps
+from app.api.conditional import make_etag, not_modified
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, paginate
+from app.api.ratings import after_rating_change, apply_rating_delta, bump_review_versions
+from app.core.cache import response_cache
+from app.core.like_counter import RECORD_LIKE, REMOVE_LIKE, like_counter
 from uuid import UUID, uuid4
 
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
-def _recompute_washroom_rating(db: Session, washroom_id: UUID) -> None:
-    washroom = db.execute(
-        select(models.Washroom).where(models.Washroom.id == washroom_id)
-    ).scalar_one_or_none()
-    if not washroom:
-        return
-
-    count, avg = db.execute(
-        select(func.count(models.Review.id), func.avg(models.Review.rating)).where(
-            models.Review.washroom_id == washroom_id
+_REVIEW_ORDER = (models.Review.created_at.desc(), models.Review.id.desc())
+_REVIEWS_BY_WASHROOM = TypeAdapter(List[schemas.ReviewOutByWashroom])
+
+
+async def _review_page(db: AsyncSession, where, limit: int, cursor: Optional[str], response: Response):
+    """
+    Newest-first page of reviews keyed on (created_at, id), backed by the
+    composite (…, created_at DESC, id DESC) indexes so every page is a range scan.
+    """
+    query = select(models.Review).where(where)
+    if cursor is not None:
+        created_at, review_id = decode_cursor(cursor, 2)
+        try:
+            after = (datetime.fromisoformat(created_at), UUID(review_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(models.Review.created_at, models.Review.id) < tuple_(*after)
         )
-    ).one()
-
-    washroom.rating_count = int(count or 0)
-    washroom.overall_rating = float(avg) if avg is not None else 0.0
+    rows = (await db.execute(query.order_by(*_REVIEW_ORDER).limit(limit + 1))).scalars().all()
+    return paginate(rows, limit, response, key=lambda r: (r.created_at.isoformat(), r.id))
 
 
 # GET by users
 @router.get("/{user_id}", response_model=List[schemas.ReviewOutByUser])
-def get_review_by_user(
+async def get_review_by_user(
     user_id: str,
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: dict = Depends(deps.get_current_user),
 ):
     if user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    result = db.execute(
-        select(models.Review)
-        .where(models.Review.user_id == user_id)
-        .order_by(models.Review.created_at.desc())
-        )
-    reviews = result.scalars().all()
-
-    return reviews
+    return await _review_page(db, models.Review.user_id == user_id, limit, cursor, response)
 
 
 # GET by washrrom
-@router.get("/washroom/{washroom_id}", response_model=List[schemas.ReviewOutByWashroom])
-def get_review_by_washroom(washroom_id: str, db: Session = Depends(deps.get_db)):
+# versions lookup + page
+@router.get(
+    "/washroom/{washroom_id}",
+    response_model=List[schemas.ReviewOutByWashroom],
+    dependencies=[Depends(deps.query_budget(2))],
+)
+async def get_review_by_washroom(
+    washroom_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
     try:
         washroom_id = UUID(washroom_id)
     except ValueError:
         raise HTTPException(status_code = 400, detail = "Invalid Washroom ID format")
 
-    result = db.execute(
-        select(models.Review)
-        .where(models.Review.washroom_id == washroom_id)
-        .order_by(models.Review.created_at.desc())
-    )
-    reviews = result.scalars().all()
+    scope = versions.washroom_reviews_scope(washroom_id)
+    version = (await db.run_sync(versions.current, [scope]))[scope]
+    cached = not_modified(request, response, make_etag("reviews", washroom_id, version))
+    if cached is not None:
+        return cached
+
+    cache_key = f"reviews:{washroom_id}:v{version}:{limit}:{cursor or ''}"
+    hit = await response_cache.aget_response(cache_key)
+    if hit is None:
+        page = await _review_page(
+            db, models.Review.washroom_id == washroom_id, limit, cursor, response
+        )
+        body = _REVIEWS_BY_WASHROOM.dump_json(
+            _REVIEWS_BY_WASHROOM.validate_python(page, from_attributes=True)
+        )
+        next_cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        await response_cache.aset_response(cache_key, body, headers, tags=[scope])
+    else:
+        body, headers = hit
+        response.headers.update(headers)
 
-    return reviews
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
 
 
 
 # POST review
-@router.post("/", response_model=schemas.ReviewOutByWashroom, status_code=status.HTTP_201_CREATED)
-def create_Review(
+# washroom + existing review, insert/update, aggregate UPDATE, version bump,
+# washroom reload, review refresh
+@router.post(
+    "/",
+    response_model=schemas.ReviewOutByWashroom,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(deps.query_budget(7))],
+)
+async def create_Review(
     review_in: schemas.ReviewCreate,
     response: Response,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: dict = Depends(deps.get_current_user),
 ):
     user_id = current_user["id"]
@@ -79,13 +122,15 @@ def create_Review(
     # check first for existing review for washroom by user
     washroom_id = review_in.washroom_id
 
-    washroom = db.execute(
-        select(models.Washroom).where(models.Washroom.id == washroom_id)
-    ).scalar_one_or_none()
+    washroom = (await db.execute(
+        select(models.Washroom).where(
+            models.Washroom.id == washroom_id, models.Washroom.removed_at.is_(None)
+        )
+    )).scalar_one_or_none()
     if not washroom:
         raise HTTPException(status_code=404, detail="Washroom not found")
 
-    existing_reviews = db.execute(
+    existing_reviews = (await db.execute(
         select(models.Review)
         .where(
             and_(
@@ -93,19 +138,24 @@ def create_Review(
                 models.Review.washroom_id == washroom_id
             )
         ).order_by(models.Review.updated_at.desc())
-    ).scalars().all()
+        .with_for_update()
+    )).scalars().all()
 
     # Upsert behavior: if a review already exists for (washroom_id, user_id),
     # update it instead of creating a duplicate.
     if existing_reviews:
         review = existing_reviews[0]
+        sum_delta = review_in.rating - review.rating
+        count_delta = 0
         review.rating = review_in.rating
         review.title = review_in.title
         review.description = review_in.description
 
         # If duplicates somehow exist, keep the newest and delete the rest.
         for dup in existing_reviews[1:]:
-            db.delete(dup)
+            sum_delta -= dup.rating
+            count_delta -= 1
+            await db.delete(dup)
 
         response.status_code = status.HTTP_200_OK
     else:
@@ -118,18 +168,21 @@ def create_Review(
             likes=0,
         )
         db.add(review)
+        sum_delta, count_delta = review_in.rating, 1
         response.status_code = status.HTTP_201_CREATED
 
-    db.flush()
-    _recompute_washroom_rating(db, washroom_id)
-    db.commit()
-    db.refresh(review)
+    await db.flush()
+    point = await apply_rating_delta(db, washroom_id, sum_delta, count_delta)
+    await bump_review_versions(db, washroom_id, point)
+    await db.commit()
+    await after_rating_change(db, washroom_id, point)
+    await db.refresh(review)
     return review
 
 # PATCH review
-@router.patch("/{review_id}", status_code=status.HTTP_200_OK )
-def update_review(review_id: str,review_update: schemas.ReviewEdit,
-    db: Session = Depends(deps.get_db),
+@router.patch("/{review_id}", status_code=status.HTTP_200_OK, dependencies=[Depends(deps.query_budget(6))])
+async def update_review(review_id: str,review_update: schemas.ReviewEdit,
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: dict = Depends(deps.get_current_user),
     ):
     try:
@@ -137,8 +190,8 @@ def update_review(review_id: str,review_update: schemas.ReviewEdit,
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid review ID format")
 
-    result = db.execute(
-        select(models.Review).where(models.Review.id == review_id)
+    result = await db.execute(
+        select(models.Review).where(models.Review.id == review_id).with_for_update()
      )
 
     review = result.scalar_one_or_none()
@@ -149,6 +202,8 @@ def update_review(review_id: str,review_update: schemas.ReviewEdit,
     if review.user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Forbidden")
 
+    old_rating = review.rating
+
     # check for updated fields from input
     if review_update.rating is not None:
         review.rating = review_update.rating
@@ -158,17 +213,23 @@ def update_review(review_id: str,review_update: schemas.ReviewEdit,
         review.description = review_update.description
 
     washroom_id = review.washroom_id
-    db.flush()
-    _recompute_washroom_rating(db, washroom_id)
-    db.commit()
-    db.refresh(review)
+    await db.flush()
+    point = await apply_rating_delta(db, washroom_id, review.rating - old_rating, 0)
+    await bump_review_versions(db, washroom_id, point)
+    await db.commit()
+    await after_rating_change(db, washroom_id, point)
+    await db.refresh(review)
 
     return review
 # DELETE review
-@router.delete("/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_review(
+@router.delete(
+    "/{review_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(deps.query_budget(5))],
+)
+async def delete_review(
     review_id: str,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: dict = Depends(deps.get_current_user),
 ):
     """Delete a review"""
@@ -178,8 +239,8 @@ def delete_review(
         raise HTTPException(status_code=400, detail="Invalid review ID format")
 
     # Find the review
-    result = db.execute(
-        select(models.Review).where(models.Review.id == review_id)
+    result = await db.execute(
+        select(models.Review).where(models.Review.id == review_id).with_for_update()
     )
     review = result.scalar_one_or_none()
 
@@ -191,7 +252,55 @@ def delete_review(
 
     # Delete the review
     washroom_id = review.washroom_id
-    db.delete(review)
-    db.flush()
-    _recompute_washroom_rating(db, washroom_id)
-    db.commit()
+    await db.delete(review)
+    await db.flush()
+    point = await apply_rating_delta(db, washroom_id, -review.rating, -1)
+    await bump_review_versions(db, washroom_id, point)
+    await db.commit()
+    await after_rating_change(db, washroom_id, point)
+
+
+async def _vote(db: AsyncSession, review_id: str, user_id: str, liked: bool) -> dict:
+    """Record or withdraw one user's like; the counter change is buffered after commit."""
+    try:
+        review_id = UUID(review_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid review ID format")
+
+    row = (await db.execute(
+        RECORD_LIKE if liked else REMOVE_LIKE, {"review_id": review_id, "user_id": user_id}
+    )).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    await db.commit()
+
+    if row.changed:
+        await like_counter.aadd(review_id, 1 if liked else -1)
+    return {"review_id": review_id, "liked": liked, "likes": await like_counter.acurrent(review_id, row.likes)}
+
+
+# Like / unlike: idempotent, one vote per user
+@router.post(
+    "/{review_id}/like",
+    response_model=schemas.ReviewLikeOut,
+    dependencies=[Depends(deps.query_budget(1))],
+)
+async def like_review(
+    review_id: str,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: dict = Depends(deps.get_current_user),
+):
+    return await _vote(db, review_id, current_user["id"], liked=True)
+
+
+@router.delete(
+    "/{review_id}/like",
+    response_model=schemas.ReviewLikeOut,
+    dependencies=[Depends(deps.query_budget(1))],
+)
+async def unlike_review(
+    review_id: str,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: dict = Depends(deps.get_current_user),
+):
+    return await _vote(db, review_id, current_user["id"], liked=False)
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select
 from typing import List, Optional
 from pydantic import BaseModel
 
 from app.core.settings import settings
-from app.db import models, schemas
+from app.db import models, schemas, versions
+from app.core.like_counter import like_counter
+from app.core.user_cache import user_cache
 from app.api import deps
+from app.api.ratings import after_rating_change, apply_rating_delta, review_scopes
 from uuid import UUID, uuid4
 
 class UserUpdate(BaseModel):
@@ -23,53 +26,77 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[schemas.UserOut])
-def list_users(
-    db: Session = Depends(deps.get_db),
+async def list_users(
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: dict = Depends(deps.get_current_user),
 ):
     # Avoid exposing user enumeration in production.
     if settings.ENVIRONMENT.lower() not in {"development", "dev", "local"}:
         raise HTTPException(status_code=404, detail="Not found")
 
-    result = db.execute(select(models.User))
+    result = await db.execute(select(models.User))
     return result.scalars().all()
 
 
 @router.get("/me", response_model=schemas.UserOut)
-def get_user(db: Session = Depends(deps.get_db),
-             current_user: dict = Depends(deps.get_current_user)
-             ):
-    result = db.execute(select(models.User).where(models.User.id == current_user["id"]))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def get_user(user: schemas.UserOut = Depends(deps.get_current_db_user)):
     return user
 
 @router.delete("/{user_id}", status_code=204)
-def delete_user(
+async def delete_user(
     user_id: str,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: dict = Depends(deps.get_current_user),
 ):
     if user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    result = db.execute(select(models.User).where(models.User.id == user_id))
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code = 404, detail = "User ID not found")
 
-    db.delete(user)
-    db.commit()
+    # The user's reviews go with them (cascade): take their ratings out of each
+    # washroom's aggregates and leaderboard row first, as deleting a review does
+    reviews = (await db.execute(
+        select(models.Review.washroom_id, models.Review.rating)
+        .where(models.Review.user_id == user_id)
+        .with_for_update()
+    )).all()
+    deltas: dict = {}
+    for washroom_id, rating in reviews:
+        sum_delta, count_delta = deltas.get(washroom_id, (0, 0))
+        deltas[washroom_id] = (sum_delta - rating, count_delta - 1)
+    # Washroom rows are locked in id order, so concurrent deletes cannot deadlock
+    points = {}
+    for washroom_id in sorted(deltas):
+        points[washroom_id] = await apply_rating_delta(db, washroom_id, *deltas[washroom_id])
+    scopes = [s for w, point in points.items() for s in review_scopes(w, point)]
+    if scopes:
+        await db.run_sync(versions.bump, *scopes)
+
+    # Their likes cascade away too; the counts drop with the next like flush
+    liked = (await db.execute(
+        delete(models.ReviewLike).where(models.ReviewLike.user_id == user_id)
+        .returning(models.ReviewLike.review_id)
+    )).scalars().all()
+
+    await db.delete(user)
+    await db.commit()
+    await user_cache.ainvalidate(user_id)
+    for review_id in liked:
+        await like_counter.aadd(review_id, -1)
+    for washroom_id, point in points.items():
+        await after_rating_change(db, washroom_id, point)
     return
 
 # fe: usercreate -> be -> be: userOut -> db
 @router.post("/sync", response_model = schemas.UserOut, status_code = status.HTTP_201_CREATED)
-def create_user(user_in: schemas.UserCreate,
-                db: Session = Depends(deps.get_db),
+async def create_user(user_in: schemas.UserCreate,
+                db: AsyncSession = Depends(deps.get_async_db),
                 current_user: dict = Depends(deps.get_current_user)):
     user_id = current_user["id"]
-    result = db.execute(select(models.User).where(models.User.id == user_id))
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
     existing = result.scalar_one_or_none()
     if existing:
         # make updates here
@@ -78,8 +105,9 @@ def create_user(user_in: schemas.UserCreate,
             setattr(existing, key,value)
         if existing.public_id is None:
             existing.public_id = uuid4()
-        db.commit()
-        db.refresh(existing)
+        await db.commit()
+        await user_cache.ainvalidate(user_id)
+        await db.refresh(existing)
         return existing
 
     new_user = models.User(
@@ -94,22 +122,23 @@ def create_user(user_in: schemas.UserCreate,
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await user_cache.ainvalidate(user_id)
+    await db.refresh(new_user)
     return new_user
 
 
 @router.patch("/{user_id}", status_code = 204)
-def patch_user(
+async def patch_user(
     user_id: str,
     data: UserUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: dict = Depends(deps.get_current_user),
 ):
     if user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    res = db.execute(select(models.User).where(models.User.id == user_id))
+    res = await db.execute(select(models.User).where(models.User.id == user_id))
     user = res.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code = 404, detail = "User not found")
@@ -118,7 +147,8 @@ def patch_user(
     for key, value in updates.items():
         setattr(user, key, value)
 
-    db.commit()
+    await db.commit()
+    await user_cache.ainvalidate(user_id)
     return
 
 
@@ -1,14 +1,38 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import select, text
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, text
 from typing import List, Optional
+from types import SimpleNamespace
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import hashlib
+import heapq
+import orjson
 import uuid
 
-from app.db import models, session
+from app.db import models, session, versions
 from app.api import deps
+from app.api.conditional import make_etag, not_modified
+from app.api.filters import WashroomFilters, bbox_query
+from app.api.pagination import decode_cursor, paginate
+from app.api.search import prefix_tsquery, radius_bbox, search_query, suggest_query
+from app.api.serializers import (
+    WASHROOM_COLUMNS,
+    WASHROOM_SELECT,
+    json_response,
+    washroom_query,
+    washroom_to_dict,
+)
+from app.core.cache import response_cache
+from app.core.geohash import cells_around, encode
+from app.core.opening_hours import DEFAULT_LOCATION, OpenAt, hours_rows
+from app.core.settings import settings
+from app.core.spatial_index import index_enabled, washroom_index
+from app.core.tile_cache import TILE_BUFFER, TILE_EXTENT, tile_cache
+from app.core.tiles import MAX_TILE_ZOOM, tile_bounds, tile_count, tile_for_point, tiles_covering_bbox
 import app.db.schemas as schemas
-from geoalchemy2.shape import to_shape
 from geoalchemy2 import WKTElement
+from pydantic import ValidationError
 
 
 router = APIRouter(
@@ -16,165 +40,547 @@ router = APIRouter(
     tags = ["washrooms"]
 )
 
-def _geom_to_geojson(geom_value):
-    if geom_value is None:
-        return None
-    try:
-        geom_obj = to_shape(geom_value)
-        return {"type": "Point", "coordinates": [geom_obj.x, geom_obj.y]}
-    except Exception:
+async def _bbox_from_tile_cache(db: AsyncSession, region_versions: dict, tiles: list) -> list[dict]:
+    """
+    Washrooms in the given map tiles, reading each tile's rows from
+    response_cache and filling all missing tiles with a single query. Each
+    entry is keyed on its region's version, so writes elsewhere keep it warm.
+    """
+    regions = [versions.tile_region_scope(*t) for t in tiles]
+    keys = [
+        f"bbox:v{region_versions[r]}:{z}/{x}/{y}" for (z, x, y), r in zip(tiles, regions)
+    ]
+    cached = await response_cache.aget_many(keys)
+    rows: list[dict] = []
+    missing = {}
+    for tile, key, region, value in zip(tiles, keys, regions, cached):
+        if value is None:
+            missing[tile] = (key, region)
+        else:
+            rows.extend(orjson.loads(value))
+    if not missing:
+        return rows
+
+    bounds = [tile_bounds(*t) for t in missing]
+    fetched = await db.execute(washroom_query(f"""
+        SELECT {WASHROOM_SELECT}
+        FROM washrooms
+        WHERE geom && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)
+          AND removed_at IS NULL
+    """), {
+        "min_lat": min(b[0] for b in bounds),
+        "min_lon": min(b[1] for b in bounds),
+        "max_lat": max(b[2] for b in bounds),
+        "max_lon": max(b[3] for b in bounds),
+    })
+    zoom = settings.BBOX_CACHE_ZOOM
+    per_tile: dict = {tile: [] for tile in missing}
+    for w in fetched:
+        tile = (zoom, *tile_for_point(zoom, w.lat, w.long))
+        if tile in per_tile:
+            per_tile[tile].append(washroom_to_dict(w))
+    for tile, items in per_tile.items():
+        key, region = missing[tile]
+        await response_cache.aset(key, orjson.dumps(items), tags=[region])
+        rows.extend(items)
+    return rows
+
+
+def _open_at(open_now: bool, open_at: Optional[datetime], lat: float, lon: float) -> Optional[OpenAt]:
+    """open_now / open_at query params as an OpenAt at (lat, lon), or None when neither is set."""
+    if open_at is None and not open_now:
         return None
+    return OpenAt.resolve(open_at, lat, lon, ZoneInfo(settings.HOURS_TIMEZONE))
 
 
 @router.get("/", response_model=List[schemas.WashroomOut])
-def get_washrooms_in_bounds(
+async def get_washrooms_in_bounds(
+    request: Request,
+    response: Response,
     min_lat: float = Query(None , ge = -90, le =90),
     min_lon: float = Query(None, ge = -180, le = 180),
     max_lat: float = Query(None, ge = -90, le = 90),
     max_lon: float = Query(None, ge= -180, le = 180),
-    db: Session = Depends(deps.get_db)
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    wheelchair_access: Optional[bool] = Query(None),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    amenity: Optional[List[str]] = Query(None, description="Amenity name; repeat to require several"),
+    open_now: bool = Query(False),
+    open_at: Optional[datetime] = Query(None, description="Open at this time (local if no offset)"),
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
+    # Keyset on the primary key: each page is an index range scan from the cursor
+    after_id = None
+    if cursor is not None:
+        after_id = decode_cursor(cursor, 1)[0]
+        try:
+            after_id = str(uuid.UUID(after_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    query = ""
-    if all(v is not None for v in [min_lat, min_lon, max_lat, max_lon]):
-        query = text("""
-            SELECT *
-            FROM washrooms
-                WHERE ST_Within(
-                    geom,
-                    ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326))
+    has_bounds = all(v is not None for v in [min_lat, min_lon, max_lat, max_lon])
+    # Dawn/dusk are those at the viewport centre
+    center = ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2) if has_bounds else DEFAULT_LOCATION
+    filters = WashroomFilters(
+        wheelchair_access, min_rating, amenity or (), _open_at(open_now, open_at, *center)
+    )
+    # Cached payloads carry no amenities or hours, so those filters always go to SQL
+    use_cached = not filters.sql_only
+    # In-process paths: rows past the cursor are filtered first and only the
+    # next limit + 1 ids are selected (heap, O(n log limit)), never a full sort
+    if has_bounds and use_cached and index_enabled():
+        etag = make_etag("idx", washroom_index.epoch, washroom_index.version)
+        cached = not_modified(request, response, etag)
+        if cached is not None:
+            return cached
+        payloads = heapq.nsmallest(
+            limit + 1,
+            (
+                p for p in washroom_index.query_bbox(min_lat, min_lon, max_lat, max_lon)
+                if (after_id is None or p["id"] > after_id) and filters.matches(p)
+            ),
+            key=lambda p: p["id"],
+        )
+        page = paginate(payloads, limit, response, key=lambda p: (p["id"],))
+        return json_response(page, response)
 
+    # Versions of the regions under the viewport, read before the data: a write
+    # landing in between only costs one extra refetch. Unbounded or very large
+    # viewports have no region set to version and are served without an ETag.
+    region_versions = None
+    if has_bounds and versions.region_count(min_lat, min_lon, max_lat, max_lon) <= settings.VERSION_MAX_REGIONS:
+        regions = versions.region_scopes(min_lat, min_lon, max_lat, max_lon)
+        region_versions = await db.run_sync(versions.current, regions)
+    # open_now answers change with the clock, not the version, so they are never 304s
+    if region_versions is not None and not (open_now and open_at is None):
+        etag = make_etag("washrooms", versions.digest(region_versions))
+        cached = not_modified(request, response, etag)
+        if cached is not None:
+            return cached
 
-        """)
-    else:
-        query = text("""
-            SELECT * from washrooms
-                     """)
+    # Small viewports are assembled from per-tile cache entries, then trimmed to
+    # the exact bbox. Tiles are counted from the corners first: a world-sized
+    # bbox would otherwise list tens of millions of them.
+    tiles = []
+    if (has_bounds and use_cached and region_versions is not None
+            and 0 < tile_count(settings.BBOX_CACHE_ZOOM, min_lat, min_lon, max_lat, max_lon)
+            <= settings.BBOX_CACHE_MAX_TILES):
+        tiles = tiles_covering_bbox(settings.BBOX_CACHE_ZOOM, min_lat, min_lon, max_lat, max_lon)
+    if tiles:
+        payloads = heapq.nsmallest(
+            limit + 1,
+            (
+                p for p in await _bbox_from_tile_cache(db, region_versions, tiles)
+                if min_lat <= p["lat"] <= max_lat and min_lon <= p["long"] <= max_lon
+                and (after_id is None or p["id"] > after_id) and filters.matches(p)
+            ),
+            key=lambda p: p["id"],
+        )
+        page = paginate(payloads, limit, response, key=lambda p: (p["id"],))
+        return json_response(page, response)
+
+    query, params = bbox_query(
+        (min_lat, min_lon, max_lat, max_lon) if has_bounds else None,
+        filters,
+        after_id,
+        limit + 1,
+    )
+    result = await db.execute(query, params)
+
+    washrooms = paginate(result.fetchall(), limit, response, key=lambda w: (w.id,))
+    return json_response([washroom_to_dict(w) for w in washrooms], response)
+
+
+@router.get("/nearby", response_model=List[schemas.WashroomNearbyOut])
+async def get_nearby_washrooms(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    limit: int = Query(20, ge=1, le=100),
+    radius_m: Optional[float] = Query(None, gt=0, le=50_000),
+    open_now: bool = Query(False),
+    open_at: Optional[datetime] = Query(None, description="Open at this time (local if no offset)"),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Nearest washrooms to a point, closest first, with distance in metres.
+
+    The inner query orders by `geom <-> point` so PostGIS walks idx_washrooms_geom
+    in distance order and stops after `limit` rows. When radius_m is set, a
+    `geom && ST_MakeEnvelope(...)` bbox keeps the index scan bounded and ST_DWithin on
+    geography applies the exact metre cutoff. open_now / open_at probe each
+    candidate's washroom_hours as the scan goes, with dawn/dusk at the point.
+    """
+    filters = WashroomFilters(open_at=_open_at(open_now, open_at, lat, lon))
+    conditions, params = filters.sql("w")
+    conditions.append("w.removed_at IS NULL")
+    params.update(lat=lat, lon=lon, limit=limit)
+    if radius_m is not None:
+        params.update(radius_bbox(lat, lon, radius_m), radius_m=radius_m)
+        conditions[:0] = [
+            "w.geom && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)",
+            """ST_DWithin(
+                        w.geom::geography,
+                        ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
+                        :radius_m)""",
+        ]
+    where = f"WHERE {' AND '.join(conditions)}"
 
+    # The point is inlined (not joined) so the planner sees a constant KNN operand
+    query = washroom_query(f"""
+        SELECT knn.*
+        FROM (
+            SELECT {", ".join("w." + c for c in WASHROOM_COLUMNS)},
+                   ST_Distance(
+                       w.geom::geography,
+                       ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
+                   ) AS distance_m
+            FROM washrooms w
+            {where}
+            ORDER BY w.geom <-> ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)
+            LIMIT :limit
+        ) knn
+        ORDER BY knn.distance_m
+    """)
 
-    result = db.execute(query, {
+    rows = (await db.execute(query, params)).fetchall()
+    return json_response(
+        [dict(washroom_to_dict(w), distance_m=w.distance_m) for w in rows]
+    )
+
+
+# Grid cells per 256px map tile when clustering (roughly one cluster per 64px)
+_CLUSTER_CELLS_PER_TILE = 4
+
+
+@router.get("/clusters", response_model=List[schemas.WashroomClusterOut])
+async def get_washroom_clusters(
+    zoom: int = Query(..., ge=0, le=22),
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Grid clusters for zoomed-out map views.
+
+    Points in the bbox are bucketed into square cells sized from the zoom level
+    (360 / 2^zoom degrees per tile, split into _CLUSTER_CELLS_PER_TILE cells) and
+    each cell returns its centroid, count and review-weighted average rating. The number of
+    clusters is bounded by viewport size / cell size, not by point density.
+    """
+    cell = 360.0 / (2 ** zoom) / _CLUSTER_CELLS_PER_TILE
+
+    query = text("""
+        SELECT AVG(lat) AS lat,
+               AVG(long) AS long,
+               COUNT(*) AS count,
+               SUM(overall_rating * rating_count)
+                   / NULLIF(SUM(rating_count), 0) AS avg_rating,
+               CASE WHEN COUNT(*) = 1 THEN (array_agg(id))[1] END AS washroom_id
+        FROM washrooms
+        WHERE geom && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)
+          AND removed_at IS NULL
+        GROUP BY floor(long / :cell), floor(lat / :cell)
+    """)
+
+    rows = (await db.execute(query, {
         "min_lon": min_lon,
         "min_lat": min_lat,
         "max_lon": max_lon,
-        "max_lat": max_lat
-    })
+        "max_lat": max_lat,
+        "cell": cell,
+    })).fetchall()
 
-    washrooms = result.fetchall()
-    # Convert geom to GeoJSON for each washroom (handle WKB/WKT or raw values)
-    response = []
-    for w in washrooms:
-        geom_geojson = _geom_to_geojson(w.geom)
-
-        response.append(
-            schemas.WashroomOut(
-                id=str(w.id),
-                name=w.name,
-                description=w.description,
-                address=w.address,
-                city=w.city,
-                country=w.country,
-                geom=geom_geojson,
-                lat=w.lat,
-                long=w.long,
-                opening_hours=w.opening_hours,
-                wheelchair_access=w.wheelchair_access,
-                overall_rating=w.overall_rating,
-                rating_count=w.rating_count,
-                created_by=str(w.created_by)
-            )
+    return [
+        schemas.WashroomClusterOut(
+            lat=c.lat,
+            long=c.long,
+            count=c.count,
+            avg_rating=c.avg_rating,
+            washroom_id=c.washroom_id,
         )
+        for c in rows
+    ]
 
-    return response
 
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+async def get_washroom_tile(
+    z: int,
+    x: int,
+    y: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """Mapbox Vector Tile of washrooms in tile z/x/y, served from tile_cache when warm."""
+    if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="invalid tile coordinates")
 
-@router.get("/me", response_model=List[schemas.WashroomOut])
-def get_my_washrooms(
-    db: Session = Depends(deps.get_db),
-    current_user: dict = Depends(deps.get_current_user),
+    tile = await tile_cache.aget(z, x, y)
+    if tile is None:
+        query = text("""
+            WITH mvtgeom AS (
+                SELECT ST_AsMVTGeom(
+                           ST_Transform(w.geom, 3857),
+                           ST_TileEnvelope(:z, :x, :y),
+                           :extent, :buffer, true
+                       ) AS geom,
+                       w.id::text AS id,
+                       w.name,
+                       w.overall_rating,
+                       w.rating_count,
+                       w.wheelchair_access
+                FROM washrooms w
+                WHERE w.geom && ST_Transform(
+                    ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326)
+                  AND w.removed_at IS NULL
+            )
+            SELECT ST_AsMVT(mvtgeom, 'washrooms', :extent, 'geom') FROM mvtgeom
+        """)
+        tile = (await db.execute(query, {
+            "z": z,
+            "x": x,
+            "y": y,
+            "extent": TILE_EXTENT,
+            "buffer": TILE_BUFFER,
+            "margin": TILE_BUFFER / TILE_EXTENT,
+        })).scalar()
+        tile = bytes(tile) if tile is not None else b""
+        await tile_cache.aset(z, x, y, tile)
+
+    return Response(content=tile, media_type="application/vnd.mapbox-vector-tile")
+
+
+@router.get("/search", response_model=List[schemas.WashroomSearchOut])
+async def search_washrooms(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_m: Optional[float] = Query(None, gt=0, le=50_000),
+    db: AsyncSession = Depends(deps.get_async_db),
 ):
-    user_result = db.execute(
-        select(models.User).where(models.User.id == current_user["id"])
+    """
+    Full-text search over name, description and address, best match first.
+    The last word matches as a prefix. Optionally limited to a bbox, or to
+    radius_m around lat/lon (lat/lon alone adds distance_m and breaks ties by it).
+    """
+    bounds = [min_lat, min_lon, max_lat, max_lon]
+    if any(v is not None for v in bounds) and not all(v is not None for v in bounds):
+        raise HTTPException(status_code=400, detail="min_lat, min_lon, max_lat and max_lon go together")
+    if (lat is None) != (lon is None) or (radius_m is not None and lat is None):
+        raise HTTPException(status_code=400, detail="lat and lon go together, and radius_m needs both")
+
+    tsquery = prefix_tsquery(q)
+    if tsquery is None:
+        return json_response([])
+
+    query, params = search_query(
+        tsquery,
+        limit,
+        settings.SEARCH_MAX_CANDIDATES,
+        bbox=tuple(bounds) if bounds[0] is not None else None,
+        near=(lat, lon, radius_m) if lat is not None else None,
+    )
+    rows = (await db.execute(query, params)).fetchall()
+    return json_response(
+        [dict(washroom_to_dict(w), rank=w.rank, distance_m=w.distance_m) for w in rows]
     )
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    result = db.execute(
+
+@router.get("/leaderboard", response_model=List[schemas.WashroomLeaderboardOut])
+async def get_leaderboard(
+    request: Request,
+    response: Response,
+    city: Optional[str] = Query(None, max_length=100),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Best-rated washrooms in a city, or near lat/lon (the geohash cell around
+    the point and its eight neighbours), highest Bayesian score first (see
+    app/db/leaderboard.py). Unreviewed washrooms are not ranked.
+    """
+    if (lat is None) != (lon is None) or (city is None) == (lat is None):
+        raise HTTPException(status_code=400, detail="Give either city, or lat and lon")
+
+    if lat is not None:
+        # Near me is versioned by the regions under the 3x3 cells; a city has no
+        # bounded region set (and one scope per city would be a hot row again).
+        # Coarse cell precisions can span too many regions: no ETag then.
+        _, (min_lat, min_lon, max_lat, max_lon) = encode(lat, lon, settings.LEADERBOARD_CELL_PRECISION)
+        height, width = max_lat - min_lat, max_lon - min_lon
+        around = (
+            max(min_lat - height, -90), max(min_lon - width, -180),
+            min(max_lat + height, 90), min(max_lon + width, 180),
+        )
+        if versions.region_count(*around) <= settings.VERSION_MAX_REGIONS:
+            regions = versions.region_scopes(*around)
+            digest = versions.digest(await db.run_sync(versions.current, regions))
+            cached = not_modified(request, response, make_etag("leaderboard", digest))
+            if cached is not None:
+                return cached
+
+    if city is not None:
+        # One index range scan on (city, score DESC)
+        top = "SELECT washroom_id, score FROM washroom_leaderboard WHERE city = :city"
+        params = {"city": city}
+    else:
+        # Top `limit` per cell off (cell, score DESC), merged below
+        top = """
+            SELECT t.washroom_id, t.score
+            FROM unnest(CAST(:cells AS text[])) AS c(cell)
+            CROSS JOIN LATERAL (
+                SELECT washroom_id, score FROM washroom_leaderboard l
+                WHERE l.cell = c.cell
+                ORDER BY score DESC, washroom_id
+                LIMIT :limit
+            ) t
+        """
+        params = {"cells": cells_around(lat, lon, settings.LEADERBOARD_CELL_PRECISION)}
+    params["limit"] = limit
+    query = washroom_query(f"""
+        SELECT {", ".join("w." + c for c in WASHROOM_COLUMNS)}, top.score
+        FROM (
+            {top}
+            ORDER BY score DESC, washroom_id
+            LIMIT :limit
+        ) top
+        JOIN washrooms w ON w.id = top.washroom_id
+        ORDER BY top.score DESC, w.id
+    """)
+    rows = (await db.execute(query, params)).fetchall()
+    return json_response([dict(washroom_to_dict(w), score=w.score) for w in rows], response)
+
+
+@router.get("/search/suggest", response_model=List[schemas.WashroomSuggestOut])
+async def suggest_washrooms(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """As-you-type washroom names, closest trigram match first; tolerates typos."""
+    query, params = suggest_query(q.strip(), limit)
+    rows = (await db.execute(query, params)).fetchall()
+    return json_response([
+        {"id": str(r.id), "name": r.name, "city": r.city, "lat": r.lat, "long": r.long}
+        for r in rows
+    ])
+
+
+@router.get("/me", response_model=List[schemas.WashroomOut])
+async def get_my_washrooms(
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: schemas.UserOut = Depends(deps.get_current_db_user),
+):
+    result = await db.execute(
         select(models.Washroom).where(models.Washroom.created_by == user.public_id)
     )
     washrooms = result.scalars().all()
+    return json_response([washroom_to_dict(w) for w in washrooms])
 
-    response = []
-    for w in washrooms:
-        geom_geojson = _geom_to_geojson(w.geom)
-        response.append(
-            schemas.WashroomOut(
-                id=str(w.id),
-                name=w.name,
-                description=w.description,
-                address=w.address,
-                city=w.city,
-                country=w.country,
-                geom=geom_geojson,
-                lat=w.lat,
-                long=w.long,
-                opening_hours=w.opening_hours,
-                wheelchair_access=w.wheelchair_access,
-                overall_rating=w.overall_rating,
-                rating_count=w.rating_count,
-                created_by=str(w.created_by),
-            )
+
+@router.get("/batch", response_model=List[schemas.WashroomOut])
+async def get_washrooms_batch(
+    request: Request,
+    response: Response,
+    ids: str = Query(..., description="Comma-separated washroom ids"),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Several washrooms by id, in request order (unknown ids are skipped).
+
+    Shares the per-washroom cache entries of GET /washrooms/{id}: versions for
+    every id come back in one query, cached bodies in one get_many, and only
+    the misses are read with a single `id = ANY(...)` query.
+    """
+    try:
+        washroom_ids = list(dict.fromkeys(uuid.UUID(i.strip()) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="washroom IDs must be uuids")
+    if not washroom_ids:
+        return json_response([], response)
+    if len(washroom_ids) > settings.BATCH_FETCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_FETCH_MAX_IDS} ids per request",
         )
 
-    return response
+    scopes = [versions.washroom_scope(i) for i in washroom_ids]
+    current = await db.run_sync(versions.current, scopes)
+    digest = hashlib.sha1(",".join(f"{s}:{current[s]}" for s in scopes).encode()).hexdigest()[:16]
+    cached = not_modified(request, response, make_etag("batch", digest))
+    if cached is not None:
+        return cached
+
+    keys = [f"washroom:{i}:v{current[s]}" for i, s in zip(washroom_ids, scopes)]
+    bodies = dict(zip(washroom_ids, await response_cache.aget_many(keys)))
+    missing = [i for i, body in bodies.items() if body is None]
+    if missing:
+        rows = await db.execute(
+            washroom_query(f"""
+                SELECT {WASHROOM_SELECT}
+                FROM washrooms
+                WHERE id = ANY(CAST(:ids AS uuid[])) AND removed_at IS NULL
+            """),
+            {"ids": missing},
+        )
+        for row in rows:
+            washroom_id = uuid.UUID(str(row.id))
+            scope = versions.washroom_scope(washroom_id)
+            body = orjson.dumps(washroom_to_dict(row))
+            bodies[washroom_id] = body
+            await response_cache.aset(f"washroom:{washroom_id}:v{current[scope]}", body, tags=[scope])
+
+    content = b"[" + b",".join(b for b in bodies.values() if b is not None) + b"]"
+    return Response(content=content, media_type="application/json", headers=dict(response.headers))
 
 
 @router.get("/{washroom_id}", response_model = schemas.WashroomOut)
-def get_washroom(washroom_id: str, db: Session = Depends(deps.get_db)):
+async def get_washroom(
+    washroom_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+):
     try:
         washroom_id = uuid.UUID(washroom_id)
     except ValueError:
         raise HTTPException(status_code = 400, detail = "washroom ID must be uuid")
 
-    res = db.execute(select(models.Washroom).where(models.Washroom.id == washroom_id))
-    washroom = res.scalar_one_or_none()
-    if not washroom:
-        raise HTTPException(status_code = 404, detail = "washroom not found")
-
-    # Convert geom to GeoJSON
-    geom_geojson = _geom_to_geojson(washroom.geom)
-
-    return schemas.WashroomOut(
-        id=str(washroom.id),
-        name=washroom.name,
-        description=washroom.description,
-        address=washroom.address,
-        city=washroom.city,
-        country=washroom.country,
-        geom=geom_geojson,
-        lat = washroom.lat,
-        long = washroom.long,
-        opening_hours=washroom.opening_hours,
-        wheelchair_access = washroom.wheelchair_access,
-        overall_rating=washroom.overall_rating,
-        rating_count=washroom.rating_count,
-        created_by=str(washroom.created_by)
-    )
+    scope = versions.washroom_scope(washroom_id)
+    version = (await db.run_sync(versions.current, [scope]))[scope]
+    cached = not_modified(request, response, make_etag("washroom", washroom_id, version))
+    if cached is not None:
+        return cached
+
+    cache_key = f"washroom:{washroom_id}:v{version}"
+    body = await response_cache.aget(cache_key)
+    if body is None:
+        res = await db.execute(select(models.Washroom).where(
+            models.Washroom.id == washroom_id, models.Washroom.removed_at.is_(None)
+        ))
+        washroom = res.scalar_one_or_none()
+        if not washroom:
+            raise HTTPException(status_code = 404, detail = "washroom not found")
+        body = orjson.dumps(washroom_to_dict(washroom))
+        await response_cache.aset(cache_key, body, tags=[scope])
+
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
 
 
 @router.post("/", response_model=schemas.WashroomOut, status_code=status.HTTP_201_CREATED)
-def create_washroom(
+async def create_washroom(
     washroom_in: schemas.WashroomCreate,
-    db: Session = Depends(deps.get_db),
-    current_user: dict = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: schemas.UserOut = Depends(deps.get_current_db_user),
 ):
-    user_result = db.execute(
-        select(models.User).where(models.User.id == current_user["id"])
-    )
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     # Convert GeoJSON dict to WKT string if needed
     if isinstance(washroom_in.geom, dict):
         coords = washroom_in.geom["coordinates"]
@@ -200,23 +606,89 @@ def create_washroom(
         created_by=user.public_id
     )
     db.add(new_washroom)
-    db.commit()
-    db.refresh(new_washroom)
-
-    geom_geojson = _geom_to_geojson(new_washroom.geom)
-    return schemas.WashroomOut(
-        id=str(new_washroom.id),
-        name=new_washroom.name,
-        description=new_washroom.description,
-        address=new_washroom.address,
-        city=new_washroom.city,
-        country=new_washroom.country,
-        geom=geom_geojson,
-        lat=new_washroom.lat,
-        long=new_washroom.long,
-        opening_hours=new_washroom.opening_hours,
-        wheelchair_access=new_washroom.wheelchair_access,
-        overall_rating=new_washroom.overall_rating,
-        rating_count=new_washroom.rating_count,
-        created_by=str(new_washroom.created_by),
+    await db.flush()
+    hours = hours_rows(new_washroom.id, washroom_in.opening_hours)
+    if hours:
+        await db.execute(insert(models.WashroomHours).values(hours))
+    region = versions.region_scope(new_washroom.lat, new_washroom.long)
+    await db.run_sync(versions.bump, region)
+    await db.commit()
+    await db.refresh(new_washroom)
+    payload = washroom_to_dict(new_washroom)
+    if index_enabled():
+        washroom_index.upsert(payload)
+    await tile_cache.ainvalidate_point(new_washroom.lat, new_washroom.long)
+    await response_cache.ainvalidate_tags(region)
+
+    return json_response(payload, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk", response_model=schemas.WashroomBulkOut)
+async def create_washrooms_bulk(
+    bulk_in: schemas.WashroomBulkCreate,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: schemas.UserOut = Depends(deps.get_current_db_user),
+):
+    """
+    Create up to BULK_CREATE_MAX_ITEMS washrooms in one multi-row INSERT.
+
+    Every item is validated first; invalid items are reported by index and the
+    rest are still created. Results come back in request order.
+    """
+    if len(bulk_in.washrooms) > settings.BULK_CREATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BULK_CREATE_MAX_ITEMS} washrooms per request",
+        )
+
+    results = []
+    rows = []
+    hours = []
+    for index, item in enumerate(bulk_in.washrooms):
+        try:
+            washroom_in = schemas.WashroomBulkItem.model_validate(item)
+        except ValidationError as exc:
+            results.append(schemas.WashroomBulkResult(index=index, errors=[
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+            ]))
+            continue
+        washroom_id = uuid.uuid4()
+        rows.append({
+            "id": washroom_id,
+            "name": washroom_in.name,
+            "description": washroom_in.description,
+            "address": washroom_in.address,
+            "city": washroom_in.city,
+            "country": washroom_in.country,
+            "geom": WKTElement(f"POINT({washroom_in.long} {washroom_in.lat})", srid=4326),
+            "lat": washroom_in.lat,
+            "long": washroom_in.long,
+            "opening_hours": washroom_in.opening_hours,
+            "wheelchair_access": washroom_in.wheelchair_access,
+            # These are derived from reviews; never trust client-provided values.
+            "overall_rating": 0.0,
+            "rating_count": 0,
+            "rating_sum": 0,
+            "created_by": user.public_id,
+        })
+        hours += hours_rows(washroom_id, washroom_in.opening_hours)
+        results.append(schemas.WashroomBulkResult(index=index, id=washroom_id))
+
+    if rows:
+        await db.execute(insert(models.Washroom).values(rows))
+        if hours:
+            await db.execute(insert(models.WashroomHours).values(hours))
+        regions = {versions.region_scope(row["lat"], row["long"]) for row in rows}
+        await db.run_sync(versions.bump, *regions)
+        await db.commit()
+
+        for row in rows:
+            if index_enabled():
+                washroom_index.upsert(washroom_to_dict(SimpleNamespace(**row)))
+            await tile_cache.ainvalidate_point(row["lat"], row["long"])
+        await response_cache.ainvalidate_tags(*regions)
+
+    return schemas.WashroomBulkOut(
+        created=len(rows), failed=len(results) - len(rows), results=results
     )
+
@@ -0,0 +1,138 @@
+"""
+Washroom search queries, shared by the washrooms router and benchmarks/bench_search.py.
+
+Full-text search matches washrooms.search_vector (a generated, weighted
+tsvector over name, description and address; GIN index idx_washrooms_search)
+against a prefix tsquery built from the user's words, so "stan par" already
+finds "Stanley Park". Ranking with ts_rank_cd has to look at every match, so
+it is applied to at most SEARCH_MAX_CANDIDATES matching rows, picked by a
+cheap relevance proxy: rows whose name (weight A) matches every word first,
+then the most reviewed. A very common word over the whole map therefore ranks
+its likeliest matches, and narrowing by bbox or radius (recommended for map
+clients) makes the ranking exact.
+
+Autocomplete orders names by trigram word distance (`name <->> q`), which the
+GiST index idx_washrooms_name_trgm returns in order, so the first rows come
+straight off the index however many names match.
+"""
+
+import math
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from app.api.serializers import WASHROOM_COLUMNS, washroom_query
+
+# Metres per degree of latitude; used to turn a radius into a planar bbox prefilter
+METERS_PER_DEGREE = 111_320.0
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Most words taken from a query; longer input is truncated
+_MAX_TERMS = 8
+
+
+def prefix_tsquery(q: str) -> Optional[str]:
+    """
+    to_tsquery() input matching every word of q, the last one as a prefix
+    ("kits bea" -> "kits & bea:*"). None when q has no words. Only \\w runs are
+    kept, so tsquery operators in user input cannot break the syntax.
+    """
+    words = _WORD.findall(q.lower())[:_MAX_TERMS]
+    if not words:
+        return None
+    return " & ".join(words[:-1] + [words[-1] + ":*"])
+
+
+def name_tsquery(tsquery: str) -> str:
+    """prefix_tsquery output restricted to name lexemes ("kits & bea:*" -> "kits:A & bea:*A")."""
+    return " & ".join(
+        term + "A" if term.endswith(":*") else term + ":A" for term in tsquery.split(" & ")
+    )
+
+
+def radius_bbox(lat: float, lon: float, radius_m: float) -> dict:
+    """A min/max lat/lon box containing the circle, as query parameters."""
+    lat_deg = radius_m / METERS_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    lon_deg = min(lat_deg / cos_lat, 180.0)
+    return {
+        "min_lon": lon - lon_deg,
+        "min_lat": lat - lat_deg,
+        "max_lon": lon + lon_deg,
+        "max_lat": lat + lat_deg,
+    }
+
+
+def search_query(
+    tsquery: str,
+    limit: int,
+    max_candidates: int,
+    bbox: Optional[tuple[float, float, float, float]] = None,
+    near: Optional[tuple[float, float, Optional[float]]] = None,
+) -> tuple[TextClause, dict]:
+    """
+    Ranked full-text search. bbox is (min_lat, min_lon, max_lat, max_lon);
+    near is (lat, lon, radius_m or None) and adds distance_m to each row (and
+    the radius cutoff when given). Best rank first, nearest first among ties.
+    """
+    params = {
+        "tsquery": tsquery, "name_tsquery": name_tsquery(tsquery),
+        "limit": limit, "max_candidates": max_candidates,
+    }
+    filters = []
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        params.update(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon)
+        filters.append("geom && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)")
+
+    distance = "NULL::float8"
+    if near is not None:
+        lat, lon, radius_m = near
+        params.update(lat=lat, lon=lon)
+        point = "ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)"
+        distance = f"ST_Distance(w.geom::geography, {point}::geography)"
+        if radius_m is not None:
+            box = radius_bbox(lat, lon, radius_m)
+            params.update({f"r_{k}": v for k, v in box.items()}, radius_m=radius_m)
+            filters.append(
+                "geom && ST_MakeEnvelope(:r_min_lon, :r_min_lat, :r_max_lon, :r_max_lat, 4326)"
+            )
+            filters.append(f"ST_DWithin(geom::geography, {point}::geography, :radius_m)")
+
+    where = "".join(f"\n              AND {f}" for f in filters)
+    query = washroom_query(f"""
+        WITH q AS (
+            SELECT to_tsquery('english', :tsquery) AS query,
+                   to_tsquery('english', :name_tsquery) AS name_query
+        ),
+        candidates AS (
+            SELECT id
+            FROM washrooms, q
+            WHERE search_vector @@ q.query AND removed_at IS NULL{where}
+            ORDER BY search_vector @@ q.name_query DESC, rating_count DESC, id
+            LIMIT :max_candidates
+        )
+        -- ts_rank_cd only runs on the capped candidates
+        SELECT {", ".join("w." + c for c in WASHROOM_COLUMNS)},
+               ts_rank_cd(w.search_vector, q.query) AS rank, {distance} AS distance_m
+        FROM candidates c
+        JOIN washrooms w ON w.id = c.id
+        CROSS JOIN q
+        ORDER BY rank DESC, distance_m NULLS LAST, w.id
+        LIMIT :limit
+    """)
+    return query, params
+
+
+def suggest_query(q: str, limit: int) -> tuple[TextClause, dict]:
+    """Names closest to q by trigram word similarity, for as-you-type suggestions."""
+    query = text("""
+        SELECT id, name, city, lat, long
+        FROM washrooms
+        WHERE :q <% name AND removed_at IS NULL
+        ORDER BY name <->> :q
+        LIMIT :limit
+    """)
+    return query, {"q": q, "limit": limit}
@@ -0,0 +1,84 @@
+"""
+Shared fast path for washroom responses.
+
+Rows are turned into plain dicts shaped like schemas.WashroomOut, with the
+GeoJSON point rebuilt from the lat/long columns instead of decoding WKB, and
+written straight to bytes with orjson. Handlers return the resulting Response,
+so FastAPI skips a second validation pass through response_model (which is
+still declared for the OpenAPI schema).
+"""
+
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql.elements import TextClause
+
+# Columns needed to build a WashroomOut; geom is rebuilt from lat/long
+WASHROOM_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "address",
+    "city",
+    "country",
+    "lat",
+    "long",
+    "opening_hours",
+    "wheelchair_access",
+    "overall_rating",
+    "rating_count",
+    "created_by",
+)
+WASHROOM_SELECT = ", ".join(WASHROOM_COLUMNS)
+
+
+def washroom_query(sql: str) -> TextClause:
+    """
+    text() for raw washroom SELECTs, with opening_hours typed as JSONB so the
+    asyncpg driver hands back a dict rather than the raw JSON string.
+    """
+    return text(sql).columns(opening_hours=JSONB)
+
+
+def washroom_to_dict(row: Any) -> dict:
+    """Build a WashroomOut-shaped dict from a washrooms row or ORM object."""
+    return {
+        "id": str(row.id),
+        "name": row.name,
+        "description": row.description,
+        "address": row.address,
+        "city": row.city,
+        "country": row.country,
+        "geom": {"type": "Point", "coordinates": [row.long, row.lat]},
+        "lat": row.lat,
+        "long": row.long,
+        "opening_hours": row.opening_hours,
+        "wheelchair_access": row.wheelchair_access,
+        "overall_rating": row.overall_rating,
+        "rating_count": row.rating_count,
+        # Seeded and imported washrooms have no creator: null, not "None"
+        "created_by": str(row.created_by) if row.created_by is not None else None,
+    }
+
+
+def json_response(
+    content: Any,
+    response: Optional[Response] = None,
+    status_code: int = 200,
+) -> Response:
+    """
+    Serialize content with orjson. Headers and status set on the injected
+    `response` dependency are carried over, since FastAPI ignores them once a
+    handler returns its own Response.
+    """
+    out = Response(
+        content=orjson.dumps(content),
+        media_type="application/json",
+        status_code=(response.status_code if response and response.status_code else status_code),
+    )
+    if response is not None:
+        out.headers.raw.extend(response.headers.raw)
+    return out
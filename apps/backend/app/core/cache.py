@@ -0,0 +1,273 @@
+"""
+Pluggable response cache with tag-based invalidation.
+
+Values are bytes. Each entry can carry tags (we use the same scope names as
+app/db/versions.py, e.g. washroom:<id>), and write paths drop every entry for a
+tag after they commit. Read paths also put the scope's data version in the key,
+so an entry filled by a reader that raced a write can never be served once the
+version has moved on.
+
+The backend is Redis when settings.REDIS_URL is set, otherwise an in-process
+TTL/LRU. RedisBackend takes any redis-py compatible client, so fakeredis works
+as a drop-in for local testing.
+
+The client is synchronous, shared with background jobs and threads. Async
+request handlers use the a* methods, which run a blocking backend's calls in
+the threadpool so a slow Redis round trip never stalls the event loop.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.settings import settings
+
+
+async def run_blocking(backend, fn, *args):
+    """fn(*args), in the threadpool when the backend does network I/O."""
+    if backend.blocking:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+class MemoryBackend:
+    """Per-process LRU with per-entry expiry."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int, default_ttl: int):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._data: OrderedDict[str, tuple[float, bytes, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+
+    def _drop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        tags = tuple(tags)
+        expires = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._drop(key)
+            self._data[key] = (expires, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)))
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._drop(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+
+class RedisBackend:
+    """
+    Entries are plain keys with an expiry; each tag is a Redis set of the keys
+    carrying it. Connection errors degrade to misses rather than failing requests.
+    """
+
+    blocking = True
+
+    def __init__(self, client, default_ttl: int, prefix: str = "cache:"):
+        import redis
+
+        self._redis = client
+        self._errors = redis.RedisError
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._redis.get(self.prefix + key)
+        except self._errors:
+            return None
+
+    def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+        try:
+            return self._redis.mget([self.prefix + key for key in keys])
+        except self._errors:
+            return [None] * len(keys)
+
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.default_ttl
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.set(self.prefix + key, value, ex=ttl)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), self.prefix + key)
+                pipe.expire(self._tag_key(tag), ttl)
+            pipe.execute()
+        except self._errors:
+            pass
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if not keys:
+            return
+        try:
+            self._redis.delete(*keys)
+        except self._errors:
+            pass
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                keys = self._redis.smembers(tag_key)
+                self._redis.delete(tag_key, *keys)
+        except self._errors:
+            pass
+
+    def clear(self) -> None:
+        try:
+            keys = list(self._redis.scan_iter(match=self.prefix + "*"))
+            if keys:
+                self._redis.delete(*keys)
+        except self._errors:
+            pass
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.backend.get(key)
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        values = self.backend.get_many(keys)
+        hits = sum(v is not None for v in values)
+        self._count("hits", hits)
+        self._count("misses", len(values) - hits)
+        return values
+
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        self.backend.set(key, value, tags, ttl)
+        self._count("sets")
+
+    def delete(self, *keys: str) -> None:
+        self.backend.delete(keys)
+
+    def invalidate_tags(self, *tags: str) -> None:
+        self.backend.invalidate_tags(tags)
+        self._count("invalidations", len(tags))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    # Cached HTTP bodies are stored with the headers they need to be replayed
+    def get_response(self, key: str) -> Optional[tuple[bytes, dict]]:
+        raw = self.get(key)
+        if raw is None:
+            return None
+        header_json, _, body = raw.partition(b"\n")
+        return body, orjson.loads(header_json)
+
+    def set_response(self, key: str, body: bytes, headers: Optional[dict] = None,
+                     tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        self.set(key, orjson.dumps(headers or {}) + b"\n" + body, tags, ttl)
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await run_blocking(self.backend, self.get, key)
+
+    async def aget_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return await run_blocking(self.backend, self.get_many, keys)
+
+    async def aset(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        await run_blocking(self.backend, self.set, key, value, tags, ttl)
+
+    async def adelete(self, *keys: str) -> None:
+        await run_blocking(self.backend, self.delete, *keys)
+
+    async def ainvalidate_tags(self, *tags: str) -> None:
+        await run_blocking(self.backend, self.invalidate_tags, *tags)
+
+    async def aget_response(self, key: str) -> Optional[tuple[bytes, dict]]:
+        return await run_blocking(self.backend, self.get_response, key)
+
+    async def aset_response(self, key: str, body: bytes, headers: Optional[dict] = None,
+                            tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        await run_blocking(self.backend, self.set_response, key, body, headers, tags, ttl)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+
+_redis_client = None
+
+
+def redis_client():
+    """Shared redis-py client for settings.REDIS_URL (None when unset)."""
+    global _redis_client
+    if _redis_client is None and settings.REDIS_URL:
+        import redis
+
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def build_cache(prefix: str, max_entries: int, ttl: int) -> ResponseCache:
+    client = redis_client()
+    if client is not None:
+        return ResponseCache(RedisBackend(client, ttl, prefix=prefix))
+    return ResponseCache(MemoryBackend(max_entries, ttl))
+
+
+response_cache = build_cache("cache:", settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
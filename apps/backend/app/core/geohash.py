@@ -0,0 +1,48 @@
+"""
+Geohash cells, matching PostGIS ST_GeoHash.
+
+The leaderboard stores each washroom's cell as ST_GeoHash(geom, precision);
+"best near me" looks up the cell around the user and its eight neighbours,
+computed here so the query is a handful of exact-match index probes.
+"""
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat: float, lon: float, precision: int) -> tuple[str, tuple[float, float, float, float]]:
+    """(geohash of the point, its cell as (min_lat, min_lon, max_lat, max_lon))."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, x = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if x >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars), (lat_range[0], lon_range[0], lat_range[1], lon_range[1])
+
+
+def cells_around(lat: float, lon: float, precision: int) -> list[str]:
+    """The point's cell and its (up to) eight neighbours, centre first."""
+    center, (min_lat, min_lon, max_lat, max_lon) = encode(lat, lon, precision)
+    height, width = max_lat - min_lat, max_lon - min_lon
+    mid_lat, mid_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    cells = [center]
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            y = mid_lat + dy * height
+            if not -90 < y < 90:
+                continue
+            x = (mid_lon + dx * width + 180) % 360 - 180
+            cell, _ = encode(y, x, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
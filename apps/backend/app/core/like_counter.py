@@ -0,0 +1,244 @@
+"""
+Write-coalesced review like counters.
+
+A like or unlike is recorded as a row in review_likes (one per user and
+review, so votes on a popular review never wait on each other) plus a +1/-1
+pending delta here. reviews.likes is not touched per click: a flusher folds
+every pending delta into one UPDATE ... FROM unnest(...) per
+LIKE_FLUSH_INTERVAL_SECONDS, so a hot review's row is locked once per
+interval rather than once per click. The like endpoints answer with the
+stored count plus the pending delta; review listings catch up at the next
+flush, which bumps their ETags.
+
+Deltas are held in process memory, or in a Redis hash when settings.REDIS_URL
+is set, so every worker shares them. Redis errors fall back to the in-process
+buffer rather than losing the click; a failed flush puts its deltas back.
+review_likes stays the source of truth: deltas lost with a crashed worker are
+repaired by recounting from it (app/db/recount_likes.py).
+"""
+
+import logging
+import threading
+import uuid
+
+from sqlalchemy import text
+
+from app.core.cache import redis_client, response_cache, run_blocking
+from app.db import versions
+
+logger = logging.getLogger(__name__)
+
+# Vote and read the stored count in one statement; no row means no such review.
+# `changed` is false for a repeated like or an unlike without a vote.
+RECORD_LIKE = text("""
+    WITH review AS (SELECT id, likes FROM reviews WHERE id = :review_id),
+    vote AS (
+        INSERT INTO review_likes (review_id, user_id, created_at)
+        SELECT id, :user_id, timezone('utc', now()) FROM review
+        ON CONFLICT DO NOTHING
+        RETURNING review_id
+    )
+    SELECT review.likes, EXISTS (SELECT 1 FROM vote) AS changed FROM review
+""")
+
+REMOVE_LIKE = text("""
+    WITH review AS (SELECT id, likes FROM reviews WHERE id = :review_id),
+    vote AS (
+        DELETE FROM review_likes l
+        USING review
+        WHERE l.review_id = review.id AND l.user_id = :user_id
+        RETURNING l.review_id
+    )
+    SELECT review.likes, EXISTS (SELECT 1 FROM vote) AS changed FROM review
+""")
+
+# Lock the rows in id order first, so concurrent flushers (one per worker
+# without Redis) cannot deadlock on overlapping reviews
+_LOCK = text("""
+    SELECT id FROM reviews
+    WHERE id = ANY(CAST(:ids AS uuid[]))
+    ORDER BY id
+    FOR UPDATE
+""")
+
+_FLUSH = text("""
+    UPDATE reviews r
+    SET likes = GREATEST(r.likes + d.delta, 0)
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:deltas AS integer[])) AS d(id, delta)
+    WHERE r.id = d.id
+    RETURNING r.washroom_id
+""")
+
+
+class MemoryBackend:
+    """Pending deltas of this process."""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas: dict[str, int] = {}
+
+    def add(self, review_id: str, delta: int) -> None:
+        with self._lock:
+            self._deltas[review_id] = self._deltas.get(review_id, 0) + delta
+
+    def pending(self, review_id: str) -> int:
+        with self._lock:
+            return self._deltas.get(review_id, 0)
+
+    def pending_reviews(self) -> int:
+        """Number of reviews with a pending delta."""
+        with self._lock:
+            return sum(1 for delta in self._deltas.values() if delta)
+
+    def take(self) -> dict[str, int]:
+        """Remove and return every pending delta."""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        return deltas
+
+    def restore(self, deltas: dict[str, int]) -> None:
+        for review_id, delta in deltas.items():
+            self.add(review_id, delta)
+
+
+class RedisBackend:
+    """
+    Pending deltas in one Redis hash shared by all workers. take() renames the
+    hash away atomically, so increments landing during a flush go to a fresh
+    hash and are never lost or applied twice.
+    """
+
+    blocking = True
+
+    def __init__(self, client, key: str = "likes:pending"):
+        import redis
+
+        self._redis = client
+        self._errors = redis.RedisError
+        self.key = key
+        self._local = MemoryBackend()
+
+    def add(self, review_id: str, delta: int) -> None:
+        try:
+            self._redis.hincrby(self.key, review_id, delta)
+        except self._errors:
+            self._local.add(review_id, delta)
+
+    def pending(self, review_id: str) -> int:
+        try:
+            shared = int(self._redis.hget(self.key, review_id) or 0)
+        except self._errors:
+            shared = 0
+        return shared + self._local.pending(review_id)
+
+    def pending_reviews(self) -> int:
+        try:
+            shared = self._redis.hlen(self.key)
+        except self._errors:
+            shared = 0
+        return shared + self._local.pending_reviews()
+
+    def take(self) -> dict[str, int]:
+        deltas = self._local.take()
+        flushing = f"{self.key}:flushing:{uuid.uuid4()}"
+        try:
+            if self._redis.renamenx(self.key, flushing):
+                pipe = self._redis.pipeline(transaction=True)
+                pipe.hgetall(flushing)
+                pipe.delete(flushing)
+                taken, _ = pipe.execute()
+                for review_id, delta in taken.items():
+                    review_id = review_id.decode()
+                    deltas[review_id] = deltas.get(review_id, 0) + int(delta)
+        except self._errors:
+            # Includes renamenx's "no such key" when nothing is pending
+            pass
+        return deltas
+
+    def restore(self, deltas: dict[str, int]) -> None:
+        for review_id, delta in deltas.items():
+            self.add(review_id, delta)
+
+
+class LikeCounter:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._counters = {"votes": 0, "flushes": 0, "rows_flushed": 0, "flush_errors": 0}
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def add(self, review_id, delta: int) -> None:
+        """Buffer a committed vote change (+1 like, -1 unlike)."""
+        self.backend.add(str(review_id), delta)
+        self._count("votes")
+
+    def current(self, review_id, stored: int) -> int:
+        """Like count to show: the stored reviews.likes plus what is still pending."""
+        return max(stored + self.backend.pending(str(review_id)), 0)
+
+    # For async handlers: Redis round trips run in the threadpool (see app/core/cache.py)
+    async def aadd(self, review_id, delta: int) -> None:
+        await run_blocking(self.backend, self.add, review_id, delta)
+
+    async def acurrent(self, review_id, stored: int) -> int:
+        return await run_blocking(self.backend, self.current, review_id, stored)
+
+    def flush(self, engine) -> int:
+        """Write pending deltas to reviews.likes in one transaction; returns the reviews updated."""
+        deltas = {k: v for k, v in self.backend.take().items() if v}
+        if not deltas:
+            return 0
+        ids = sorted(deltas)
+        try:
+            with engine.begin() as connection:
+                connection.execute(_LOCK, {"ids": ids})
+                washroom_ids = [row.washroom_id for row in connection.execute(
+                    _FLUSH, {"ids": ids, "deltas": [deltas[i] for i in ids]}
+                )]
+                scopes = [versions.washroom_reviews_scope(w) for w in set(washroom_ids)]
+                if scopes:
+                    versions.bump(connection, *scopes)
+        except Exception:
+            self.backend.restore(deltas)
+            self._count("flush_errors")
+            raise
+        if scopes:
+            response_cache.invalidate_tags(*scopes)
+        self._count("flushes")
+        self._count("rows_flushed", len(washroom_ids))
+        return len(washroom_ids)
+
+    def start(self, engine, interval_seconds: float) -> threading.Event:
+        """Run flush every interval on a daemon thread; set the event to stop."""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval_seconds):
+                try:
+                    self.flush(engine)
+                except Exception:
+                    logger.exception("Like counter flush failed")
+
+        threading.Thread(target=run, name="like-counter-flush", daemon=True).start()
+        return stop
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+
+def build_like_counter() -> LikeCounter:
+    client = redis_client()
+    if client is not None:
+        return LikeCounter(RedisBackend(client))
+    return LikeCounter(MemoryBackend())
+
+
+like_counter = build_like_counter()
@@ -0,0 +1,181 @@
+"""
+In-process request metrics rendered in the Prometheus text format.
+
+MetricsMiddleware is plain ASGI (no BaseHTTPMiddleware task/queue overhead).
+Per request it records, labelled by method and route template:
+
+- http_requests_total (also by status) and http_requests_in_flight
+- http_request_duration_seconds and http_response_size_bytes histograms
+- db_queries_per_request and db_query_duration_seconds histograms, fed by the
+  SQLAlchemy hooks in app/db/query_stats.py
+
+Each worker process keeps its own registry; scrape every worker (or run one
+worker per container) as usual for multi-process deployments.
+"""
+
+import threading
+from bisect import bisect_left
+import time
+from typing import Iterable
+
+from app.db import query_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        # First bucket with bound >= value; len(buckets) is the +Inf slot
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self, label_names: tuple) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests: dict[tuple, int] = {}
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes", "Response body size by route.", SIZE_BUCKETS
+        )
+        self.db_queries = Histogram(
+            "db_queries_per_request", "SQL statements executed per request.", QUERY_COUNT_BUCKETS
+        )
+        self.db_time = Histogram(
+            "db_query_duration_seconds", "Time spent in SQL per request.", LATENCY_BUCKETS
+        )
+
+    def start(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, method: str, route: str, status: int, seconds: float,
+               size: int, queries: int, db_seconds: float) -> None:
+        labels = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.observe(labels, seconds)
+            self.response_size.observe(labels, size)
+            self.db_queries.observe(labels, queries)
+            self.db_time.observe(labels, db_seconds)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being served.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP http_requests_total Requests served by route and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for key, count in sorted(self.requests.items()):
+                lines.append(
+                    f"http_requests_total{{{_labels(('method', 'route', 'status'), key)}}} {count}"
+                )
+            for histogram in (self.latency, self.response_size, self.db_queries, self.db_time):
+                lines += histogram.render(("method", "route"))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Route object id -> label; included routers may report templates without their prefix
+_route_labels: dict[int, str] = {}
+
+
+def route_label(scope) -> str:
+    """The matched route's path template, so ids in URLs do not explode label cardinality."""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    label = _route_labels.get(id(route))
+    if label is None:
+        path = scope.get("path", "")
+        prefix = ""
+        regex = getattr(route, "path_regex", None)
+        if regex is not None and not regex.match(path):
+            # Find the mount prefix the template is relative to
+            for i in range(1, len(path)):
+                if path[i] == "/" and regex.match(path[i:]):
+                    prefix = path[:i]
+                    break
+        label = _route_labels.setdefault(id(route), prefix + template)
+    return label
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.start()
+        tracker = query_stats.start_request()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.end_request(tracker)
+            route = route_label(scope)
+            registry.finish(
+                scope["method"], route, status,
+                time.perf_counter() - start, size, tracker.count, tracker.seconds,
+            )
+        tracker.label = f"{scope['method']} {route}"
+        query_stats.check_budget(tracker)
@@ -0,0 +1,265 @@
+"""
+Compiled opening hours.
+
+washrooms.opening_hours holds whatever the source said, e.g.
+{"hours": "Dawn to Dusk"} or {"hours": "Tue - Sat 9:00 am - 8:00 pm"}. At
+ingest and write time that text is compiled into weekly intervals
+(day, open_min, close_min), stored one row each in washroom_hours:
+
+- day is 0 (Monday) to 6, minutes count from local midnight (HOURS_TIMEZONE),
+- open_min may be DAWN and close_min DUSK; those are resolved per query from
+  the locally computed sunrise/sunset (app/core/solar.py),
+- intervals past midnight are split at 24:00 onto the next day,
+- "Mon-Fri 8am-5pm, Sat 10-4" gives each day group its own hours, and a
+  bare "10-4" (no am/pm) is read as 10:00 to 16:00, not past midnight,
+- text we cannot read ("as per CC operating hours", "") compiles to no rows,
+  so open-now filters leave those washrooms out rather than guess.
+
+OpenAt turns a moment and a place into the parameters the SQL predicate in
+app/api/filters.py compares those rows against.
+"""
+
+import json
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+
+from app.core.solar import sun_times
+
+DAWN = -1
+DUSK = -2
+MINUTES_PER_DAY = 1440
+ALL_DAYS = tuple(range(7))
+# Where dawn/dusk are computed for queries without a location (downtown Vancouver)
+DEFAULT_LOCATION = (49.2827, -123.1207)
+
+# (day, open_min, close_min)
+Interval = tuple[int, int, int]
+
+_DAY_NAMES = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+# "sun" must not match "sunset"/"sunrise": day names end at a word boundary
+_DAY = r"(mon|tues?|wed|thu(?:rs?)?|fri|sat|sun)(?:days?|nesdays?|urdays?|s)?\.?\b"
+_DAY_RANGE = re.compile(rf"\b{_DAY}\s*(?:-|–|—|to)\s*{_DAY}")
+_DAY_SINGLE = re.compile(rf"\b{_DAY}")
+_ALL_DAY = re.compile(r"\b24\s*(?:h|hr|hrs|hours)\b|24/7")
+_SEPARATOR = re.compile(r"\s*(?:-|–|—|\bto\b|\buntil\b)\s*")
+# Between day groups: "Mon-Fri 8am-5pm, Sat 10am-4pm"
+_GROUP_SEPARATOR = re.compile(r"[,;\n]")
+_TIME = re.compile(
+    r"\b(dawn|sunrise|dusk|sunset|midnight|noon)\b"
+    r"|\b(\d{1,2})(?:[:.](\d{2}))?\s*(a\.?m\.?|p\.?m\.?)?(?![\d])"
+)
+
+
+def _day(name: str) -> int:
+    return _DAY_NAMES[name[:3]]
+
+
+def _parse_days(text: str) -> tuple[tuple[int, ...], str]:
+    """(days the hours apply to, text with the day words removed)."""
+    if "weekend" in text:
+        return (5, 6), text.replace("weekends", " ").replace("weekend", " ")
+    if "weekday" in text:
+        return tuple(range(5)), text.replace("weekdays", " ").replace("weekday", " ")
+    days: list[int] = []
+    for match in _DAY_RANGE.finditer(text):
+        start, end = _day(match.group(1)), _day(match.group(2))
+        days += [(start + i) % 7 for i in range((end - start) % 7 + 1)]
+    text = _DAY_RANGE.sub(" ", text)
+    for match in _DAY_SINGLE.finditer(text):
+        days.append(_day(match.group(1)))
+    text = _DAY_SINGLE.sub(" ", text)
+    return (tuple(sorted(set(days))) or ALL_DAYS), text
+
+
+def _minutes(match: re.Match, closing: bool) -> Optional[int]:
+    word = match.group(1)
+    if word in ("dawn", "sunrise"):
+        return DAWN
+    if word in ("dusk", "sunset"):
+        return DUSK
+    if word == "midnight":
+        return MINUTES_PER_DAY if closing else 0
+    if word == "noon":
+        return 720
+    hour, minute, suffix = int(match.group(2)), int(match.group(3) or 0), match.group(4)
+    if minute >= 60:
+        return None
+    if suffix:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if suffix.startswith("p") else 0)
+    elif hour > 24:
+        return None
+    return hour * 60 + minute
+
+
+def _pick(values: list[int], latest: bool) -> int:
+    """Widest reading of "8am (women) 6am (men)": earliest open / latest close."""
+    fixed = [v for v in values if v >= 0]
+    if fixed:
+        return max(fixed) if latest else min(fixed)
+    return values[0]
+
+
+def _groups(text: str) -> list[str]:
+    """
+    Split "Mon-Fri 8am-5pm, Sat 10am-4pm" into one string per set of hours.
+    Pieces without a time join the next group ("Mon, Wed 9-5"), or the last;
+    "Sun closed" pieces are dropped, as those days have no hours.
+    """
+    groups, pending = [], ""
+    for piece in _GROUP_SEPARATOR.split(text):
+        has_time = bool(_TIME.search(_parse_days(piece)[1]))
+        if not has_time and "closed" in piece:
+            continue
+        pending = f"{pending} {piece}"
+        if has_time:
+            groups.append(pending)
+            pending = ""
+    if not groups:
+        return [text]
+    groups[-1] += pending
+    return groups
+
+
+def parse_hours(text: str) -> Optional[list[Interval]]:
+    """Weekly intervals for free-text hours, or None when the text is not understood."""
+    text = re.sub(r"\([^)]*\)", " ", (text or "").lower()).strip()
+    if not text:
+        return None
+    intervals: set[Interval] = set()
+    for group in _groups(text):
+        parsed = _parse_group(group)
+        if parsed is None:
+            return None
+        intervals.update(parsed)
+    return sorted(intervals)
+
+
+def _parse_group(text: str) -> Optional[list[Interval]]:
+    """Intervals for one set of days and their hours."""
+    days, text = _parse_days(text)
+
+    if _ALL_DAY.search(text):
+        return [(day, 0, MINUTES_PER_DAY) for day in days]
+
+    parts = [p for p in _SEPARATOR.split(text) if _TIME.search(p)]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        matches = list(_TIME.finditer(parts[0]))
+        if len(matches) < 2:
+            return None
+        opens, closes = [matches[0]], [matches[-1]]
+    else:
+        opens, closes = list(_TIME.finditer(parts[0])), list(_TIME.finditer(parts[-1]))
+
+    open_values = [_minutes(m, closing=False) for m in opens]
+    close_values = [_minutes(m, closing=True) for m in closes]
+    if None in open_values or None in close_values:
+        return None
+    open_min, close_min = _pick(open_values, latest=False), _pick(close_values, latest=True)
+    if open_min == DUSK or close_min == DAWN:
+        return None
+    # "10-4" or "9:00 - 9:00" without am/pm: a morning to an afternoon, not past midnight
+    if (not any(m.group(1) or m.group(4) for m in opens + closes)
+            and 0 <= close_min <= open_min < 720):
+        close_min += 720
+
+    intervals: list[Interval] = []
+    for day in days:
+        if open_min < 0 or close_min < 0 or open_min < close_min:
+            intervals.append((day, open_min, close_min))
+        elif open_min == close_min:
+            intervals.append((day, 0, MINUTES_PER_DAY))
+        else:
+            # Past midnight: the tail belongs to the next day
+            intervals.append((day, open_min, MINUTES_PER_DAY))
+            if close_min > 0:
+                intervals.append(((day + 1) % 7, 0, close_min))
+    return sorted(set(intervals))
+
+
+@lru_cache(maxsize=4096)
+def _compile_text(text: str) -> Optional[tuple[Interval, ...]]:
+    intervals = parse_hours(text)
+    return tuple(intervals) if intervals is not None else None
+
+
+def compile_hours(opening_hours: Any) -> Optional[tuple[Interval, ...]]:
+    """
+    Intervals for a washrooms.opening_hours value: a dict, its JSON text, or
+    None. Results are cached by text, so compiling a whole dataset costs one
+    parse per distinct string.
+    """
+    if isinstance(opening_hours, str):
+        try:
+            opening_hours = json.loads(opening_hours) if opening_hours else None
+        except ValueError:
+            return _compile_text(opening_hours)
+    if not isinstance(opening_hours, dict):
+        return None
+    hours = opening_hours.get("hours")
+    return _compile_text(hours) if isinstance(hours, str) else None
+
+
+def hours_rows(washroom_id: Any, opening_hours: Any) -> list[dict]:
+    """washroom_hours rows for one washroom."""
+    return [
+        {"washroom_id": washroom_id, "day": day, "open_min": open_min, "close_min": close_min}
+        for day, open_min, close_min in compile_hours(opening_hours) or ()
+    ]
+
+
+def hours_frame(ids, opening_hours):
+    """
+    washroom_hours rows as a DataFrame for COPY, from parallel id and
+    opening_hours Series. Parses each distinct value once and expands with
+    index arithmetic, so it scales to millions of rows.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(opening_hours).fillna(""), sort=False)
+    compiled = [compile_hours(u) or () for u in uniques]
+    counts = np.array([len(c) for c in compiled], dtype=np.int64)[codes]
+    table = np.array([i for c in compiled for i in c] or [(0, 0, 0)], dtype=np.int16).reshape(-1, 3)
+    starts = np.concatenate([[0], np.cumsum([len(c) for c in compiled])[:-1]])[codes]
+
+    owner = np.repeat(np.arange(len(codes)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    picked = table[np.repeat(starts, counts) + offset]
+    return pd.DataFrame({
+        "washroom_id": pd.Series(ids).to_numpy()[owner],
+        "day": picked[:, 0],
+        "open_min": picked[:, 1],
+        "close_min": picked[:, 2],
+    })
+
+
+class OpenAt:
+    """A local moment plus that day's dawn/dusk, as bind parameters for the open-at predicate."""
+
+    __slots__ = ("day", "minute", "dawn", "dusk")
+
+    def __init__(self, day: int, minute: int, dawn: int, dusk: int):
+        self.day = day
+        self.minute = minute
+        self.dawn = dawn
+        self.dusk = dusk
+
+    @classmethod
+    def resolve(cls, when: Optional[datetime], lat: float, lon: float, tz: ZoneInfo) -> "OpenAt":
+        """For `when` (now if None; naive values are local to tz) at the given place."""
+        local = datetime.now(tz) if when is None else (
+            when.replace(tzinfo=tz) if when.tzinfo is None else when.astimezone(tz)
+        )
+        dawn, dusk = sun_times(local.date(), lat, lon, tz)
+        return cls(local.weekday(), local.hour * 60 + local.minute, dawn, dusk)
+
+    def params(self) -> dict:
+        return {"open_day": self.day, "open_minute": self.minute,
+                "open_dawn": self.dawn, "open_dusk": self.dusk}
@@ -1,10 +1,18 @@
+import logging
 import os
+import threading
 import firebase_admin
 from firebase_admin import credentials
 from fastapi.security import HTTPBearer
 from functools import lru_cache
 
 security = HTTPBearer()
+logger = logging.getLogger(__name__)
+
+# Public certificates Google signs Firebase ID tokens with
+ID_TOKEN_CERT_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
 
 @lru_cache()
 def get_firebase_app():
@@ -17,3 +25,59 @@ def get_firebase_app():
     return firebase_admin.get_app()
 
 
+# firebase_admin major versions whose TokenVerifier keeps its cert transport in
+# `.request`; the prefetch reaches into that private attribute, so it only runs
+# on versions it was checked against
+_PREFETCH_TESTED_MAJORS = (6, 7)
+
+
+def _cert_request():
+    """
+    The cached transport verify_id_token() fetches certificates with, or None
+    when this firebase_admin is untested or its internals have moved.
+    """
+    from firebase_admin import auth
+
+    if int(firebase_admin.__version__.split(".")[0]) not in _PREFETCH_TESTED_MAJORS:
+        return None
+    try:
+        return auth._get_client(get_firebase_app())._token_verifier.request
+    except AttributeError:
+        return None
+
+
+def prefetch_signing_keys() -> bool:
+    """
+    Fetch the ID token certificates through firebase_admin's own cert request,
+    which honours Cache-Control. While the cached copy is fresh this is a no-op;
+    once it goes stale it is refreshed here instead of inside a user's request.
+    Returns False when the transport is unavailable (see _cert_request); tokens
+    are still verified, just with the refresh on the request path.
+    """
+    request = _cert_request()
+    if request is None:
+        return False
+    request(ID_TOKEN_CERT_URL)
+    return True
+
+
+def start_key_prefetch(interval_seconds: int) -> threading.Event:
+    """Run prefetch_signing_keys every interval on a daemon thread; set the event to stop."""
+    stop = threading.Event()
+
+    def run():
+        while True:
+            try:
+                if not prefetch_signing_keys():
+                    logger.warning(
+                        "Signing key prefetch disabled: unsupported firebase_admin %s",
+                        firebase_admin.__version__,
+                    )
+                    return
+            except Exception:
+                logger.exception("Signing key prefetch failed")
+            if stop.wait(interval_seconds):
+                return
+
+    threading.Thread(target=run, name="firebase-key-prefetch", daemon=True).start()
+    return stop
@@ -17,6 +17,27 @@ class Settings(BaseSettings):
         env="DATABASE_URL"
     )
 
+    # Connection pool, per engine (the API uses the async engine, scripts the sync one)
+    DB_POOL_SIZE: int = Field(default=5, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, env="DB_POOL_TIMEOUT")  # seconds to wait for a connection
+    DB_POOL_RECYCLE: int = Field(default=300, env="DB_POOL_RECYCLE")
+    # Ping on every checkout; with DB_POOL_RECYCLE below the server's idle timeout this can be off
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=0, env="DB_STATEMENT_TIMEOUT_MS")  # 0 disables
+    # Log statements slower than this, with their parameters (0 disables)
+    SLOW_QUERY_MS: int = Field(default=200, env="SLOW_QUERY_MS")
+    # Raise instead of warn when an endpoint exceeds its deps.query_budget (for tests)
+    QUERY_BUDGET_STRICT: bool = Field(default=False, env="QUERY_BUDGET_STRICT")
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """DATABASE_URL rewritten for the asyncpg driver."""
+        for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if self.DATABASE_URL.startswith(prefix):
+                return "postgresql+asyncpg://" + self.DATABASE_URL[len(prefix):]
+        return self.DATABASE_URL
+
     # Security
     SECRET_KEY: str = Field(
         default="your-secret-key-change-in-production",
@@ -77,6 +98,51 @@ class Settings(BaseSettings):
     # Redis (for caching/sessions)
     REDIS_URL: Optional[str] = Field(default=None, env="REDIS_URL")
 
+    # In-memory spatial index for bbox queries (loaded at startup when enabled)
+    SPATIAL_INDEX_ENABLED: bool = Field(default=False, env="SPATIAL_INDEX_ENABLED")
+    SPATIAL_INDEX_CELL_DEG: float = Field(default=0.05, env="SPATIAL_INDEX_CELL_DEG")
+
+    # Response cache (Redis when REDIS_URL is set, otherwise in-process TTL/LRU)
+    CACHE_MAX_ENTRIES: int = Field(default=10000, env="CACHE_MAX_ENTRIES")
+    CACHE_TTL_SECONDS: int = Field(default=300, env="CACHE_TTL_SECONDS")
+    # Bbox listings are cached per map tile at this zoom; larger viewports go to SQL
+    BBOX_CACHE_ZOOM: int = Field(default=13, env="BBOX_CACHE_ZOOM")
+    BBOX_CACHE_MAX_TILES: int = Field(default=64, env="BBOX_CACHE_MAX_TILES")
+    # Map data is versioned per tile at this zoom (capped at BBOX_CACHE_ZOOM), so a
+    # write only changes the ETags of viewports around it
+    VERSION_REGION_ZOOM: int = Field(default=10, env="VERSION_REGION_ZOOM")
+    # Viewports spanning more regions than this get no ETag
+    VERSION_MAX_REGIONS: int = Field(default=256, env="VERSION_MAX_REGIONS")
+
+    # Vector tile cache (Redis when REDIS_URL is set, otherwise in-process LRU)
+    TILE_CACHE_MAX_ENTRIES: int = Field(default=4096, env="TILE_CACHE_MAX_ENTRIES")
+    TILE_CACHE_TTL_SECONDS: int = Field(default=3600, env="TILE_CACHE_TTL_SECONDS")
+
+    # Most ids accepted by GET /washrooms/batch
+    BATCH_FETCH_MAX_IDS: int = Field(default=300, env="BATCH_FETCH_MAX_IDS")
+    # Largest batch accepted by POST /washrooms/bulk (one multi-row INSERT)
+    BULK_CREATE_MAX_ITEMS: int = Field(default=500, env="BULK_CREATE_MAX_ITEMS")
+    # Matching rows ranked per /washrooms/search request (bounds the cost of common words)
+    SEARCH_MAX_CANDIDATES: int = Field(default=1000, env="SEARCH_MAX_CANDIDATES")
+    # Local time zone of washroom opening hours, for open_now / open_at filters
+    HOURS_TIMEZONE: str = Field(default="America/Vancouver", env="HOURS_TIMEZONE")
+    # Leaderboard score: reviews' mean rating shrunk toward the global mean by this many
+    # virtual reviews, so one 5-star review does not top the list
+    LEADERBOARD_PRIOR_WEIGHT: float = Field(default=10.0, env="LEADERBOARD_PRIOR_WEIGHT")
+    # Geohash length of "best near me" cells (5 is about 5 x 5 km)
+    LEADERBOARD_CELL_PRECISION: int = Field(default=5, env="LEADERBOARD_CELL_PRECISION")
+    # Review like counts are buffered and written to reviews.likes in one batch per interval
+    LIKE_FLUSH_INTERVAL_SECONDS: float = Field(default=2.0, env="LIKE_FLUSH_INTERVAL_SECONDS")
+
+    # Verified Firebase ID tokens, cached until their exp claim (0 disables)
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = Field(default=10000, env="AUTH_TOKEN_CACHE_MAX_ENTRIES")
+    # How often to refresh Google's token signing certificates in the background (0 disables)
+    AUTH_KEY_PREFETCH_SECONDS: int = Field(default=300, env="AUTH_KEY_PREFETCH_SECONDS")
+
+    # Firebase uid -> users row lookups for authenticated handlers
+    USER_CACHE_MAX_ENTRIES: int = Field(default=10000, env="USER_CACHE_MAX_ENTRIES")
+    USER_CACHE_TTL_SECONDS: int = Field(default=60, env="USER_CACHE_TTL_SECONDS")
+
     # Email
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
@@ -0,0 +1,68 @@
+"""
+Sunrise and sunset, computed locally (NOAA solar position equations).
+
+Accurate to about a minute at the latitudes we serve, which is plenty for
+"Dawn to Dusk" park washrooms. No network access or third-party ephemeris.
+"""
+
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+# Sun's centre 0.833 degrees below the horizon: refraction plus the solar radius
+_ZENITH = math.radians(90.833)
+
+
+def _fractional_year(day: date) -> float:
+    return 2 * math.pi / 365 * (day.timetuple().tm_yday - 1)
+
+
+def _declination(gamma: float) -> float:
+    return (
+        0.006918 - 0.399912 * math.cos(gamma) + 0.070257 * math.sin(gamma)
+        - 0.006758 * math.cos(2 * gamma) + 0.000907 * math.sin(2 * gamma)
+        - 0.002697 * math.cos(3 * gamma) + 0.00148 * math.sin(3 * gamma)
+    )
+
+
+def _utc_minutes(day: date, lat: float, lon: float, rising: bool) -> Optional[float]:
+    """Minutes after 00:00 UTC on `day` of sunrise (or sunset); None during polar day/night."""
+    gamma = _fractional_year(day)
+    eqtime = 229.18 * (
+        0.000075 + 0.001868 * math.cos(gamma) - 0.032077 * math.sin(gamma)
+        - 0.014615 * math.cos(2 * gamma) - 0.040849 * math.sin(2 * gamma)
+    )
+    phi = math.radians(lat)
+    decl = _declination(gamma)
+    cos_ha = math.cos(_ZENITH) / (math.cos(phi) * math.cos(decl)) - math.tan(phi) * math.tan(decl)
+    if not -1.0 <= cos_ha <= 1.0:
+        return None
+    ha = math.degrees(math.acos(cos_ha))
+    if not rising:
+        ha = -ha
+    return 720 - 4 * (lon + ha) - eqtime
+
+
+def _local_minutes(day: date, utc_minutes: float, tz: ZoneInfo) -> int:
+    """
+    Wall-clock minutes after local midnight in tz of the instant `utc_minutes`
+    after 00:00 UTC on `day`. The UTC offset is the one in force at that
+    instant, so sunrise after a 02:00 DST change gets the new offset.
+    """
+    instant = datetime.combine(day, time(0), tzinfo=timezone.utc) + timedelta(minutes=utc_minutes)
+    local = instant.astimezone(tz)
+    return int(round(local.hour * 60 + local.minute + local.second / 60)) % 1440
+
+
+def sun_times(day: date, lat: float, lon: float, tz: ZoneInfo) -> tuple[int, int]:
+    """
+    (sunrise, sunset) on `day` at (lat, lon) in minutes after local midnight
+    in tz. Polar day gives (0, 1440) and polar night (720, 720).
+    """
+    sunrise = _utc_minutes(day, lat, lon, rising=True)
+    sunset = _utc_minutes(day, lat, lon, rising=False)
+    if sunrise is None or sunset is None:
+        # The sun stays up when it is on the same side of the equator as lat
+        return (0, 1440) if _declination(_fractional_year(day)) * lat > 0 else (720, 720)
+    return _local_minutes(day, sunrise, tz), _local_minutes(day, sunset, tz)
@@ -0,0 +1,153 @@
+"""
+In-process spatial index for washroom bbox queries.
+
+Points are kept in compact parallel arrays (lat/long as doubles) and bucketed
+into a uniform lat/long grid, so a bbox query only scans the cells it overlaps
+instead of going to PostGIS. Each slot also keeps the row payload needed to
+build a WashroomOut, which lets the map endpoint answer without a DB round-trip.
+
+The index is per process: with several workers each one holds its own copy and
+is only kept current by writes handled in that process.
+"""
+
+import math
+import threading
+import uuid
+from array import array
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.api.serializers import WASHROOM_SELECT, washroom_to_dict
+from app.core.settings import settings
+
+
+class SpatialIndex:
+    """Packed uniform grid over lat/long arrays, safe to share between threads."""
+
+    def __init__(self, cell_deg: float = 0.05):
+        if cell_deg <= 0:
+            raise ValueError("cell_deg must be positive")
+        self.cell_deg = cell_deg
+        self._lock = threading.Lock()
+        self._lats = array("d")
+        self._longs = array("d")
+        self._payloads: list[Optional[dict]] = []
+        self._slots: dict[str, int] = {}
+        # Slots emptied by discard(), reused by the next insert so the arrays stay bounded
+        self._free: list[int] = []
+        self._cells: dict[tuple[int, int], array] = {}
+        self.loaded = False
+        # (epoch, version) identifies this process's index contents, used for ETags
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _cell(self, lat: float, long: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(long / self.cell_deg)
+
+    def _unbucket(self, slot: int) -> None:
+        bucket = self._cells.get(self._cell(self._lats[slot], self._longs[slot]))
+        if bucket is not None:
+            bucket.remove(slot)
+
+    def upsert(self, payload: dict) -> None:
+        """Insert or replace a single washroom; called after create/rating writes commit."""
+        lat, long = float(payload["lat"]), float(payload["long"])
+        with self._lock:
+            self.version += 1
+            slot = self._slots.get(payload["id"])
+            if slot is not None:
+                self._payloads[slot] = payload
+                if (self._lats[slot], self._longs[slot]) == (lat, long):
+                    return
+                # Moved: same slot, new cell
+                self._unbucket(slot)
+                self._lats[slot], self._longs[slot] = lat, long
+            elif self._free:
+                slot = self._free.pop()
+                self._lats[slot], self._longs[slot] = lat, long
+                self._payloads[slot] = payload
+            else:
+                slot = len(self._payloads)
+                self._lats.append(lat)
+                self._longs.append(long)
+                self._payloads.append(payload)
+            self._slots[payload["id"]] = slot
+            self._cells.setdefault(self._cell(lat, long), array("q")).append(slot)
+
+    def discard(self, washroom_id: str) -> None:
+        with self._lock:
+            slot = self._slots.pop(washroom_id, None)
+            if slot is not None:
+                self.version += 1
+                self._unbucket(slot)
+                self._payloads[slot] = None
+                self._free.append(slot)
+
+    def bulk_load(self, payloads: Iterable[dict]) -> None:
+        """Replace the whole index contents."""
+        lats, longs = array("d"), array("d")
+        rows: list[Optional[dict]] = []
+        slots: dict[str, int] = {}
+        cells: dict[tuple[int, int], array] = {}
+        for payload in payloads:
+            lat, long = float(payload["lat"]), float(payload["long"])
+            slot = len(rows)
+            lats.append(lat)
+            longs.append(long)
+            rows.append(payload)
+            slots[payload["id"]] = slot
+            cells.setdefault(self._cell(lat, long), array("q")).append(slot)
+
+        with self._lock:
+            self._lats, self._longs = lats, longs
+            self._payloads, self._slots, self._cells = rows, slots, cells
+            self._free = []
+            self.loaded = True
+            self.version += 1
+
+    def query_bbox(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+    ) -> list[dict]:
+        """Return payloads whose point falls inside the (inclusive) bbox."""
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        out: list[dict] = []
+        with self._lock:
+            lats, longs, payloads = self._lats, self._longs, self._payloads
+            n_cells = (max_row - min_row + 1) * (max_col - min_col + 1)
+            if n_cells > len(self._cells):
+                # Very large viewport: walking occupied cells is cheaper than the range
+                buckets = [
+                    b for (r, c), b in self._cells.items()
+                    if min_row <= r <= max_row and min_col <= c <= max_col
+                ]
+            else:
+                buckets = []
+                for r in range(min_row, max_row + 1):
+                    for c in range(min_col, max_col + 1):
+                        b = self._cells.get((r, c))
+                        if b:
+                            buckets.append(b)
+            for bucket in buckets:
+                for slot in bucket:
+                    lat, long = lats[slot], longs[slot]
+                    if min_lat <= lat <= max_lat and min_lon <= long <= max_lon:
+                        out.append(payloads[slot])
+        return out
+
+    def load_from_db(self, db: Session) -> int:
+        result = db.execute(text(f"SELECT {WASHROOM_SELECT} FROM washrooms WHERE removed_at IS NULL"))
+        self.bulk_load(washroom_to_dict(row) for row in result)
+        return len(self)
+
+
+washroom_index = SpatialIndex(cell_deg=settings.SPATIAL_INDEX_CELL_DEG)
+
+
+def index_enabled() -> bool:
+    return settings.SPATIAL_INDEX_ENABLED and washroom_index.loaded
@@ -0,0 +1,55 @@
+"""
+Cache for Mapbox Vector Tiles served by /washrooms/tiles/{z}/{x}/{y}.mvt.
+
+Tiles live in Redis when settings.REDIS_URL is set (shared by every worker),
+otherwise in a per-process LRU (see app/core/cache.py). Writes that move or
+re-rate a washroom call invalidate_point(), which drops every cached tile whose
+buffered extent contains that point, across all zoom levels.
+"""
+
+from typing import Optional
+
+from app.core.cache import ResponseCache, build_cache, run_blocking
+from app.core.settings import settings
+from app.core.tiles import MAX_TILE_ZOOM, tiles_for_point
+
+# Must match the extent/buffer passed to ST_AsMVTGeom in the tiles endpoint
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+
+def tile_key(z: int, x: int, y: int) -> str:
+    return f"{z}/{x}/{y}"
+
+
+class TileCache:
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        return self.cache.get(tile_key(z, x, y))
+
+    def set(self, z: int, x: int, y: int, tile: bytes) -> None:
+        self.cache.set(tile_key(z, x, y), tile)
+
+    def invalidate_point(self, lat: float, lon: float) -> None:
+        tiles = tiles_for_point(lat, lon, margin=TILE_BUFFER / TILE_EXTENT)
+        self.cache.delete(*(tile_key(*t) for t in tiles))
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    # For async handlers (see ResponseCache.aget)
+    async def aget(self, z: int, x: int, y: int) -> Optional[bytes]:
+        return await self.cache.aget(tile_key(z, x, y))
+
+    async def aset(self, z: int, x: int, y: int, tile: bytes) -> None:
+        await self.cache.aset(tile_key(z, x, y), tile)
+
+    async def ainvalidate_point(self, lat: float, lon: float) -> None:
+        await run_blocking(self.cache.backend, self.invalidate_point, lat, lon)
+
+
+tile_cache = TileCache(
+    build_cache("tile:", settings.TILE_CACHE_MAX_ENTRIES, settings.TILE_CACHE_TTL_SECONDS)
+)
@@ -0,0 +1,67 @@
+"""
+Web Mercator (slippy map) tile math shared by the tile and response caches.
+"""
+
+import math
+from typing import Iterator
+
+MAX_TILE_ZOOM = 22
+_MAX_MERCATOR_LAT = 85.0511
+
+
+def _fraction(lat: float, lon: float) -> tuple[float, float]:
+    """Position of a point as a fraction of the world tile (0..1, 0..1)."""
+    lat = max(min(lat, _MAX_MERCATOR_LAT), -_MAX_MERCATOR_LAT)
+    lat_rad = math.radians(lat)
+    fx = (lon + 180.0) / 360.0
+    fy = (1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0
+    return fx, fy
+
+
+def tile_for_point(z: int, lat: float, lon: float) -> tuple[int, int]:
+    n = 2 ** z
+    fx, fy = _fraction(lat, lon)
+    return min(int(fx * n), n - 1), min(int(fy * n), n - 1)
+
+
+def tiles_for_point(
+    lat: float, lon: float, margin: float = 0.0, zooms: range = range(MAX_TILE_ZOOM + 1)
+) -> Iterator[tuple[int, int, int]]:
+    """
+    Yield (z, x, y) for every tile whose extent, grown by `margin` (a fraction
+    of the tile size), contains the point.
+    """
+    fx, fy = _fraction(lat, lon)
+    for z in zooms:
+        n = 2 ** z
+        tx, ty = fx * n, fy * n
+        xs = {min(max(int(math.floor(tx + d)), 0), n - 1) for d in (-margin, margin)}
+        ys = {min(max(int(math.floor(ty + d)), 0), n - 1) for d in (-margin, margin)}
+        for x in xs:
+            for y in ys:
+                yield z, x, y
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) of a tile."""
+    n = 2 ** z
+
+    def lat_at(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat_at(y + 1), x / n * 360.0 - 180.0, lat_at(y), (x + 1) / n * 360.0 - 180.0
+
+
+def tiles_covering_bbox(
+    z: int, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+) -> list[tuple[int, int, int]]:
+    x0, y0 = tile_for_point(z, max_lat, min_lon)
+    x1, y1 = tile_for_point(z, min_lat, max_lon)
+    return [(z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def tile_count(z: int, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> int:
+    """len(tiles_covering_bbox(...)) from the corner tiles, without listing them."""
+    x0, y0 = tile_for_point(z, max_lat, min_lon)
+    x1, y1 = tile_for_point(z, min_lat, max_lon)
+    return max(x1 - x0 + 1, 0) * max(y1 - y0 + 1, 0)
@@ -0,0 +1,76 @@
+"""
+Cache of verified Firebase ID token claims.
+
+Verifying an ID token means an RSA signature check plus certificate handling,
+yet the same token is presented on every request for up to an hour. Verified
+claims are kept per process, keyed by a SHA-256 of the token (raw tokens are
+never held as keys), and each entry expires at the token's own `exp` claim, so
+a cached token is never accepted after firebase_admin would have rejected it.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app.core.settings import settings
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """Bounded LRU of token hash -> (exp, claims)."""
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, token: str) -> Optional[dict]:
+        """Claims for a previously verified, unexpired token (a copy callers may mutate)."""
+        key = token_key(token)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if entry[0] <= self._clock():
+                del self._data[key]
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return dict(entry[1])
+
+    def set(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not self.max_entries or exp is None or exp <= self._clock():
+            return
+        key = token_key(token)
+        with self._lock:
+            self._data[key] = (float(exp), dict(claims))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._data)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
@@ -0,0 +1,46 @@
+"""
+Cache of Firebase uid -> users row for authenticated handlers.
+
+Shared through Redis when settings.REDIS_URL is set, otherwise per process (see
+app/core/cache.py). Entries are short-lived, and the user write paths
+(/users/sync, PATCH and DELETE /users/{id}) drop the entry after they commit.
+"""
+
+from typing import Optional
+
+import orjson
+
+from app.core.cache import ResponseCache, build_cache
+from app.core.settings import settings
+from app.db import schemas
+
+
+class UserCache:
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+
+    def get(self, uid: str) -> Optional[schemas.UserOut]:
+        raw = self.cache.get(uid)
+        return schemas.UserOut.model_validate_json(raw) if raw is not None else None
+
+    def set(self, user: schemas.UserOut) -> None:
+        self.cache.set(user.id, orjson.dumps(user.model_dump(mode="json")))
+
+    def invalidate(self, uid: str) -> None:
+        self.cache.delete(uid)
+
+    # For async handlers (see ResponseCache.aget)
+    async def aget(self, uid: str) -> Optional[schemas.UserOut]:
+        raw = await self.cache.aget(uid)
+        return schemas.UserOut.model_validate_json(raw) if raw is not None else None
+
+    async def aset(self, user: schemas.UserOut) -> None:
+        await self.cache.aset(user.id, orjson.dumps(user.model_dump(mode="json")))
+
+    async def ainvalidate(self, uid: str) -> None:
+        await self.cache.adelete(uid)
+
+
+user_cache = UserCache(
+    build_cache("user:", settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+)
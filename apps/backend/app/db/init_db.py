@@ -12,7 +12,11 @@ from sqlalchemy.exc import SQLAlchemyError, ProgrammingError
 # Add the app directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from app.db.models import Base
+from app.db.models import WASHROOM_SEARCH_VECTOR, Base
+from app.db.leaderboard import refresh_leaderboard
+from app.db.reconcile_ratings import reconcile_ratings
+from app.db.recount_likes import recount_likes
+from app.db.washroom_hours import rebuild_hours
 from app.core.settings import settings
 
 def init_database():
@@ -27,6 +31,10 @@ def init_database():
         print("📦 Enabling PostGIS extension...")
         with engine.connect() as connection:
             connection.execute(text("CREATE EXTENSION IF NOT EXISTS postgis;"))
+            # Trigram operators and index classes for washroom name autocomplete
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+            # Scalar columns in GiST indexes (idx_washrooms_geom_rating)
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist;"))
             connection.commit()
             print("✅ PostGIS extension enabled")
 
@@ -35,17 +43,48 @@ def init_database():
         Base.metadata.create_all(bind=engine)
         print("✅ Database tables created successfully!")
 
+        # Columns added after the initial schema (create_all does not alter tables)
+        with engine.connect() as connection:
+            connection.execute(text(
+                "ALTER TABLE washrooms ADD COLUMN IF NOT EXISTS rating_sum integer NOT NULL DEFAULT 0;"
+            ))
+            connection.execute(text(
+                "ALTER TABLE washrooms ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({WASHROOM_SEARCH_VECTOR}) STORED;"
+            ))
+            connection.execute(text(
+                "ALTER TABLE washrooms ADD COLUMN IF NOT EXISTS removed_at timestamp;"
+            ))
+            connection.commit()
+
         # Create indexes manually with IF NOT EXISTS
         print("📊 Creating indexes...")
         with engine.connect() as connection:
             indexes = [
                 "CREATE INDEX IF NOT EXISTS idx_washrooms_geom ON washrooms USING gist (geom);",
+                # Filtered map views (see app/api/filters.py)
+                "CREATE INDEX IF NOT EXISTS idx_washrooms_geom_accessible ON washrooms USING gist (geom) WHERE wheelchair_access;",
+                "CREATE INDEX IF NOT EXISTS idx_washrooms_geom_rating ON washrooms USING gist (geom, overall_rating);",
+                "CREATE INDEX IF NOT EXISTS idx_washroom_amenities_amenity ON washroom_amenities (amenity_id, washroom_id);",
+                # open_now / open_at as a semi-join: every interval open on a weekday (covering)
+                "CREATE INDEX IF NOT EXISTS idx_washroom_hours_day ON washroom_hours (day, open_min, close_min, washroom_id);",
                 "CREATE INDEX IF NOT EXISTS idx_washrooms_city ON washrooms (city);",
+                # Leaderboards: top-N by score straight off the index, per city and per geohash cell
+                "CREATE INDEX IF NOT EXISTS idx_washroom_leaderboard_city ON washroom_leaderboard (city, score DESC, washroom_id);",
+                "CREATE INDEX IF NOT EXISTS idx_washroom_leaderboard_cell ON washroom_leaderboard (cell, score DESC, washroom_id);",
                 "CREATE INDEX IF NOT EXISTS idx_washrooms_created_by ON washrooms (created_by);",
+                # GET /washrooms/search: tsquery matching, and name autocomplete by trigram distance
+                "CREATE INDEX IF NOT EXISTS idx_washrooms_search ON washrooms USING gin (search_vector);",
+                "CREATE INDEX IF NOT EXISTS idx_washrooms_name_trgm ON washrooms USING gist (name gist_trgm_ops);",
                 "CREATE INDEX IF NOT EXISTS idx_reviews_washroom_id ON reviews (washroom_id);",
                 "CREATE INDEX IF NOT EXISTS idx_reviews_user_id ON reviews (user_id);",
                 "CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews (rating);",
                 "CREATE INDEX IF NOT EXISTS idx_reviews_created_at ON reviews (created_at);",
+                "CREATE INDEX IF NOT EXISTS idx_review_likes_user_id ON review_likes (user_id);",
+                # Keyset pagination of reviews by washroom / by user on (created_at, id)
+                "CREATE INDEX IF NOT EXISTS idx_reviews_washroom_created ON reviews (washroom_id, created_at DESC, id DESC);",
+                "CREATE INDEX IF NOT EXISTS idx_reviews_user_created ON reviews (user_id, created_at DESC, id DESC);",
+                "CREATE INDEX IF NOT EXISTS idx_washroom_sources_washroom_id ON washroom_sources (washroom_id);",
                 "CREATE INDEX IF NOT EXISTS idx_photos_washroom_id ON photos (washroom_id);",
                 "CREATE INDEX IF NOT EXISTS idx_photos_user_id ON photos (user_id);",
                 "CREATE INDEX IF NOT EXISTS idx_photos_is_approved ON photos (is_approved);",
@@ -69,38 +108,22 @@ def init_database():
             connection.commit()
             print("✅ All indexes processed")
 
-        # Recompute denormalized aggregates on washrooms from reviews
-        print("🧮 Recomputing washroom review aggregates...")
-        with engine.connect() as connection:
-            connection.execute(
-                text(
-                    """
-                    UPDATE washrooms w
-                    SET rating_count = r.cnt,
-                        overall_rating = r.avg_rating
-                    FROM (
-                        SELECT washroom_id,
-                               COUNT(*)::int AS cnt,
-                               COALESCE(AVG(rating), 0)::double precision AS avg_rating
-                        FROM reviews
-                        GROUP BY washroom_id
-                    ) r
-                    WHERE w.id = r.washroom_id;
-                    """
-                )
-            )
-            connection.execute(
-                text(
-                    """
-                    UPDATE washrooms
-                    SET rating_count = 0,
-                        overall_rating = 0
-                    WHERE id NOT IN (SELECT DISTINCT washroom_id FROM reviews);
-                    """
-                )
-            )
-            connection.commit()
-            print("✅ Washroom aggregates updated")
+        # Backfill/repair denormalized review aggregates on washrooms
+        print("🧮 Reconciling washroom review aggregates...")
+        reconcile_ratings(engine)
+
+        # Like counts lost with buffered deltas (see app/core/like_counter.py)
+        print("👍 Recounting review likes...")
+        recount_likes(engine)
+
+        # Score every reviewed washroom (after reconciling, so scores use repaired aggregates)
+        print("🏆 Refreshing washroom leaderboard...")
+        refresh_leaderboard(engine)
+
+        # Compile opening_hours text into washroom_hours intervals
+        print("🕘 Compiling washroom opening hours...")
+        rows = rebuild_hours(engine)
+        print(f"✅ {rows} opening-hours intervals compiled")
 
         # Verify tables were created
         with engine.connect() as connection:
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Top-rated washroom leaderboard.
+
+Ranking by overall_rating favours a washroom with one 5-star review, and
+sorting the whole washrooms table per request does not scale. Instead each
+reviewed washroom has a row in washroom_leaderboard holding its Bayesian
+score
+
+    score = (weight * mean + rating_sum) / (weight + rating_count)
+
+i.e. its reviews plus `weight` virtual reviews at the global mean, together
+with its city and geohash cell. The (city, score DESC) and (cell, score DESC)
+indexes turn "best in city" and "best near me" into short index scans.
+
+The table is maintained incrementally: review writes apply their rating delta
+with APPLY_RATING_DELTA, one statement that updates the washroom's aggregates
+and upserts (or, at zero reviews, removes) its leaderboard row under the
+washroom's row lock. The prior (mean, weight, cell precision) lives in the
+single leaderboard_prior row; this job recomputes the mean and rescores every
+row in keyset batches, each its own short transaction, so readers are never
+blocked while it runs:
+
+    python app/db/leaderboard.py [--batch-size 5000]
+
+Run it periodically (the mean drifts slowly), after reconcile_ratings.py, and
+after changing LEADERBOARD_PRIOR_WEIGHT or LEADERBOARD_CELL_PRECISION. Until
+it has run once (init_db.py runs it) there is no prior row and review writes
+leave the leaderboard empty.
+"""
+
+import argparse
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.cache import response_cache
+from app.core.settings import settings
+from app.db import versions
+
+_SCORE = "(p.weight * p.mean + w.rating_sum) / (p.weight + w.rating_count)"
+
+_UPSERT = f"""
+    INSERT INTO washroom_leaderboard (washroom_id, city, cell, score, rating_count)
+    SELECT w.id, w.city, ST_GeoHash(w.geom, p.cell_precision), {_SCORE}, w.rating_count
+    FROM {{source}} w CROSS JOIN leaderboard_prior p
+    WHERE w.rating_count > 0 AND w.removed_at IS NULL {{where}}
+    ON CONFLICT (washroom_id) DO UPDATE
+    SET city = excluded.city, cell = excluded.cell,
+        score = excluded.score, rating_count = excluded.rating_count
+"""
+
+# Rating delta for one washroom, applied atomically: SET reads the row's
+# current values under its lock, so concurrent reviewers cannot lose updates.
+# Returns the washroom's position (no row if it does not exist), whose region
+# version the caller bumps.
+APPLY_RATING_DELTA = text("""
+    WITH changed AS (
+        UPDATE washrooms
+        SET rating_sum = rating_sum + :sum_delta,
+            rating_count = rating_count + :count_delta,
+            overall_rating = COALESCE(
+                CAST(rating_sum + :sum_delta AS double precision)
+                / NULLIF(rating_count + :count_delta, 0), 0.0)
+        WHERE id = :washroom_id
+        RETURNING id, city, geom, lat, long, rating_sum, rating_count, removed_at
+    ),
+    unranked AS (
+        DELETE FROM washroom_leaderboard l
+        USING changed w
+        WHERE l.washroom_id = w.id AND (w.rating_count = 0 OR w.removed_at IS NOT NULL)
+    ),
+    ranked AS (
+""" + _UPSERT.format(source="changed", where="") + """
+    )
+    SELECT lat, long FROM changed
+""")
+
+_SET_PRIOR = text("""
+    INSERT INTO leaderboard_prior (id, mean, weight, cell_precision, refreshed_at)
+    SELECT 1,
+           COALESCE(SUM(rating_sum)::double precision / NULLIF(SUM(rating_count), 0), 0),
+           :weight, :cell_precision, now()
+    FROM washrooms
+    WHERE removed_at IS NULL
+    ON CONFLICT (id) DO UPDATE
+    SET mean = excluded.mean, weight = excluded.weight,
+        cell_precision = excluded.cell_precision, refreshed_at = excluded.refreshed_at
+    RETURNING mean
+""")
+
+_LOCK_BATCH = text("""
+    SELECT id, lat, long
+    FROM washrooms
+    WHERE (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid))
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE
+""")
+
+_DROP_UNRANKED = text("""
+    DELETE FROM washroom_leaderboard l
+    USING washrooms w
+    WHERE l.washroom_id = w.id AND w.id = ANY(CAST(:ids AS uuid[]))
+      AND (w.rating_count = 0 OR w.removed_at IS NOT NULL)
+    RETURNING l.washroom_id
+""")
+
+# Rewrites only rows whose values change, so a steady-state refresh writes little.
+# Also used by washroom_import for moved and restored washrooms.
+RESCORE = text(_UPSERT.format(
+    source="washrooms", where="AND w.id = ANY(CAST(:ids AS uuid[]))"
+) + """
+    WHERE (washroom_leaderboard.city, washroom_leaderboard.cell,
+           washroom_leaderboard.score, washroom_leaderboard.rating_count)
+          IS DISTINCT FROM
+          (excluded.city, excluded.cell, excluded.score, excluded.rating_count)
+    RETURNING washroom_id
+""")
+
+
+def refresh_leaderboard(engine=None, batch_size: int = 5000) -> int:
+    """Recompute the prior and rescore every washroom. Returns the number of rows changed."""
+    engine = engine or create_engine(settings.DATABASE_URL)
+    with engine.begin() as connection:
+        mean = connection.execute(_SET_PRIOR, {
+            "weight": settings.LEADERBOARD_PRIOR_WEIGHT,
+            "cell_precision": settings.LEADERBOARD_CELL_PRECISION,
+        }).scalar()
+
+    after = None
+    changed = 0
+    while True:
+        # Locking the batch's washrooms orders this job after any in-flight
+        # review write on them, so a rescore never overwrites a newer delta
+        with engine.begin() as connection:
+            points = {str(row.id): (row.lat, row.long) for row in connection.execute(
+                _LOCK_BATCH, {"after": after, "batch_size": batch_size}
+            )}
+            if not points:
+                break
+            ids = list(points)
+            after = ids[-1]
+            touched = connection.execute(_DROP_UNRANKED, {"ids": ids}).scalars().all()
+            touched += connection.execute(RESCORE, {"ids": ids}).scalars().all()
+            # Only the regions of rescored rows get new leaderboard ETags
+            regions = {versions.region_scope(*points[str(i)]) for i in touched}
+            if regions:
+                versions.bump(connection, *regions)
+        if regions:
+            response_cache.invalidate_tags(*regions)
+        changed += len(touched)
+
+    print(f"✅ Leaderboard refreshed: mean {mean:.3f}, {changed} rows changed")
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the washroom leaderboard")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    refresh_leaderboard(batch_size=args.batch_size)
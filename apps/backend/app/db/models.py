@@ -1,12 +1,12 @@
 from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Integer, String, Text, Float,
-    Index, UniqueConstraint
+    BigInteger, Boolean, Column, Computed, DateTime, ForeignKey, Integer, SmallInteger, String,
+    Text, Float, Index, UniqueConstraint
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from geoalchemy2 import Geometry
 import uuid
 from sqlalchemy import Table
@@ -14,6 +14,14 @@ from sqlalchemy import Table
 
 Base = declarative_base()
 
+# Full-text document for washroom search: name outranks description outranks address.
+# Shared with init_db.py, which adds the column to existing databases.
+WASHROOM_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(address, '')), 'C')"
+)
+
 # Association table for many-to-many relationship between Washroom and Amenity
 washroom_amenities = Table(
     'washroom_amenities',
@@ -59,12 +67,20 @@ class Washroom(Base):
     opening_hours = Column(JSONB, nullable=True)
     wheelchair_access = Column(Boolean, default=False, nullable=False)
 
+    # Review aggregates, maintained by delta updates in the reviews router
     overall_rating = Column(Float, default=0.0)
     rating_count = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0, nullable=False)
     floor = Column(Integer, nullable=True)
 
     # Metadata
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.public_id"), nullable=True)
+    # Tombstone: the source record left its dataset (app/db/washroom_import.py).
+    # Hidden from every read path; reviews, photos and reports are kept.
+    removed_at = Column(DateTime, nullable=True)
+
+    # Generated by Postgres from the columns above; only read by search queries
+    search_vector = deferred(Column(TSVECTOR, Computed(WASHROOM_SEARCH_VECTOR, persisted=True)))
 
 
     # Relationships
@@ -112,6 +128,15 @@ class Review(Base):
     )
 
 
+class ReviewLike(Base):
+    """One "helpful" vote per user and review; reviews.likes is their (buffered) count."""
+    __tablename__ = "review_likes"
+
+    review_id = Column(UUID(as_uuid=True), ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class Photo(Base):
     __tablename__ = "photos"
 
@@ -183,3 +208,66 @@ class Amenity(Base):
         secondary="washroom_amenities",
         back_populates="amenities"
     )
+
+
+class WashroomHours(Base):
+    """
+    Compiled opening hours, one row per weekly interval (see
+    app/core/opening_hours.py). Rewritten whenever washrooms.opening_hours is.
+    """
+    __tablename__ = "washroom_hours"
+
+    washroom_id = Column(
+        UUID(as_uuid=True), ForeignKey("washrooms.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = Column(SmallInteger, primary_key=True)  # 0 = Monday
+    # Minutes after local midnight; -1 = dawn (open_min), -2 = dusk (close_min)
+    open_min = Column(SmallInteger, primary_key=True)
+    close_min = Column(SmallInteger, nullable=False)
+
+
+class WashroomLeaderboard(Base):
+    """
+    Bayesian-ranked summary of reviewed washrooms (see app/db/leaderboard.py).
+    Review writes upsert their washroom's row; the refresh job rescores all rows.
+    """
+    __tablename__ = "washroom_leaderboard"
+
+    washroom_id = Column(
+        UUID(as_uuid=True), ForeignKey("washrooms.id", ondelete="CASCADE"), primary_key=True
+    )
+    city = Column(String(100), nullable=True)
+    cell = Column(String(12), nullable=False)  # ST_GeoHash(geom, LEADERBOARD_CELL_PRECISION)
+    score = Column(Float, nullable=False)
+    rating_count = Column(Integer, nullable=False)
+
+
+class LeaderboardPrior(Base):
+    """Single-row prior of the leaderboard score: mean rating and its weight in reviews."""
+    __tablename__ = "leaderboard_prior"
+
+    id = Column(SmallInteger, primary_key=True, default=1)
+    mean = Column(Float, nullable=False)
+    weight = Column(Float, nullable=False)
+    cell_precision = Column(SmallInteger, nullable=False)  # geohash length of washroom_leaderboard.cell
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class WashroomSource(Base):
+    """Import manifest: one row per source record (see app/db/washroom_import.py)."""
+    __tablename__ = "washroom_sources"
+
+    source = Column(String(50), primary_key=True)  # e.g. vancouver_public, sfu
+    source_key = Column(String(500), primary_key=True)
+    washroom_id = Column(UUID(as_uuid=True), ForeignKey("washrooms.id", ondelete="SET NULL"), nullable=True)
+    fingerprint = Column(String(16), nullable=True)  # content hash of the last imported row
+    imported_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    removed_at = Column(DateTime, nullable=True)  # tombstone: the record left the source
+
+
+class DataVersion(Base):
+    """Monotonic change counters used to build ETags (see app/db/versions.py)."""
+    __tablename__ = "data_versions"
+
+    scope = Column(String(100), primary_key=True)  # e.g. washrooms, washroom:<id>
+    version = Column(BigInteger, default=0, nullable=False)
@@ -0,0 +1,80 @@
+"""
+Connection pool instrumentation.
+
+Engines in app/db/session.py are built with an instrumented subclass of their
+usual pool class, which times every checkout (how long a request waited for a
+connection) into a histogram and counts checkout timeouts. snapshot() adds the
+pool's live gauges and is served at /api/v1/health/db.
+"""
+
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last is open-ended
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+
+    def observe(self, wait_ms: float, timed_out: bool = False) -> None:
+        slot = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound), -1)
+        with self._lock:
+            self._buckets[slot] += 1
+            self._wait_total_ms += wait_ms
+            self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._checkouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            observed = self._checkouts + self._timeouts
+            histogram = {
+                f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self._buckets)
+            }
+            histogram["gt_5000ms"] = self._buckets[-1]
+            stats = {
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "wait_mean_ms": self._wait_total_ms / observed if observed else 0.0,
+                "wait_max_ms": self._wait_max_ms,
+                "wait_histogram": histogram,
+            }
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+        return stats
+
+
+class _TimedCheckout:
+    """Mixin timing QueuePool._do_get, the step that blocks when the pool is exhausted."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.observe((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self.stats.observe((time.perf_counter() - start) * 1000)
+        return conn
+
+
+def instrumented_pool(pool_cls, stats: PoolStats):
+    """A subclass of pool_cls reporting into stats (survives pool.recreate())."""
+    return type(f"Instrumented{pool_cls.__name__}", (_TimedCheckout, pool_cls), {"stats": stats})
@@ -0,0 +1,140 @@
+"""
+Per-request SQL accounting, slow-query logging and query budgets.
+
+MetricsMiddleware opens a QueryTracker for each request in a ContextVar; the
+cursor-execute hooks installed on both engines add each statement's count and
+wall time to it. Threadpool endpoints and SQLAlchemy's async greenlets run in
+a copy of the request context, and the tracker is a shared mutable object, so
+their statements are counted too.
+
+Statements slower than SLOW_QUERY_MS are logged with their parameters whether
+or not a request is active. Endpoints declare how many statements they should
+need with deps.query_budget(n); going over is logged, or raised as
+QueryBudgetExceeded when QUERY_BUDGET_STRICT is set (TestClient re-raises it,
+failing the test). assert_max_queries() does the same check around any block.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Statements kept per tracker for budget reports
+_MAX_RECORDED = 50
+# Longest statement / parameter text written to the slow-query log
+_MAX_LOGGED_CHARS = 2000
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryTracker:
+    __slots__ = ("count", "seconds", "statements", "budget", "label", "_token")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: list[str] = []
+        self.budget: Optional[int] = None
+        self.label = ""
+        self._token = None
+
+    def over_budget(self) -> Optional[str]:
+        """A report of the statements run if the budget was exceeded, else None."""
+        if self.budget is None or self.count <= self.budget:
+            return None
+        listing = "\n".join(f"  {i}. {s}" for i, s in enumerate(self.statements, 1))
+        more = self.count - len(self.statements)
+        if more > 0:
+            listing += f"\n  ... and {more} more"
+        return f"{self.label or 'block'} ran {self.count} queries, budget is {self.budget}:\n{listing}"
+
+
+_current: ContextVar[Optional[QueryTracker]] = ContextVar("query_tracker", default=None)
+
+
+def start_request() -> QueryTracker:
+    tracker = QueryTracker()
+    tracker._token = _current.set(tracker)
+    return tracker
+
+
+def end_request(tracker: QueryTracker) -> None:
+    _current.reset(tracker._token)
+
+
+def current() -> Optional[QueryTracker]:
+    return _current.get()
+
+
+def check_budget(tracker: QueryTracker) -> None:
+    report = tracker.over_budget()
+    if report is None:
+        return
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(report)
+    logger.warning(report)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, label: str = "") -> Iterator[QueryTracker]:
+    """
+    Fail with QueryBudgetExceeded if the block runs more than max_queries
+    statements in this context (e.g. around a service call in a test).
+    """
+    tracker = start_request()
+    tracker.budget = max_queries
+    tracker.label = label
+    try:
+        yield tracker
+    finally:
+        end_request(tracker)
+    report = tracker.over_budget()
+    if report is not None:
+        raise QueryBudgetExceeded(report)
+
+
+def _truncate(value) -> str:
+    text = str(value)
+    return text if len(text) <= _MAX_LOGGED_CHARS else text[:_MAX_LOGGED_CHARS] + "..."
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_stats_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+
+    slow_ms = settings.SLOW_QUERY_MS
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        logger.warning(
+            "slow query %.1fms: %s params=%s",
+            elapsed * 1000, _truncate(statement), _truncate(parameters),
+        )
+
+    tracker = _current.get()
+    if tracker is None:
+        return
+    tracker.count += 1
+    tracker.seconds += elapsed
+    if len(tracker.statements) < _MAX_RECORDED:
+        tracker.statements.append(" ".join(statement.split())[:200])
+
+
+def install(sync_engine) -> None:
+    """Attach the hooks to a sync Engine (pass AsyncEngine.sync_engine for asyncpg)."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
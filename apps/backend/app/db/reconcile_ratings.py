@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Rating aggregate reconciliation job.
+
+Review writes keep washrooms.rating_sum / rating_count / overall_rating up to
+date with atomic delta updates. This job recomputes the aggregates from the
+reviews table in keyset-ordered batches of washrooms, reports any drift and
+(unless --dry-run) repairs it.
+
+    python app/db/reconcile_ratings.py [--batch-size 1000] [--dry-run]
+
+Each batch locks its washroom rows before reading reviews, so a review write
+racing the job is either fully counted or applies its delta after the repair.
+"""
+
+import argparse
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.cache import response_cache
+from app.core.settings import settings
+from app.core.tile_cache import tile_cache
+from app.db import versions
+
+_LOCK_BATCH = text("""
+    SELECT id
+    FROM washrooms
+    WHERE (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid))
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE
+""")
+
+_DRIFT = """
+    WITH actual AS (
+        SELECT w.id,
+               COUNT(r.id)::int AS cnt,
+               COALESCE(SUM(r.rating), 0)::int AS total
+        FROM washrooms w
+        LEFT JOIN reviews r ON r.washroom_id = w.id
+        WHERE w.id = ANY(CAST(:ids AS uuid[]))
+        GROUP BY w.id
+    )
+"""
+
+_DRIFT_CONDITION = """
+    (w.rating_count, w.rating_sum) IS DISTINCT FROM (a.cnt, a.total)
+    OR w.overall_rating IS DISTINCT FROM
+       COALESCE(a.total::double precision / NULLIF(a.cnt, 0), 0)
+"""
+
+_FIND_DRIFT = text(_DRIFT + f"""
+    SELECT w.id, w.lat, w.long
+    FROM washrooms w JOIN actual a ON a.id = w.id
+    WHERE {_DRIFT_CONDITION}
+""")
+
+_REPAIR_DRIFT = text(_DRIFT + f"""
+    UPDATE washrooms w
+    SET rating_count = a.cnt,
+        rating_sum = a.total,
+        overall_rating = COALESCE(a.total::double precision / NULLIF(a.cnt, 0), 0)
+    FROM actual a
+    WHERE a.id = w.id AND ({_DRIFT_CONDITION})
+    RETURNING w.id, w.lat, w.long
+""")
+
+
+def _bump_versions(connection, drifted) -> list[str]:
+    """Bump data versions inside the repair transaction; returns the scopes touched."""
+    scopes = []
+    for row in drifted:
+        scopes += [versions.washroom_scope(row.id), versions.washroom_reviews_scope(row.id),
+                   versions.region_scope(row.lat, row.long)]
+    versions.bump(connection, *scopes)
+    return scopes
+
+
+def reconcile_ratings(engine=None, batch_size: int = 1000, dry_run: bool = False) -> int:
+    """Detect (and unless dry_run, repair) rating drift. Returns the number of drifted washrooms."""
+    engine = engine or create_engine(settings.DATABASE_URL)
+    after = None
+    checked = drifted_total = 0
+
+    while True:
+        with engine.begin() as connection:
+            ids = [str(row.id) for row in connection.execute(
+                _LOCK_BATCH, {"after": after, "batch_size": batch_size}
+            )]
+            if not ids:
+                break
+            checked += len(ids)
+            after = ids[-1]
+
+            if dry_run:
+                drifted = connection.execute(_FIND_DRIFT, {"ids": ids}).fetchall()
+                scopes = []
+            else:
+                drifted = connection.execute(_REPAIR_DRIFT, {"ids": ids}).fetchall()
+                scopes = _bump_versions(connection, drifted) if drifted else []
+
+        if scopes:
+            # Post-commit: drop cached responses/tiles for the repaired washrooms
+            response_cache.invalidate_tags(*scopes)
+            for row in drifted:
+                tile_cache.invalidate_point(row.lat, row.long)
+
+        for row in drifted:
+            print(f"⚠️  Rating drift on washroom {row.id}")
+        drifted_total += len(drifted)
+
+    action = "found" if dry_run else "repaired"
+    print(f"✅ Checked {checked} washrooms, {action} drift on {drifted_total}")
+    return drifted_total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile washroom rating aggregates")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="report drift without repairing")
+    args = parser.parse_args()
+    reconcile_ratings(batch_size=args.batch_size, dry_run=args.dry_run)
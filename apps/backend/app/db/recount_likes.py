@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Review like count reconciliation job.
+
+Likes are recorded as review_likes rows, while reviews.likes is advanced by
+LikeCounter's buffered deltas (app/core/like_counter.py). Deltas still in a
+buffer when a worker crashes are lost, so this job recounts reviews.likes
+from review_likes in keyset-ordered batches of reviews, reports any drift
+and (unless --dry-run) repairs it.
+
+    python app/db/recount_likes.py [--batch-size 5000] [--dry-run]
+
+Deltas that are still pending are taken into account: a review's target is
+its vote count minus what the next flush will add. With Redis the job sees
+every worker's pending deltas; without it each worker's buffer is private,
+so run the job while the API is stopped. A flush that has taken its deltas
+but not yet written them when the job reads a review can leave that review
+off by those clicks; run the job again (or when likes are quiet) to settle.
+"""
+
+import argparse
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.cache import response_cache
+from app.core.like_counter import like_counter
+from app.core.settings import settings
+from app.db import versions
+
+_LOCK_BATCH = text("""
+    SELECT id
+    FROM reviews
+    WHERE (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid))
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE
+""")
+
+_COUNT = text("""
+    SELECT r.id, r.likes, COUNT(l.user_id)::int AS votes
+    FROM reviews r
+    LEFT JOIN review_likes l ON l.review_id = r.id
+    WHERE r.id = ANY(CAST(:ids AS uuid[]))
+    GROUP BY r.id
+""")
+
+_REPAIR = text("""
+    UPDATE reviews r
+    SET likes = d.likes
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:likes AS integer[])) AS d(id, likes)
+    WHERE r.id = d.id
+    RETURNING r.washroom_id
+""")
+
+
+def recount_likes(engine=None, batch_size: int = 5000, dry_run: bool = False) -> int:
+    """Detect (and unless dry_run, repair) like count drift. Returns the number of drifted reviews."""
+    engine = engine or create_engine(settings.DATABASE_URL)
+    after = None
+    checked = drifted_total = 0
+
+    while True:
+        with engine.begin() as connection:
+            ids = [str(row.id) for row in connection.execute(
+                _LOCK_BATCH, {"after": after, "batch_size": batch_size}
+            )]
+            if not ids:
+                break
+            checked += len(ids)
+            after = ids[-1]
+
+            # Only rows whose stored count differs from the votes can have drifted,
+            # so the pending deltas are only looked up for those
+            drifted = {}
+            for row in connection.execute(_COUNT, {"ids": ids}):
+                if row.likes != row.votes:
+                    target = max(row.votes - like_counter.backend.pending(str(row.id)), 0)
+                    if row.likes != target:
+                        drifted[str(row.id)] = target
+
+            scopes = []
+            if drifted and not dry_run:
+                washroom_ids = connection.execute(_REPAIR, {
+                    "ids": list(drifted), "likes": list(drifted.values()),
+                }).scalars().all()
+                scopes = [versions.washroom_reviews_scope(w) for w in set(washroom_ids)]
+                versions.bump(connection, *scopes)
+
+        if scopes:
+            # Post-commit: drop cached review listings of the repaired reviews
+            response_cache.invalidate_tags(*scopes)
+
+        for review_id in drifted:
+            print(f"⚠️  Like count drift on review {review_id}")
+        drifted_total += len(drifted)
+
+    action = "found" if dry_run else "repaired"
+    print(f"✅ Checked {checked} reviews, {action} drift on {drifted_total}")
+    return drifted_total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recount review likes from review_likes")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="report drift without repairing")
+    args = parser.parse_args()
+    recount_likes(batch_size=args.batch_size, dry_run=args.dry_run)
@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -42,12 +42,43 @@ class WashroomOut(BaseModel):
     wheelchair_access: bool  # Or Optional[dict] if nullable
     overall_rating: float
     rating_count: int
-    created_by: UUID
+    created_by: Optional[UUID] = None
 
     class Config:
         from_attributes = True
 
 
+class WashroomNearbyOut(WashroomOut):
+    distance_m: float
+
+
+class WashroomSearchOut(WashroomOut):
+    rank: float
+    # Set when the search was given lat/lon
+    distance_m: Optional[float] = None
+
+
+class WashroomLeaderboardOut(WashroomOut):
+    score: float
+
+
+class WashroomSuggestOut(BaseModel):
+    id: UUID
+    name: str
+    city: Optional[str] = None
+    lat: float
+    long: float
+
+
+class WashroomClusterOut(BaseModel):
+    lat: float
+    long: float
+    count: int
+    avg_rating: Optional[float] = None
+    # Set when the cluster is a single washroom so the client can render it directly
+    washroom_id: Optional[UUID] = None
+
+
 class WashroomCreate(BaseModel):
     name: str
     description: str
@@ -68,6 +99,38 @@ class WashroomCreate(BaseModel):
         from_attributes = True
 
 
+class WashroomBulkItem(WashroomCreate):
+    """
+    WashroomCreate with the column limits checked up front, so one bad item is
+    reported on its own instead of failing the batch INSERT. The point is built
+    from lat/long, so geom may be omitted.
+    """
+    name: str = Field(..., max_length=50)
+    address: str = Field(..., max_length=500)
+    city: str = Field(..., max_length=100)
+    country: str = Field(..., max_length=100)
+    geom: Optional[str] = None
+    lat: float = Field(..., ge=-90, le=90)
+    long: float = Field(..., ge=-180, le=180)
+
+
+class WashroomBulkCreate(BaseModel):
+    # Items are validated one by one in the handler so each gets its own result
+    washrooms: List[dict]
+
+
+class WashroomBulkResult(BaseModel):
+    index: int
+    id: Optional[UUID] = None
+    errors: Optional[List[str]] = None
+
+
+class WashroomBulkOut(BaseModel):
+    created: int
+    failed: int
+    results: List[WashroomBulkResult]
+
+
 
 
 ### REVIEW ###
@@ -101,6 +164,11 @@ class ReviewOutByUser(BaseModel):
     class Config:
         from_attributes = True
 
+class ReviewLikeOut(BaseModel):
+    review_id: UUID
+    liked: bool
+    likes: int
+
 # creating requires all attributes
 class ReviewCreate(BaseModel):
     washroom_id: UUID
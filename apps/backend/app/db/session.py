@@ -1,13 +1,33 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.settings import settings
+from app.db import query_stats
+from app.db.pool_stats import PoolStats, instrumented_pool
+
+# Pool sizing and health checks, shared by both engines (see Settings.DB_POOL_*)
+pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+# Server-side statement_timeout, passed in each driver's own connect options
+statement_timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    poolclass=instrumented_pool(QueuePool, pool_stats),
+    connect_args={"options": f"-c statement_timeout={statement_timeout}"},
     echo=settings.DEBUG,  # Log SQL queries in debug mode
+    **pool_options,
 )
 
 # Create session factory
@@ -20,3 +40,36 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async engine (asyncpg) used by the API routers; the sync engine above stays
+# for scripts such as init_db.py and data seeding.
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool(AsyncAdaptedQueuePool, async_pool_stats),
+    connect_args={"server_settings": {"statement_timeout": statement_timeout}},
+    echo=settings.DEBUG,
+    **pool_options,
+)
+
+# Per-request query counts and DB time for /metrics
+query_stats.install(engine)
+query_stats.install(async_engine.sync_engine)
+
+# expire_on_commit=False: attribute access after commit must not trigger IO
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_snapshot() -> dict:
+    """Live gauges and checkout wait histograms for both engines' pools."""
+    return {
+        "async": async_pool_stats.snapshot(async_engine.pool),
+        "sync": pool_stats.snapshot(engine.pool),
+    }
@@ -0,0 +1,98 @@
+"""
+Data version counters for conditional GETs.
+
+Each scope is a row in data_versions that write paths bump inside their own
+transaction, so a reader can never see a new version alongside old data.
+Readers fetch the version before running the real query and turn it into an
+ETag; a matching If-None-Match then short-circuits to 304.
+
+Map-wide data (bbox listings, leaderboards) is versioned per region, a map
+tile at REGION_ZOOM, rather than in one row: a review in one neighbourhood
+then neither contends with writes elsewhere nor changes far-away ETags.
+"""
+
+import hashlib
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.core.tiles import tile_count, tile_for_point, tiles_covering_bbox
+from app.db.models import DataVersion
+
+# Capped at the bbox cache zoom so every cached tile lies in exactly one region
+REGION_ZOOM = min(settings.VERSION_REGION_ZOOM, settings.BBOX_CACHE_ZOOM)
+
+# Scopes per INSERT in bump(); stays well under asyncpg's bind parameter limit
+_BUMP_CHUNK = 1000
+
+
+def washroom_scope(washroom_id: UUID) -> str:
+    return f"washroom:{washroom_id}"
+
+
+def washroom_reviews_scope(washroom_id: UUID) -> str:
+    return f"reviews:washroom:{washroom_id}"
+
+
+def region_scope(lat: float, lon: float) -> str:
+    """Region of a point: any change to a washroom there, including rating aggregates."""
+    x, y = tile_for_point(REGION_ZOOM, lat, lon)
+    return f"region:{REGION_ZOOM}/{x}/{y}"
+
+
+def region_count(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> int:
+    """len(region_scopes(...)), computed without listing them; check it first for client bboxes."""
+    return tile_count(REGION_ZOOM, min_lat, min_lon, max_lat, max_lon)
+
+
+def region_scopes(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> list[str]:
+    """Regions overlapping a bbox."""
+    return [
+        f"region:{z}/{x}/{y}"
+        for z, x, y in tiles_covering_bbox(REGION_ZOOM, min_lat, min_lon, max_lat, max_lon)
+    ]
+
+
+def tile_region_scope(z: int, x: int, y: int) -> str:
+    """Region containing map tile z/x/y (z >= REGION_ZOOM)."""
+    shift = z - REGION_ZOOM
+    return f"region:{REGION_ZOOM}/{x >> shift}/{y >> shift}"
+
+
+def digest(current_versions: dict[str, int]) -> str:
+    """Short stable hash of a set of scope versions, for ETags and cache keys."""
+    joined = ",".join(f"{s}:{v}" for s, v in sorted(current_versions.items()))
+    return hashlib.sha1(joined.encode()).hexdigest()[:16]
+
+
+def bump(db: Session, *scopes: str) -> None:
+    """Increment each scope's version; commits with the caller's transaction."""
+    # Sorted so concurrent writers lock shared scopes in the same order; one
+    # statement per chunk keeps bulk writers to a handful of round trips.
+    ordered = sorted(set(scopes))
+    for start in range(0, len(ordered), _BUMP_CHUNK):
+        stmt = insert(DataVersion).values(
+            [{"scope": scope, "version": 1} for scope in ordered[start:start + _BUMP_CHUNK]]
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[DataVersion.scope],
+                set_={"version": DataVersion.version + 1},
+            )
+        )
+
+
+def current(db: Session, scopes: Sequence[str]) -> dict[str, int]:
+    """Current version of each scope (0 for scopes that were never bumped)."""
+    rows = db.execute(
+        select(DataVersion.scope, DataVersion.version).where(
+            DataVersion.scope.in_(scopes)
+        )
+    ).all()
+    versions = {scope: 0 for scope in scopes}
+    versions.update({scope: version for scope, version in rows})
+    return versions
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Rebuild washroom_hours from washrooms.opening_hours.
+
+Writes keep washroom_hours in step with opening_hours (create, bulk create,
+washroom_import). This job recompiles the whole table, for the first
+deployment of the table and after parser changes in app/core/opening_hours.py:
+
+    python app/db/washroom_hours.py
+
+Each distinct opening_hours value is parsed once in Python; the rows are then
+expanded in SQL by joining those compiled values back onto washrooms, so the
+job's cost does not grow with per-washroom round trips.
+"""
+
+import json
+import sys
+import os
+from sqlalchemy import create_engine, text
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.opening_hours import compile_hours
+from app.core.settings import settings
+
+_DISTINCT = text("SELECT DISTINCT opening_hours::text FROM washrooms WHERE opening_hours IS NOT NULL")
+
+_INSERT = text("""
+    INSERT INTO washroom_hours (washroom_id, day, open_min, close_min)
+    SELECT w.id, c.day, c.open_min, c.close_min
+    FROM washrooms w
+    JOIN jsonb_to_recordset(CAST(:compiled AS jsonb))
+        AS c(opening_hours jsonb, day smallint, open_min smallint, close_min smallint)
+        ON c.opening_hours = w.opening_hours
+    ON CONFLICT DO NOTHING
+""")
+
+
+def rebuild_hours(engine) -> int:
+    """Replace every washroom_hours row in one transaction; returns the row count."""
+    with engine.begin() as connection:
+        compiled = []
+        for (value,) in connection.execute(_DISTINCT):
+            for day, open_min, close_min in compile_hours(value) or ():
+                compiled.append({
+                    "opening_hours": json.loads(value),
+                    "day": day, "open_min": open_min, "close_min": close_min,
+                })
+        connection.execute(text("TRUNCATE washroom_hours"))
+        if compiled:
+            connection.execute(_INSERT, {"compiled": json.dumps(compiled)})
+        return connection.execute(text("SELECT count(*) FROM washroom_hours")).scalar()
+
+
+def main() -> None:
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        rows = rebuild_hours(engine)
+    finally:
+        engine.dispose()
+    print(f"✅ washroom_hours rebuilt: {rows} intervals")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Incremental, idempotent import of washroom datasets.
+
+Every source record has a stable `source_key` (chosen by the parser, see
+data/parse_csv.py) and a fingerprint of its content. The washroom_sources
+manifest remembers, per source, which washroom each key became and the
+fingerprint it was imported with. A new file is diffed against the manifest
+and only the differences are written:
+
+- keys not in the manifest are inserted,
+- keys whose fingerprint changed are updated in place (same washroom id, so
+  reviews and ETags carry over),
+- manifest keys missing from the file are tombstoned: the washroom gets
+  removed_at and disappears from every read path, but keeps its reviews,
+  photos and reports; if the key comes back the washroom is restored.
+
+For sources keyed by position (rekey_by_position, e.g. the Vancouver open
+data), a new key at exactly the position of a vanished one (the parser's key
+changed) takes over that washroom rather than tombstoning it, provided no
+other record in the file or the manifest is at that point. Other sources may put
+several records at one point (SFU rooms at their campus), so there a changed
+key is always a tombstone plus an insert.
+
+Changed rows go through COPY into a temp staging table and are applied with
+set-based statements, so re-running an unchanged 100k-row file writes
+nothing and a file with 10 edits touches 10 washrooms.
+
+Washrooms seeded before the manifest existed are adopted on the first run
+(matched on name, address and coordinates) instead of being duplicated.
+"""
+
+import io
+import uuid
+from typing import Iterable, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from app.core.cache import response_cache
+from app.core.opening_hours import hours_frame
+from app.core.tile_cache import tile_cache
+from app.db import versions
+from app.db.leaderboard import RESCORE
+
+# Content that makes up a washroom; the fingerprint covers exactly these
+CONTENT_COLUMNS = (
+    "name", "description", "address", "city", "country",
+    "lat", "long", "opening_hours", "wheelchair_access",
+)
+_STAGING_COLUMNS = ("source_key", "fingerprint", "op", "id") + CONTENT_COLUMNS
+_COPY_CHUNK_ROWS = 100_000
+# Past this many moved points, dropping the whole tile cache is cheaper
+_MAX_TILE_INVALIDATIONS = 10_000
+
+
+def fingerprints(df: pd.DataFrame) -> pd.Series:
+    """16-hex-digit content hash per row (pandas' fixed-key SipHash, vectorized)."""
+    hashed = pd.util.hash_pandas_object(df[list(CONTENT_COLUMNS)], index=False)
+    return hashed.map("{:016x}".format)
+
+
+def copy_rows(connection, table: str, df: pd.DataFrame, force_not_null: Iterable[str] = ()) -> None:
+    """Stream df into table with COPY ... FORMAT csv, in chunks. Empty unquoted values load as NULL."""
+    options = "FORMAT csv"
+    force_not_null = tuple(force_not_null)
+    if force_not_null:
+        options += f", FORCE_NOT_NULL ({', '.join(force_not_null)})"
+    copy_sql = f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH ({options})"
+    cursor = connection.connection.cursor()
+    try:
+        for start in range(0, len(df), _COPY_CHUNK_ROWS):
+            buffer = io.StringIO()
+            df.iloc[start:start + _COPY_CHUNK_ROWS].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+    finally:
+        cursor.close()
+
+
+def _diff(
+    connection, source: str, df: pd.DataFrame, rekey_by_position: bool = False
+) -> tuple[pd.DataFrame, list[str], list[str], int]:
+    """
+    (rows to insert/update with op and id set, washroom ids to tombstone,
+    re-keyed manifest keys to drop, unchanged count).
+    """
+    manifest = pd.DataFrame(
+        connection.execute(
+            text("""
+                SELECT m.source_key, w.id::text AS washroom_id, w.lat AS old_lat, w.long AS old_long,
+                       m.removed_at IS NOT NULL AS removed,
+                       -- A tombstoned record that reappears is always rewritten (restored)
+                       CASE WHEN m.removed_at IS NULL THEN m.fingerprint END AS old_fingerprint
+                FROM washroom_sources m JOIN washrooms w ON w.id = m.washroom_id
+                WHERE m.source = :source
+            """),
+            {"source": source},
+        ).fetchall(),
+        columns=["source_key", "washroom_id", "old_lat", "old_long", "removed", "old_fingerprint"],
+    ).astype({"old_lat": "float64", "old_long": "float64", "removed": bool})  # also when empty
+    merged = df.merge(manifest, on="source_key", how="left")
+    new = merged["washroom_id"].isna()
+    changed = ~new & (merged["fingerprint"] != merged["old_fingerprint"])
+
+    ops = merged[new | changed].copy()
+    ops["op"] = new[new | changed].map({True: "insert", False: "update"})
+    ops["id"] = ops["washroom_id"]
+
+    vanished = manifest[~manifest["source_key"].isin(df["source_key"]) & ~manifest["removed"]]
+    # A new key at the exact position of a vanished one is the same record
+    # re-keyed, when position is the key and no other record in the file or
+    # the live manifest shares that point (so the match is one to one)
+    alone = ~merged.duplicated(["lat", "long"], keep=False)
+    inserted = ops.loc[(ops["op"] == "insert") & alone[ops.index], ["lat", "long"]].reset_index()
+    live = manifest[~manifest["removed"]]
+    candidates = (
+        vanished.loc[~live.duplicated(["old_lat", "old_long"], keep=False)[vanished.index],
+                     ["source_key", "washroom_id", "old_lat", "old_long"]]
+        .rename(columns={"old_lat": "lat", "old_long": "long"})
+    )
+    if not rekey_by_position:
+        candidates = candidates.iloc[0:0]
+    rekeyed = inserted.merge(candidates, on=["lat", "long"])
+    ops.loc[rekeyed["index"], "op"] = "update"
+    ops.loc[rekeyed["index"], "id"] = rekeyed["washroom_id"].to_numpy()
+
+    ops.loc[ops["op"] == "insert", "id"] = [
+        str(uuid.uuid4()) for _ in range(int((ops["op"] == "insert").sum()))
+    ]
+    removed = vanished.loc[~vanished["washroom_id"].isin(rekeyed["washroom_id"]), "washroom_id"]
+    unchanged = len(merged) - len(ops)
+    return ops[list(_STAGING_COLUMNS)], removed.tolist(), rekeyed["source_key"].tolist(), unchanged
+
+
+def apply_import(
+    connection, source: str, df: pd.DataFrame, amenity_id: Optional[int] = None,
+    rekey_by_position: bool = False,
+) -> dict:
+    """
+    Diff df (source_key + CONTENT_COLUMNS, opening_hours as JSON text) against
+    the manifest and apply it inside the caller's transaction. Returns counts
+    plus the `scopes` and `points` the caller should invalidate after commit.
+    Set rekey_by_position only for sources whose keys are derived from position.
+    """
+    df = df.drop_duplicates("source_key").copy()
+    df["fingerprint"] = fingerprints(df)
+    ops, removed, rekeyed, unchanged = _diff(connection, source, df, rekey_by_position)
+    result = {"inserted": 0, "updated": 0, "removed": 0, "unchanged": unchanged,
+              "scopes": [], "points": []}
+    if ops.empty and not removed:
+        return result
+
+    connection.execute(text("""
+        CREATE TEMP TABLE washroom_import (
+            source_key text NOT NULL,
+            fingerprint text NOT NULL,
+            op text NOT NULL,
+            id uuid NOT NULL,
+            name varchar(50) NOT NULL,
+            description text,
+            address varchar(500),
+            city varchar(100),
+            country varchar(100),
+            lat double precision NOT NULL,
+            long double precision NOT NULL,
+            opening_hours jsonb,
+            wheelchair_access boolean NOT NULL
+        ) ON COMMIT DROP
+    """))
+    ops = ops.assign(name=ops["name"].astype(str).str.slice(0, 50))
+    copy_rows(connection, "washroom_import", ops,
+              force_not_null=("name", "description", "address", "city", "country"))
+
+    # Adopt unmanaged seed rows that match an incoming record exactly
+    connection.execute(text("""
+        UPDATE washroom_import s
+        SET id = w.id, op = 'update'
+        FROM washrooms w
+        WHERE s.op = 'insert'
+          AND w.created_by IS NULL
+          AND w.name = s.name
+          AND w.address IS NOT DISTINCT FROM s.address
+          AND w.lat = s.lat AND w.long = s.long
+          AND NOT EXISTS (SELECT 1 FROM washroom_sources m WHERE m.washroom_id = w.id)
+    """))
+
+    # Old positions of rows about to move, reappear or disappear, for tile invalidation
+    result["points"] += connection.execute(text("""
+        SELECT w.lat, w.long FROM washrooms w JOIN washroom_import s ON s.id = w.id
+        WHERE s.op = 'update'
+    """)).fetchall()
+
+    updated_ids = [row.id for row in connection.execute(text("""
+        UPDATE washrooms w
+        SET name = s.name, description = s.description, address = s.address,
+            city = s.city, country = s.country, lat = s.lat, long = s.long,
+            geom = ST_SetSRID(ST_MakePoint(s.long, s.lat), 4326),
+            opening_hours = s.opening_hours, wheelchair_access = s.wheelchair_access,
+            removed_at = NULL
+        FROM washroom_import s
+        WHERE s.op = 'update' AND s.id = w.id
+          AND (w.removed_at IS NOT NULL
+               OR (w.name, w.description, w.address, w.city, w.country, w.lat, w.long,
+                   w.opening_hours, w.wheelchair_access)
+                  IS DISTINCT FROM
+                  (s.name, s.description, s.address, s.city, s.country, s.lat, s.long,
+                   s.opening_hours, s.wheelchair_access))
+        RETURNING w.id
+    """))]
+    result["updated"] = len(updated_ids)
+
+    result["inserted"] = connection.execute(text("""
+        INSERT INTO washrooms (
+            id, name, description, address, city, country, geom, lat, long,
+            opening_hours, wheelchair_access, overall_rating, rating_count, rating_sum
+        )
+        SELECT id, name, description, address, city, country,
+               ST_SetSRID(ST_MakePoint(long, lat), 4326), lat, long,
+               opening_hours, wheelchair_access, 0.0, 0, 0
+        FROM washroom_import
+        WHERE op = 'insert'
+    """)).rowcount
+
+    if amenity_id is not None:
+        connection.execute(text("""
+            DELETE FROM washroom_amenities a
+            USING washroom_import s
+            WHERE a.washroom_id = s.id AND a.amenity_id = :amenity_id AND NOT s.wheelchair_access
+        """), {"amenity_id": amenity_id})
+        connection.execute(text("""
+            INSERT INTO washroom_amenities (washroom_id, amenity_id)
+            SELECT id, :amenity_id FROM washroom_import WHERE wheelchair_access
+            ON CONFLICT DO NOTHING
+        """), {"amenity_id": amenity_id})
+
+    # Recompile opening hours of every inserted/updated row; keyed by source_key
+    # because adoption may have changed the staged ids
+    connection.execute(text("""
+        CREATE TEMP TABLE washroom_import_hours (
+            source_key text NOT NULL,
+            day smallint NOT NULL,
+            open_min smallint NOT NULL,
+            close_min smallint NOT NULL
+        ) ON COMMIT DROP
+    """))
+    hours = hours_frame(ops["source_key"], ops["opening_hours"]).rename(columns={"washroom_id": "source_key"})
+    copy_rows(connection, "washroom_import_hours", hours)
+    connection.execute(text("""
+        DELETE FROM washroom_hours h USING washroom_import s WHERE h.washroom_id = s.id
+    """))
+    connection.execute(text("""
+        INSERT INTO washroom_hours (washroom_id, day, open_min, close_min)
+        SELECT s.id, h.day, h.open_min, h.close_min
+        FROM washroom_import_hours h JOIN washroom_import s USING (source_key)
+        ON CONFLICT DO NOTHING
+    """))
+    connection.execute(text("DROP TABLE washroom_import_hours"))
+
+    # Moved, re-citied and restored washrooms get their leaderboard row back in step
+    if updated_ids:
+        connection.execute(RESCORE, {"ids": [str(i) for i in updated_ids]})
+
+    connection.execute(text("""
+        INSERT INTO washroom_sources (source, source_key, washroom_id, fingerprint, imported_at, removed_at)
+        SELECT :source, source_key, id, fingerprint, now(), NULL FROM washroom_import
+        ON CONFLICT (source, source_key) DO UPDATE
+        SET washroom_id = excluded.washroom_id,
+            fingerprint = excluded.fingerprint,
+            imported_at = excluded.imported_at,
+            removed_at = NULL
+    """), {"source": source})
+    if rekeyed:
+        connection.execute(text("""
+            DELETE FROM washroom_sources WHERE source = :source AND source_key = ANY(:keys)
+        """), {"source": source, "keys": rekeyed})
+
+    if removed:
+        params = {"ids": removed, "source": source}
+        result["points"] += connection.execute(text(
+            "SELECT lat, long FROM washrooms WHERE id = ANY(CAST(:ids AS uuid[]))"
+        ), params).fetchall()
+        connection.execute(text("""
+            UPDATE washroom_sources SET removed_at = now()
+            WHERE source = :source AND washroom_id = ANY(CAST(:ids AS uuid[]))
+        """), params)
+        # Soft delete: user content stays, only the derived leaderboard row goes
+        connection.execute(text(
+            "DELETE FROM washroom_leaderboard WHERE washroom_id = ANY(CAST(:ids AS uuid[]))"
+        ), params)
+        result["removed"] = connection.execute(text(
+            "UPDATE washrooms SET removed_at = now() WHERE id = ANY(CAST(:ids AS uuid[]))"
+        ), params).rowcount
+
+    connection.execute(text("DROP TABLE washroom_import"))
+
+    # New positions of inserted/updated rows
+    result["points"] += list(zip(ops["lat"], ops["long"]))
+
+    if result["inserted"] or result["updated"] or result["removed"]:
+        # Regions of every old and new position
+        scopes = list({versions.region_scope(lat, lon) for lat, lon in result["points"]})
+        scopes += [versions.washroom_scope(i) for i in updated_ids]
+        for i in removed:
+            scopes += [versions.washroom_scope(i), versions.washroom_reviews_scope(i)]
+        versions.bump(connection, *scopes)
+        result["scopes"] = scopes
+    return result
+
+
+def import_washrooms(
+    engine, source: str, df: pd.DataFrame, amenity_id: Optional[int] = None,
+    rekey_by_position: bool = False,
+) -> dict:
+    """apply_import in its own transaction, then drop cached responses and tiles it affected."""
+    with engine.begin() as connection:
+        result = apply_import(connection, source, df, amenity_id, rekey_by_position)
+
+    if result["scopes"]:
+        response_cache.invalidate_tags(*result["scopes"])
+    if len(result["points"]) > _MAX_TILE_INVALIDATIONS:
+        tile_cache.clear()
+    else:
+        for lat, lon in result["points"]:
+            tile_cache.invalidate_point(lat, lon)
+
+    print(
+        f"✅ {source}: {result['inserted']} inserted, {result['updated']} updated, "
+        f"{result['removed']} removed, {result['unchanged']} unchanged"
+    )
+    return result
@@ -1,10 +1,21 @@
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, Response
 from dotenv import load_dotenv
 load_dotenv()
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.settings import settings
 from app.core.security import *
 from app.api.routers import washrooms, users, reviews
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.cache import response_cache
+from app.core.like_counter import like_counter
+from app.core import metrics
+from app.core.spatial_index import washroom_index
+from app.core.token_cache import token_cache
+from app.db.session import SessionLocal, engine, pool_snapshot
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -32,8 +43,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Outermost, so latency includes CORS handling and every response is counted
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.on_event("startup")
+def load_spatial_index():
+    if not settings.SPATIAL_INDEX_ENABLED:
+        return
+    db = SessionLocal()
+    try:
+        count = washroom_index.load_from_db(db)
+        logger.info("Loaded %d washrooms into spatial index", count)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def prefetch_auth_keys():
+    if settings.AUTH_KEY_PREFETCH_SECONDS <= 0:
+        return
+    try:
+        get_firebase_app()
+    except Exception:
+        # Auth is not configured; get_current_user reports that per request
+        return
+    start_key_prefetch(settings.AUTH_KEY_PREFETCH_SECONDS)
+
+_like_flusher = None
+
+@app.on_event("startup")
+def start_like_flusher():
+    global _like_flusher
+    _like_flusher = like_counter.start(engine, settings.LIKE_FLUSH_INTERVAL_SECONDS)
+
+@app.on_event("shutdown")
+def flush_likes():
+    # Write out whatever is still buffered so no vote counts are lost on exit
+    if _like_flusher is not None:
+        _like_flusher.set()
+    try:
+        like_counter.flush(engine)
+    except Exception:
+        # Still in review_likes, so app/db/recount_likes.py repairs the counts
+        logger.exception(
+            "Final like counter flush failed; like counts of %d reviews were not written "
+            "(run app/db/recount_likes.py)", like_counter.backend.pending_reviews(),
+        )
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Rate the Washroom API!"}
@@ -46,6 +104,26 @@ async def health_check():
 async def api_health():
     return {"status": "healthy", "version": "0.1.0", "api": "v1"}
 
+@app.get(f"{settings.API_V1_STR}/health/cache")
+async def cache_health():
+    return response_cache.stats()
+
+@app.get(f"{settings.API_V1_STR}/health/db")
+async def db_health():
+    return pool_snapshot()
+
+@app.get(f"{settings.API_V1_STR}/health/auth")
+async def auth_health():
+    return token_cache.stats()
+
+@app.get(f"{settings.API_V1_STR}/health/likes")
+async def likes_health():
+    return like_counter.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Rate the Washroom API.
+
+Run from apps/backend, e.g. `python -m benchmarks.bench_spatial_index`.
+"""
@@ -0,0 +1,90 @@
+"""
+Washroom creation throughput: POST /washrooms/bulk vs looping POST /washrooms/.
+
+    python -m benchmarks.bench_bulk_create --token "$FIREBASE_ID_TOKEN"
+    python -m benchmarks.bench_bulk_create --token ... --count 2000 --batch-size 500
+
+Runs against a live API server (--base-url) as the user behind --token, who
+must already exist (POST /users/sync). The created washrooms are named with a
+per-run prefix and deleted from DATABASE_URL afterwards unless --keep is set.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import random_points
+
+
+def _items(prefix: str, n: int, seed: int) -> list[dict]:
+    return [
+        {
+            "name": f"{prefix} {i}",
+            "description": "Benchmark washroom",
+            "address": "Somewhere",
+            "city": "Vancouver",
+            "country": "Canada",
+            "geom": f"POINT({long} {lat})",
+            "lat": lat,
+            "long": long,
+            "opening_hours": {"hours": "Dawn to Dusk"},
+            "wheelchair_access": i % 3 == 0,
+        }
+        for i, (lat, long) in enumerate(random_points(n, seed=seed))
+    ]
+
+
+def main() -> None:
+    import httpx
+    from sqlalchemy import create_engine, text
+
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Firebase ID token of an existing user")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=settings.BULK_CREATE_MAX_ITEMS)
+    parser.add_argument("--keep", action="store_true", help="leave the created washrooms in place")
+    args = parser.parse_args()
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    url = f"{settings.API_V1_STR}/washrooms"
+    headers = {"Authorization": f"Bearer {args.token}"}
+
+    try:
+        with httpx.Client(base_url=args.base_url, headers=headers, timeout=120) as client:
+            items = _items(f"{prefix} single", args.count, seed=1)
+            start = time.perf_counter()
+            for item in items:
+                client.post(f"{url}/", json=item).raise_for_status()
+            single_s = time.perf_counter() - start
+
+            items = _items(f"{prefix} bulk", args.count, seed=2)
+            start = time.perf_counter()
+            created = 0
+            for i in range(0, len(items), args.batch_size):
+                resp = client.post(f"{url}/bulk", json={"washrooms": items[i:i + args.batch_size]})
+                resp.raise_for_status()
+                created += resp.json()["created"]
+            bulk_s = time.perf_counter() - start
+
+        print(f"single POST   {args.count:>7,} washrooms {single_s:8.2f}s  {args.count / single_s:10,.0f}/s")
+        print(
+            f"bulk POST     {created:>7,} washrooms {bulk_s:8.2f}s  {created / bulk_s:10,.0f}/s"
+            f"  (batch={args.batch_size}, speedup={single_s / bulk_s:.1f}x)"
+        )
+    finally:
+        if not args.keep:
+            engine = create_engine(settings.DATABASE_URL)
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM washrooms WHERE name LIKE :p"), {"p": f"{prefix} %"})
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Tail latency of the read endpoints under many concurrent connections.
+
+    python -m benchmarks.bench_concurrency --base-url http://localhost:8000
+    python -m benchmarks.bench_concurrency --concurrency 500 --requests 20000
+
+Opens --concurrency keep-alive connections against a running API server and
+replays a mix of viewport (bbox) and nearby queries from that many workers at
+once. Run it against the server before and after a change (e.g. sync vs async
+handlers, different pool sizes) and compare p99.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import VANCOUVER_BOUNDS, report, viewport
+
+
+def _request_paths(api: str, n: int, seed: int = 11) -> list[str]:
+    """n request paths, alternating map viewports and nearby lookups."""
+    rng = random.Random(seed)
+    boxes = viewport(seed=seed)
+    min_lat, min_lon, max_lat, max_lon = VANCOUVER_BOUNDS
+    paths = []
+    for i in range(n):
+        if i % 2 == 0:
+            b_min_lat, b_min_lon, b_max_lat, b_max_lon = next(boxes)
+            paths.append(
+                f"{api}/washrooms/?min_lat={b_min_lat}&min_lon={b_min_lon}"
+                f"&max_lat={b_max_lat}&max_lon={b_max_lon}"
+            )
+        else:
+            lat, lon = rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)
+            paths.append(f"{api}/washrooms/nearby?lat={lat}&lon={lon}&limit=20")
+    return paths
+
+
+async def _run(base_url: str, paths: list[str], concurrency: int, timeout: float):
+    import httpx
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+
+    samples: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                try:
+                    resp = await client.get(path)
+                    ok = resp.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                samples.append((time.perf_counter() - start) * 1000)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return samples, errors, elapsed
+
+
+def main() -> None:
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    paths = _request_paths(settings.API_V1_STR, args.requests)
+    samples, errors, elapsed = asyncio.run(
+        _run(args.base_url, paths, args.concurrency, args.timeout)
+    )
+    report(
+        f"mixed reads c={args.concurrency}",
+        samples,
+        f"rps={len(samples) / elapsed:,.0f} errors={errors}",
+    )
+
+
+if __name__ == "__main__":
+    main()
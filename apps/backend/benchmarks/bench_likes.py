@@ -0,0 +1,161 @@
+"""
+Like contention: many users liking and unliking one review at the same time.
+
+    python -m benchmarks.dataset --scale 10k
+    python -m benchmarks.bench_likes
+    python -m benchmarks.bench_likes --clients 200 --rounds 20 --flush-interval 1
+
+Each of --clients synthetic users (from benchmarks.dataset) likes and then
+unlikes the same review --rounds times, all concurrently, through an asyncpg
+engine with one connection per client (so the pool is not what is measured).
+Two strategies run back to back:
+
+- naive: the vote row plus `UPDATE reviews SET likes = likes +/- 1` in the
+  same transaction, so every click queues on the review's row lock,
+- coalesced: the vote row only (app.core.like_counter.RECORD_LIKE /
+  REMOVE_LIKE), with the counter buffered in LikeCounter and flushed by its
+  background thread every --flush-interval seconds, as the API does.
+
+Prints per-click latency, clicks per second and the number of reviews.likes
+writes, then checks that reviews.likes moved exactly as the vote rows did. The
+review's votes and count are restored afterwards.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import report
+from benchmarks.dataset import REVIEW_ID_PREFIX, USER_ID_PREFIX
+
+_NAIVE_LIKE = """
+    WITH vote AS (
+        INSERT INTO review_likes (review_id, user_id, created_at)
+        VALUES (:review_id, :user_id, timezone('utc', now()))
+        ON CONFLICT DO NOTHING
+        RETURNING review_id
+    )
+    UPDATE reviews SET likes = likes + 1 WHERE id IN (SELECT review_id FROM vote)
+"""
+
+_NAIVE_UNLIKE = """
+    WITH vote AS (
+        DELETE FROM review_likes WHERE review_id = :review_id AND user_id = :user_id
+        RETURNING review_id
+    )
+    UPDATE reviews SET likes = GREATEST(likes - 1, 0) WHERE id IN (SELECT review_id FROM vote)
+"""
+
+
+async def _run(engine, review_id, users: list[str], rounds: int, click) -> tuple[list[float], float]:
+    """Every user alternates like/unlike `rounds` times; returns (latencies ms, elapsed s)."""
+    samples: list[float] = []
+
+    async def client(user_id: str) -> None:
+        async with engine.connect() as conn:
+            for i in range(rounds * 2):
+                start = time.perf_counter()
+                await click(conn, review_id, user_id, liked=i % 2 == 0)
+                samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(u) for u in users))
+    return samples, time.perf_counter() - start
+
+
+def main() -> None:
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.core.like_counter import RECORD_LIKE, REMOVE_LIKE, LikeCounter, MemoryBackend
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=10, help="like + unlike pairs per client")
+    parser.add_argument("--flush-interval", type=float, default=settings.LIKE_FLUSH_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    sync_engine = create_engine(settings.DATABASE_URL)
+    with sync_engine.connect() as conn:
+        review = conn.execute(text("""
+            SELECT id, likes FROM reviews
+            WHERE id BETWEEN CAST(:lo AS uuid) AND CAST(:hi AS uuid)
+            ORDER BY id LIMIT 1
+        """), {"lo": REVIEW_ID_PREFIX + "0" * 12, "hi": REVIEW_ID_PREFIX + "f" * 12}).one_or_none()
+        votes_before = conn.execute(
+            text("SELECT count(*) FROM review_likes WHERE review_id = :id"), {"id": review.id}
+        ).scalar() if review is not None else 0
+        users = conn.execute(
+            text("SELECT id FROM users WHERE id LIKE :u ORDER BY id LIMIT :n"),
+            {"u": USER_ID_PREFIX + "%", "n": args.clients},
+        ).scalars().all()
+    if review is None or len(users) < args.clients:
+        sys.exit("Load the synthetic dataset first: python -m benchmarks.dataset --scale 10k")
+
+    counter = LikeCounter(MemoryBackend())
+
+    async def naive(conn, review_id, user_id, liked):
+        await conn.execute(text(_NAIVE_LIKE if liked else _NAIVE_UNLIKE),
+                           {"review_id": review_id, "user_id": user_id})
+        await conn.commit()
+
+    async def coalesced(conn, review_id, user_id, liked):
+        row = (await conn.execute(RECORD_LIKE if liked else REMOVE_LIKE,
+                                  {"review_id": review_id, "user_id": user_id})).one()
+        await conn.commit()
+        if row.changed:
+            counter.add(review_id, 1 if liked else -1)
+
+    async def run_all():
+        engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL, pool_size=args.clients, max_overflow=0
+        )
+        try:
+            results = {}
+            for label, click in (("naive", naive), ("coalesced", coalesced)):
+                stop = counter.start(sync_engine, args.flush_interval) if click is coalesced else None
+                samples, elapsed = await _run(engine, review.id, users, args.rounds, click)
+                if stop is not None:
+                    stop.set()
+                    counter.flush(sync_engine)
+                results[label] = (samples, elapsed)
+            return results
+        finally:
+            await engine.dispose()
+
+    print(f"{args.clients} clients x {args.rounds} like/unlike pairs on review {review.id}")
+    try:
+        results = asyncio.run(run_all())
+        clicks = args.clients * args.rounds * 2
+        for label, (samples, elapsed) in results.items():
+            writes = clicks if label == "naive" else counter.stats()["rows_flushed"]
+            report(label, samples, f"{clicks / elapsed:,.0f} clicks/s, {writes:,} reviews.likes writes")
+
+        with sync_engine.connect() as conn:
+            stored, votes = conn.execute(text("""
+                SELECT r.likes, (SELECT count(*) FROM review_likes WHERE review_id = r.id)
+                FROM reviews r WHERE r.id = :id
+            """), {"id": review.id}).one()
+        # Every client ends on an unlike, so both should be back where they started
+        ok = stored - review.likes == votes - votes_before
+        print(f"likes {review.likes} -> {stored}, votes {votes_before} -> {votes}: "
+              f"{'ok' if ok else 'MISMATCH'}")
+    finally:
+        with sync_engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM review_likes WHERE review_id = :id AND user_id = ANY(:users)"
+            ), {"id": review.id, "users": list(users)})
+            conn.execute(text("UPDATE reviews SET likes = :likes WHERE id = :id"),
+                         {"id": review.id, "likes": review.likes})
+        sync_engine.dispose()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
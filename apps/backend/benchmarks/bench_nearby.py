@@ -0,0 +1,101 @@
+"""
+Show that the KNN query behind GET /washrooms/nearby stays flat as the table grows.
+
+    python -m benchmarks.bench_nearby
+    python -m benchmarks.bench_nearby --sizes 10000 100000 1000000 --radius-m 2000
+
+Each size gets a fresh scratch table (bench_nearby_points) with a GiST index,
+then random query points are timed and the plan is checked for an index-ordered
+scan. Requires a PostGIS database at DATABASE_URL.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import (
+    VANCOUVER_BOUNDS,
+    create_scratch_points,
+    drop_scratch,
+    report,
+    timed,
+)
+
+SCRATCH_TABLE = "bench_nearby_points"
+
+# Same shape as washrooms.get_nearby_washrooms, against the scratch table
+KNN_SQL = f"""
+    SELECT knn.*
+    FROM (
+        SELECT w.id,
+               ST_Distance(
+                   w.geom::geography,
+                   ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
+               ) AS distance_m
+        FROM {SCRATCH_TABLE} w
+        {{radius_filter}}
+        ORDER BY w.geom <-> ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)
+        LIMIT :limit
+    ) knn
+    ORDER BY knn.distance_m
+"""
+
+RADIUS_FILTER = """
+        WHERE w.geom && ST_Expand(ST_SetSRID(ST_MakePoint(:lon, :lat), 4326), :deg)
+          AND ST_DWithin(
+                w.geom::geography,
+                ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
+                :radius_m)
+"""
+
+
+def main() -> None:
+    from sqlalchemy import create_engine, text
+
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--radius-m", type=float, default=None)
+    args = parser.parse_args()
+
+    radius_filter = RADIUS_FILTER if args.radius_m else ""
+    query = text(KNN_SQL.format(radius_filter=radius_filter))
+    min_lat, min_lon, max_lat, max_lon = VANCOUVER_BOUNDS
+    engine = create_engine(settings.DATABASE_URL)
+
+    try:
+        for n in args.sizes:
+            create_scratch_points(engine, SCRATCH_TABLE, n)
+            rng = random.Random(n)
+
+            def params() -> dict:
+                p = {
+                    "lat": rng.uniform(min_lat, max_lat),
+                    "lon": rng.uniform(min_lon, max_lon),
+                    "limit": args.limit,
+                }
+                if args.radius_m:
+                    # Generous degree bbox; ST_DWithin applies the exact cutoff
+                    p.update(radius_m=args.radius_m, deg=args.radius_m / 111_320.0 * 2)
+                return p
+
+            with engine.connect() as conn:
+                plan = "\n".join(
+                    row[0] for row in conn.execute(text("EXPLAIN " + query.text), params())
+                )
+                uses_index = "Index Scan" in plan
+                samples = timed(lambda: conn.execute(query, params()).fetchall(), args.repeat)
+            report(f"knn n={n:>9,}", samples, f"index_scan={uses_index}")
+    finally:
+        drop_scratch(engine, SCRATCH_TABLE)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
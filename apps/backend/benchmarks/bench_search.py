@@ -0,0 +1,103 @@
+"""
+Washroom search latency against a large table, with a pass/fail target.
+
+    python -m benchmarks.dataset --scale 1m
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --target-ms 20 --repeat 200 --explain
+
+Runs the exact SQL behind GET /washrooms/search and /washrooms/search/suggest
+(app.api.search) over the washrooms in DATABASE_URL, for a spread of query
+shapes: two words, a very common word (bounded by SEARCH_MAX_CANDIDATES),
+multi-word prefixes, bbox- and radius-limited searches, and 2 to 6 character
+autocomplete prefixes with and without typos. Prints p50/p95/p99 per shape and
+exits 1 if any shape's p95 is over --target-ms (20 ms by default, meant for a
+1M-row table). --explain prints each plan once, to check that
+idx_washrooms_search and idx_washrooms_name_trgm are used.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import percentile, report, timed
+from benchmarks.dataset import CITIES
+
+
+def _shapes(rng: random.Random):
+    """(label, kind, args) per query shape; kind is "search" or "suggest"."""
+    from app.api.search import prefix_tsquery
+
+    vancouver = next(c for c in CITIES if c[0] == "Vancouver")
+    _, lat, lon, _, _ = vancouver
+    box = (lat - 0.01, lon - 0.02, lat + 0.01, lon + 0.02)
+    return [
+        ("search two words", "search", dict(tsquery=prefix_tsquery("capilano pool"))),
+        ("search common word", "search", dict(tsquery=prefix_tsquery("park"))),
+        ("search prefix as typed", "search", dict(tsquery=prefix_tsquery("queen eliz"))),
+        ("search number", "search", dict(tsquery=prefix_tsquery(str(rng.randrange(1000))))),
+        ("search common word + bbox", "search", dict(tsquery=prefix_tsquery("park"), bbox=box)),
+        ("search + 2km radius", "search",
+         dict(tsquery=prefix_tsquery("beach"), near=(lat, lon, 2000.0))),
+        ("search + distance ties", "search",
+         dict(tsquery=prefix_tsquery("library"), near=(lat, lon, None))),
+        ("suggest 2 chars", "suggest", dict(q="ki")),
+        ("suggest 4 chars", "suggest", dict(q="kits")),
+        ("suggest 6 chars", "suggest", dict(q="stanle")),
+        ("suggest with typo", "suggest", dict(q="kitsilamo bea")),
+    ]
+
+
+def main() -> None:
+    from sqlalchemy import create_engine, text
+
+    from app.api.search import search_query, suggest_query
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=20.0)
+    parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    failures = []
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT count(*) FROM washrooms")).scalar()
+            print(f"{rows:,} washrooms, target p95 <= {args.target_ms:g}ms")
+            for label, kind, kwargs in _shapes(random.Random(3)):
+                if kind == "search":
+                    query, params = search_query(
+                        limit=args.limit, max_candidates=settings.SEARCH_MAX_CANDIDATES, **kwargs
+                    )
+                else:
+                    query, params = suggest_query(limit=8, **kwargs)
+
+                if args.explain:
+                    # search_query returns text().columns(); its SQL is on .element
+                    sql = getattr(query, "element", query).text
+                    explain = conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + sql), params).fetchall()
+                    print(f"--- {label}")
+                    print("\n".join(r[0] for r in explain))
+
+                found = len(conn.execute(query, params).fetchall())  # warm the cache
+                samples = timed(lambda: conn.execute(query, params).fetchall(), args.repeat)
+                p95 = percentile(samples, 95)
+                status = "ok" if p95 <= args.target_ms else "OVER TARGET"
+                report(label, samples, f"rows={found} {status}")
+                if p95 > args.target_ms:
+                    failures.append(label)
+    finally:
+        engine.dispose()
+
+    if failures:
+        print(f"p95 over {args.target_ms:g}ms: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
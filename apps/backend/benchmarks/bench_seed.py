@@ -0,0 +1,118 @@
+"""
+Seed throughput of the COPY-based washroom import on synthetic rows.
+
+    python -m benchmarks.bench_seed
+    python -m benchmarks.bench_seed --rows 1000000 --changes 10 --baseline-rows 5000
+
+Builds a cleaned washroom DataFrame of --rows random points and loads it with
+app.db.washroom_import.apply_import, then re-imports the same frame with
+--changes rows edited (the incremental path), all inside one transaction that
+is rolled back, so the database is left unchanged. --baseline-rows times the
+same number of one-row INSERTs (the old per-washroom round trip) for
+comparison. Requires a PostGIS database at DATABASE_URL with the schema from
+init_db.py.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "data"))
+
+from benchmarks.common import VANCOUVER_BOUNDS
+
+
+def synthetic_frame(n: int, seed: int = 42):
+    """A DataFrame shaped like parse_csv.load_washroom_data output, built with numpy."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    min_lat, min_lon, max_lat, max_lon = VANCOUVER_BOUNDS
+    hours = np.array(["Dawn to Dusk", "7am - 10pm", "as per CC operating hours", ""])
+    return pd.DataFrame({
+        "name": pd.Series(np.arange(n)).map("Synthetic washroom {}".format),
+        "description": "Park - Field House",
+        "address": "Somewhere",
+        "city": "Vancouver",
+        "country": "Canada",
+        "lat": rng.uniform(min_lat, max_lat, n),
+        "long": rng.uniform(min_lon, max_lon, n),
+        "opening_hours": hours[rng.integers(0, len(hours), n)],
+        "wheelchair_access": rng.random(n) < 0.3,
+        "source_key": pd.Series(np.arange(n)).map("bench|{}".format),
+    })
+
+
+def main() -> None:
+    from sqlalchemy import create_engine, text
+
+    from app.core.settings import settings
+    from app.db.washroom_import import apply_import
+    from parse_csv import accessible_amenity_id, import_frame
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--changes", type=int, default=10)
+    parser.add_argument("--baseline-rows", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        start = time.perf_counter()
+        df = synthetic_frame(args.rows)
+        build_s = time.perf_counter() - start
+        print(f"built {args.rows:,} rows in {build_s:.2f}s")
+
+        frame = import_frame(df)
+        edited = frame.copy()
+        edited.loc[edited.index[:args.changes], "description"] = "Edited"
+
+        with engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                amenity_id = accessible_amenity_id(conn)
+                start = time.perf_counter()
+                full = apply_import(conn, "bench", frame, amenity_id)
+                copy_s = time.perf_counter() - start
+                start = time.perf_counter()
+                delta = apply_import(conn, "bench", edited, amenity_id)
+                delta_s = time.perf_counter() - start
+            finally:
+                trans.rollback()
+        inserted = full["inserted"]
+        print(f"COPY load       {inserted:>10,} rows {copy_s:8.2f}s  {inserted / copy_s:12,.0f} rows/s")
+        print(
+            f"re-import       {delta['updated']:>10,} rows {delta_s:8.2f}s  "
+            f"({delta['unchanged']:,} unchanged, {delta['inserted']} inserted, {delta['removed']} removed)"
+        )
+
+        if args.baseline_rows:
+            sample = df.head(args.baseline_rows)
+            insert = text("""
+                INSERT INTO washrooms (name, description, address, city, country, geom,
+                                       lat, long, wheelchair_access, overall_rating,
+                                       rating_count, rating_sum)
+                VALUES (:name, :description, :address, :city, :country,
+                        ST_SetSRID(ST_MakePoint(:long, :lat), 4326),
+                        :lat, :long, :wheelchair_access, 0.0, 0, 0)
+            """)
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    start = time.perf_counter()
+                    for row in sample.drop(columns=["opening_hours"]).to_dict("records"):
+                        conn.execute(insert, row)
+                    row_s = time.perf_counter() - start
+                finally:
+                    trans.rollback()
+            n = len(sample)
+            print(f"row-at-a-time   {n:>10,} rows {row_s:8.2f}s  {n / row_s:12,.0f} rows/s")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Rows/second for building a WashroomOut list response, before and after the
+shared serializer in app.api.serializers.
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 20
+
+"before" mirrors the old handlers: WKB decode via to_shape, a WashroomOut per
+row, then FastAPI's response_model validation and JSON dump. "after" builds
+dicts from the lat/long columns and writes bytes with orjson. No database needed.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from collections import namedtuple
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import random_points
+
+Row = namedtuple(
+    "Row",
+    "id name description address city country geom lat long opening_hours "
+    "wheelchair_access overall_rating rating_count created_by",
+)
+
+
+def make_rows(n: int) -> list:
+    from geoalchemy2.shape import from_shape
+    from shapely.geometry import Point
+
+    creator = uuid.uuid4()
+    return [
+        Row(
+            id=uuid.uuid4(),
+            name="Synthetic washroom",
+            description="Park - Field House",
+            address="North side, fieldhouse",
+            city="Vancouver",
+            country="Canada",
+            geom=from_shape(Point(long, lat), srid=4326),
+            lat=lat,
+            long=long,
+            opening_hours={"hours": "Dawn to Dusk"},
+            wheelchair_access=True,
+            overall_rating=4.2,
+            rating_count=12,
+            created_by=creator,
+        )
+        for lat, long in random_points(n)
+    ]
+
+
+def before(rows: list, adapter) -> bytes:
+    from geoalchemy2.shape import to_shape
+
+    from app.db import schemas
+
+    out = []
+    for w in rows:
+        geom_obj = to_shape(w.geom)
+        out.append(
+            schemas.WashroomOut(
+                id=str(w.id),
+                name=w.name,
+                description=w.description,
+                address=w.address,
+                city=w.city,
+                country=w.country,
+                geom={"type": "Point", "coordinates": [geom_obj.x, geom_obj.y]},
+                lat=w.lat,
+                long=w.long,
+                opening_hours=w.opening_hours,
+                wheelchair_access=w.wheelchair_access,
+                overall_rating=w.overall_rating,
+                rating_count=w.rating_count,
+                created_by=str(w.created_by),
+            )
+        )
+    # response_model pass: validate the returned objects again, then dump
+    return adapter.dump_json(adapter.validate_python(out, from_attributes=True))
+
+
+def after(rows: list) -> bytes:
+    from app.api.serializers import json_response, washroom_to_dict
+
+    return json_response([washroom_to_dict(w) for w in rows]).body
+
+
+def measure(label: str, fn, n: int, repeat: int) -> None:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {n * repeat / elapsed:12,.0f} rows/s  ({elapsed / repeat * 1000:.1f} ms/response)")
+
+
+def main() -> None:
+    from pydantic import TypeAdapter
+
+    from app.db import schemas
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(List[schemas.WashroomOut])
+    measure("before", lambda: before(rows, adapter), args.rows, args.repeat)
+    measure("after", lambda: after(rows), args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
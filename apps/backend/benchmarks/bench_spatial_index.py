@@ -0,0 +1,107 @@
+"""
+Compare bbox queries served by the in-memory SpatialIndex with the PostGIS path
+used by get_washrooms_in_bounds.
+
+    python -m benchmarks.bench_spatial_index                 # in-memory only
+    python -m benchmarks.bench_spatial_index --sql           # also hit DATABASE_URL
+    python -m benchmarks.bench_spatial_index --sizes 10000 100000
+
+The SQL path runs against a scratch table (bench_washroom_points) that is
+filled with generate_series and dropped afterwards, so the real data is untouched.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import (
+    create_scratch_points,
+    drop_scratch,
+    random_points,
+    report,
+    synthetic_payload,
+    timed,
+    viewport,
+)
+
+SCRATCH_TABLE = "bench_washroom_points"
+
+
+def bench_memory(n: int, repeat: int) -> None:
+    from app.core.spatial_index import SpatialIndex
+
+    index = SpatialIndex()
+    start = time.perf_counter()
+    index.bulk_load(synthetic_payload(lat, long) for lat, long in random_points(n))
+    load_s = time.perf_counter() - start
+
+    boxes = viewport()
+    hits = []
+
+    def query():
+        hits.append(len(index.query_bbox(*next(boxes))))
+
+    samples = timed(query, repeat)
+    report(
+        f"memory  n={n:>9,}",
+        samples,
+        f"load={load_s:.2f}s avg_rows={sum(hits) / len(hits):.0f}",
+    )
+
+
+def bench_sql(n: int, repeat: int) -> None:
+    from geoalchemy2.shape import to_shape
+    from sqlalchemy import create_engine, text
+
+    from app.core.settings import settings
+
+    engine = create_engine(settings.DATABASE_URL)
+    create_scratch_points(engine, SCRATCH_TABLE, n)
+
+    boxes = viewport()
+    hits = []
+    query = text(
+        """
+        SELECT *
+        FROM bench_washroom_points
+        WHERE ST_Within(geom, ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326))
+        """
+    )
+    try:
+        with engine.connect() as conn:
+            def run():
+                b_min_lat, b_min_lon, b_max_lat, b_max_lon = next(boxes)
+                rows = conn.execute(query, {
+                    "min_lon": b_min_lon, "min_lat": b_min_lat,
+                    "max_lon": b_max_lon, "max_lat": b_max_lat,
+                }).fetchall()
+                # Mirror the handler's per-row WKB decode
+                for row in rows:
+                    to_shape(row.geom)
+                hits.append(len(rows))
+
+            samples = timed(run, repeat)
+        report(f"postgis n={n:>9,}", samples, f"avg_rows={sum(hits) / len(hits):.0f}")
+    finally:
+        drop_scratch(engine, SCRATCH_TABLE)
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--sql", action="store_true", help="also benchmark PostGIS")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        bench_memory(n, args.repeat)
+        if args.sql:
+            bench_sql(n, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
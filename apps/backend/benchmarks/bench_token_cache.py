@@ -0,0 +1,114 @@
+"""
+Cost of Firebase ID token verification with and without app.core.token_cache.
+
+    python -m benchmarks.bench_token_cache
+    python -m benchmarks.bench_token_cache --users 1000 --requests 50000
+
+Runs fully offline: an RSA key is generated locally, tokens are minted with
+Firebase's claim layout and verified with the same google-auth routine
+firebase_admin uses, against an in-memory certificate endpoint.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import report
+
+PROJECT_ID = "bench-project"
+KEY_ID = "bench-key"
+CERTS_URL = "https://certs.invalid/securetoken"
+
+
+class _CertsResponse:
+    status = 200
+    headers = {"content-type": "application/json"}
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _signing_material():
+    """(signer, certificate request) for a freshly generated RSA key."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from google.auth import crypt
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    certs = json.dumps({KEY_ID: public_pem.decode()}).encode()
+
+    def request(url, method="GET", **kwargs):
+        return _CertsResponse(certs)
+
+    return crypt.RSASigner.from_string(private_pem, KEY_ID), request
+
+
+def _mint(signer, uid: str) -> str:
+    from google.auth import jwt
+
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "auth_time": now,
+        "user_id": uid,
+        "sub": uid,
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(signer, payload).decode()
+
+
+def main() -> None:
+    from google.oauth2 import id_token
+
+    from app.core.token_cache import TokenCache
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    signer, request = _signing_material()
+    tokens = [_mint(signer, f"user-{i}") for i in range(args.users)]
+    rng = random.Random(3)
+    stream = [rng.choice(tokens) for _ in range(args.requests)]
+
+    def verify(token: str) -> dict:
+        return id_token.verify_token(
+            token, request=request, audience=PROJECT_ID, certs_url=CERTS_URL
+        )
+
+    samples = []
+    for token in stream:
+        start = time.perf_counter()
+        verify(token)
+        samples.append((time.perf_counter() - start) * 1000)
+    report("verify every request", samples)
+
+    cache = TokenCache(max_entries=args.users * 2)
+    samples = []
+    for token in stream:
+        start = time.perf_counter()
+        if cache.get(token) is None:
+            cache.set(token, verify(token))
+        samples.append((time.perf_counter() - start) * 1000)
+    stats = cache.stats()
+    report("token cache", samples, f"hit_ratio={stats['hit_ratio']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import random
+import statistics
+import time
+import uuid
+from typing import Callable, Iterator, Optional
+
+# Rough Metro Vancouver extent, matches the seed data
+VANCOUVER_BOUNDS = (49.00, -123.30, 49.40, -122.50)
+
+
+def random_points(
+    n: int, bounds: tuple = VANCOUVER_BOUNDS, seed: int = 42
+) -> Iterator[tuple[float, float]]:
+    """Yield n uniformly distributed (lat, long) pairs inside bounds."""
+    rng = random.Random(seed)
+    min_lat, min_lon, max_lat, max_lon = bounds
+    for _ in range(n):
+        yield rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)
+
+
+def synthetic_payload(lat: float, long: float) -> dict:
+    """A WashroomOut-shaped dict for in-memory benchmarks."""
+    return {
+        "id": str(uuid.uuid4()),
+        "name": "Synthetic washroom",
+        "description": "Park - Field House",
+        "address": "Somewhere",
+        "city": "Vancouver",
+        "country": "Canada",
+        "geom": {"type": "Point", "coordinates": [long, lat]},
+        "lat": lat,
+        "long": long,
+        "opening_hours": {"hours": "Dawn to Dusk"},
+        "wheelchair_access": False,
+        "overall_rating": 0.0,
+        "rating_count": 0,
+        "created_by": str(uuid.uuid4()),
+    }
+
+
+def viewport(bounds: tuple = VANCOUVER_BOUNDS, span: float = 0.02, seed: int = 7) -> Iterator[tuple]:
+    """Yield random (min_lat, min_lon, max_lat, max_lon) boxes of a typical map pan size."""
+    rng = random.Random(seed)
+    min_lat, min_lon, max_lat, max_lon = bounds
+    while True:
+        lat = rng.uniform(min_lat, max_lat - span)
+        lon = rng.uniform(min_lon, max_lon - span * 2)
+        yield lat, lon, lat + span, lon + span * 2
+
+
+def create_scratch_points(engine, table: str, n: int, bounds: tuple = VANCOUVER_BOUNDS) -> None:
+    """(Re)create a GiST-indexed table of n random points, built in SQL."""
+    from sqlalchemy import text
+
+    min_lat, min_lon, max_lat, max_lon = bounds
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(
+            text(
+                f"""
+                CREATE TABLE {table} AS
+                SELECT gen_random_uuid() AS id,
+                       ST_SetSRID(ST_MakePoint(
+                           :min_lon + random() * (:max_lon - :min_lon),
+                           :min_lat + random() * (:max_lat - :min_lat)), 4326) AS geom
+                FROM generate_series(1, :n)
+                """
+            ),
+            {"n": n, "min_lat": min_lat, "min_lon": min_lon,
+             "max_lat": max_lat, "max_lon": max_lon},
+        )
+        conn.execute(text(f"CREATE INDEX ON {table} USING gist (geom)"))
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def drop_scratch(engine, table: str) -> None:
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def timed(fn: Callable[[], object], repeat: int) -> list[float]:
+    """Run fn repeat times and return per-call latencies in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def report(label: str, samples: list[float], extra: Optional[str] = None) -> None:
+    line = (
+        f"{label:<36} p50={percentile(samples, 50):8.3f}ms "
+        f"p95={percentile(samples, 95):8.3f}ms "
+        f"p99={percentile(samples, 99):8.3f}ms "
+        f"mean={statistics.fmean(samples):8.3f}ms"
+    )
+    if extra:
+        line += f"  {extra}"
+    print(line)
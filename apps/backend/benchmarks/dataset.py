@@ -0,0 +1,302 @@
+"""
+Synthetic washrooms, users and reviews for load testing.
+
+    docker compose up -d db && python app/db/init_db.py
+    python -m benchmarks.dataset --scale 10k
+    python -m benchmarks.dataset --scale 1m
+    python -m benchmarks.dataset --scale 10m --reviews-per-washroom 1.5
+    python -m benchmarks.dataset --drop
+
+Washrooms are clustered around CITIES: each city gets a share of the points
+proportional to its weight, spread with a Gaussian whose radius follows the
+city's size, plus a few percent of uniform rural noise across the Pacific
+Northwest. Reviews follow a heavy-tailed (Zipf) per-washroom count, so a few
+downtown washrooms have hundreds of reviews and most have none or one, like
+the real data. The washroom aggregates (rating_sum, rating_count,
+overall_rating) are computed from the generated reviews, so they agree with
+what the reviews router maintains.
+
+Everything is generated with numpy in chunks and loaded with COPY
+(app.db.washroom_import.copy_rows) into DATABASE_URL. Synthetic rows have
+recognisable ids (users "synth-<n>", washroom and review UUIDs under the
+5e000000- prefix), so --drop removes exactly them and nothing else. The run
+bumps the washrooms version scope, but restart the API afterwards so its
+spatial index and in-process caches reload.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "data"))
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# (name, lat, long, weight, spread in degrees of latitude)
+CITIES = (
+    ("Vancouver", 49.2827, -123.1207, 30, 0.04),
+    ("Burnaby", 49.2488, -122.9805, 8, 0.03),
+    ("Surrey", 49.1913, -122.8490, 10, 0.06),
+    ("Richmond", 49.1666, -123.1336, 6, 0.03),
+    ("Victoria", 48.4284, -123.3656, 6, 0.04),
+    ("Seattle", 47.6062, -122.3321, 25, 0.06),
+    ("Tacoma", 47.2529, -122.4443, 5, 0.04),
+    ("Bellingham", 48.7519, -122.4787, 3, 0.03),
+    ("Kelowna", 49.8880, -119.4960, 3, 0.03),
+    ("Calgary", 51.0447, -114.0719, 15, 0.06),
+)
+# Fraction of washrooms scattered uniformly over NOISE_BOUNDS (parks, highways)
+RURAL_FRACTION = 0.03
+NOISE_BOUNDS = (47.0, -124.0, 52.0, -113.5)
+
+WASHROOM_ID_PREFIX = "5e000000-0000-4000-8000-"
+REVIEW_ID_PREFIX = "5e000000-0000-4000-9000-"
+USER_PUBLIC_ID_PREFIX = "5e000000-0000-4000-a000-"
+USER_ID_PREFIX = "synth-"
+
+_HOURS = (
+    '{"hours": "Dawn to Dusk"}',
+    '{"hours": "7am - 10pm"}',
+    '{"hours": "24 hours"}',
+    '{"hours": "as per CC operating hours"}',
+    "",
+)
+_DESCRIPTIONS = ("Park - Field House", "Community Centre", "Transit Station", "Beach", "Library")
+# Washroom names are "<place> <kind> <n>", giving search a realistic vocabulary
+_PLACES = (
+    "Stanley", "Kitsilano", "Jericho", "Trout Lake", "Hastings", "Granville", "Queen Elizabeth",
+    "Main Street", "Commercial", "Kerrisdale", "Dunbar", "Killarney", "Renfrew", "Marpole",
+    "Riley", "Sunset", "Oak", "Cambie", "Lonsdale", "Capilano", "Pacific", "Harbour",
+    "Waterfront", "Olympic", "Heritage", "Maple", "Cedar", "Spruce", "Fraser", "Columbia",
+)
+_KINDS = ("Park", "Beach", "Community Centre", "Library", "Station", "Plaza", "Field House", "Pool", "Market")
+_TITLES = ("Clean", "Could be better", "Spotless", "Out of paper", "Fine", "")
+
+
+def _ids(prefix: str, start: int, n: int):
+    import numpy as np
+    import pandas as pd
+
+    return pd.Series(np.arange(start, start + n)).map((prefix + "{:012x}").format)
+
+
+def city_points(n: int, rng):
+    """(lat, long, city name) arrays for n washrooms clustered around CITIES."""
+    import numpy as np
+
+    weights = np.array([c[3] for c in CITIES], dtype=float)
+    rural = rng.random(n) < RURAL_FRACTION
+    city = rng.choice(len(CITIES), size=n, p=weights / weights.sum())
+    centre_lat = np.array([c[1] for c in CITIES])[city]
+    centre_lon = np.array([c[2] for c in CITIES])[city]
+    spread = np.array([c[4] for c in CITIES])[city]
+    lat = rng.normal(centre_lat, spread)
+    # A degree of longitude is ~0.65 of a degree of latitude up here
+    lon = rng.normal(centre_lon, spread / 0.65)
+
+    min_lat, min_lon, max_lat, max_lon = NOISE_BOUNDS
+    k = int(rural.sum())
+    lat[rural] = rng.uniform(min_lat, max_lat, k)
+    lon[rural] = rng.uniform(min_lon, max_lon, k)
+    names = np.array([c[0] for c in CITIES], dtype=object)[city]
+    names[rural] = "Rural"
+    return lat, lon, names
+
+
+def review_counts(n: int, mean: float, n_users: int, rng):
+    """Heavy-tailed reviews per washroom with roughly the given mean, capped at n_users."""
+    import numpy as np
+
+    if mean <= 0:
+        return np.zeros(n, dtype=np.int64)
+    # Zipf(a=2) has a huge tail; scale it down so the sample mean lands near `mean`
+    raw = rng.zipf(2.0, n) - 1
+    raw = np.minimum(raw, 1000)
+    scale = mean / max(raw.mean(), 1e-9)
+    counts = rng.poisson(raw * scale)
+    # Review ids are allotted 1000 per washroom, see washroom_chunk
+    return np.minimum(counts, min(n_users, 1000))
+
+
+def washroom_chunk(start: int, n: int, mean_reviews: float, n_users: int, rng):
+    """(washrooms DataFrame, reviews DataFrame) for washrooms start .. start + n - 1."""
+    import numpy as np
+    import pandas as pd
+
+    lat, lon, city = city_points(n, rng)
+    counts = review_counts(n, mean_reviews, n_users, rng)
+    total = int(counts.sum())
+
+    # Reviews: washroom index repeated by count, users distinct within a washroom
+    owner = np.repeat(np.arange(n), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    user = ((owner + start) * 7919 + offsets) % n_users
+    # Skewed toward 4-5 stars, like most rating sites
+    rating = rng.choice(np.arange(1, 6), size=total, p=[0.08, 0.07, 0.15, 0.30, 0.40])
+    created = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 600 * 86400, total), unit="s")
+
+    washroom_ids = _ids(WASHROOM_ID_PREFIX, start, n)
+    review_start = start * 1000  # disjoint across chunks since counts <= 1000
+    reviews = pd.DataFrame({
+        "id": _ids(REVIEW_ID_PREFIX, review_start, total),
+        "washroom_id": washroom_ids.to_numpy()[owner],
+        "user_id": pd.Series(user).map((USER_ID_PREFIX + "{}").format),
+        "rating": rating,
+        "title": np.array(_TITLES, dtype=object)[rng.integers(0, len(_TITLES), total)],
+        "description": "Synthetic review",
+        "likes": rng.poisson(0.5, total),
+        "created_at": created,
+        "updated_at": created,
+    })
+
+    rating_sum = np.bincount(owner, weights=rating, minlength=n).astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = np.where(counts > 0, rating_sum / np.maximum(counts, 1), 0.0)
+    washrooms = pd.DataFrame({
+        "id": washroom_ids,
+        "name": pd.Series(np.array(_PLACES, dtype=object)[rng.integers(0, len(_PLACES), n)])
+        + " " + np.array(_KINDS, dtype=object)[rng.integers(0, len(_KINDS), n)]
+        + " " + pd.Series(np.arange(start, start + n)).astype(str),
+        "description": np.array(_DESCRIPTIONS, dtype=object)[rng.integers(0, len(_DESCRIPTIONS), n)],
+        "address": "Synthetic address",
+        "city": city,
+        "country": "Canada",
+        "geom": [f"SRID=4326;POINT({x:.6f} {y:.6f})" for x, y in zip(lon, lat)],
+        "lat": lat.round(6),
+        "long": lon.round(6),
+        "opening_hours": np.array(_HOURS, dtype=object)[rng.integers(0, len(_HOURS), n)],
+        "wheelchair_access": rng.random(n) < 0.35,
+        "overall_rating": overall,
+        "rating_count": counts,
+        "rating_sum": rating_sum,
+    })
+    return washrooms, reviews
+
+
+def users_frame(n: int):
+    import numpy as np
+    import pandas as pd
+
+    idx = pd.Series(np.arange(n))
+    return pd.DataFrame({
+        "id": idx.map((USER_ID_PREFIX + "{}").format),
+        "public_id": _ids(USER_PUBLIC_ID_PREFIX, 0, n),
+        "email": idx.map("synth-{}@example.invalid".format),
+        "username": idx.map("synth_{}".format),
+        "first_name": "Synthetic",
+        "last_name": idx.map("User{}".format),
+        "password": "x",
+    })
+
+
+def drop(engine) -> None:
+    from sqlalchemy import text
+
+    from app.db import versions
+
+    # Id ranges rather than LIKE so the primary key / FK indexes do the work
+    params = {
+        "lo": WASHROOM_ID_PREFIX + "0" * 12, "hi": WASHROOM_ID_PREFIX + "f" * 12,
+        "u": USER_ID_PREFIX + "%",
+    }
+    in_range = "washroom_id BETWEEN CAST(:lo AS uuid) AND CAST(:hi AS uuid)"
+    with engine.begin() as conn:
+        # Regions the synthetic washrooms cover, from each city's extent
+        regions = set()
+        for extent in conn.execute(text(f"""
+            SELECT min(lat), min(long), max(lat), max(long) FROM washrooms
+            WHERE {in_range.replace('washroom_id', 'id')} GROUP BY city
+        """), params):
+            regions.update(versions.region_scopes(*extent))
+        conn.execute(text(f"""
+            DELETE FROM review_likes l USING reviews r
+            WHERE l.review_id = r.id AND r.{in_range}
+        """), params)
+        conn.execute(text("DELETE FROM review_likes WHERE user_id LIKE :u"), params)
+        for table in ("reviews", "photos", "reports", "washroom_amenities", "washroom_hours",
+                      "washroom_leaderboard"):
+            conn.execute(text(f"DELETE FROM {table} WHERE {in_range}"), params)
+        conn.execute(text("DELETE FROM reviews WHERE user_id LIKE :u"), params)
+        conn.execute(text(f"DELETE FROM washrooms WHERE {in_range.replace('washroom_id', 'id')}"), params)
+        conn.execute(text("DELETE FROM users WHERE id LIKE :u"), params)
+        if regions:
+            versions.bump(conn, *regions)
+
+
+def load(engine, washrooms: int, mean_reviews: float, users: int, chunk: int, seed: int) -> dict:
+    import numpy as np
+    from sqlalchemy import text
+
+    from app.core.opening_hours import hours_frame
+    from app.db import versions
+    from app.db.leaderboard import refresh_leaderboard
+    from app.db.washroom_import import copy_rows
+    from parse_csv import accessible_amenity_id
+
+    rng = np.random.default_rng(seed)
+    totals = {"users": users, "washrooms": 0, "reviews": 0}
+    regions = set()
+    with engine.begin() as conn:
+        amenity_id = accessible_amenity_id(conn)
+        copy_rows(conn, "users", users_frame(users))
+        for start in range(0, washrooms, chunk):
+            w, r = washroom_chunk(start, min(chunk, washrooms - start), mean_reviews, users, rng)
+            copy_rows(conn, "washrooms", w, force_not_null=("name", "description", "address"))
+            copy_rows(conn, "reviews", r, force_not_null=("title",))
+            # Accessible washrooms get the "Accessible" amenity, as the CSV import does
+            accessible = w.loc[w["wheelchair_access"], ["id"]].rename(columns={"id": "washroom_id"})
+            copy_rows(conn, "washroom_amenities", accessible.assign(amenity_id=amenity_id))
+            copy_rows(conn, "washroom_hours", hours_frame(w["id"], w["opening_hours"]))
+            regions.update(versions.region_scope(la, lo) for la, lo in zip(w["lat"], w["long"]))
+            totals["washrooms"] += len(w)
+            totals["reviews"] += len(r)
+            print(f"  {totals['washrooms']:>12,} washrooms {totals['reviews']:>12,} reviews", flush=True)
+        versions.bump(conn, *regions)
+    # The COPY bypassed the review write path, so score the new washrooms in one pass
+    refresh_leaderboard(engine)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in ("users", "washrooms", "reviews", "washroom_amenities", "washroom_hours",
+                      "washroom_leaderboard"):
+            conn.execute(text(f"ANALYZE {table}"))
+    return totals
+
+
+def main() -> None:
+    from sqlalchemy import create_engine
+
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", choices=sorted(SCALES, key=SCALES.get), default="10k",
+                        help="number of washrooms")
+    parser.add_argument("--reviews-per-washroom", type=float, default=3.0, help="mean, heavy-tailed")
+    parser.add_argument("--users", type=int, default=None, help="default: washrooms / 10, at least 1000")
+    parser.add_argument("--chunk", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="remove previously generated rows and exit")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        start = time.perf_counter()
+        drop(engine)
+        if args.drop:
+            print(f"dropped synthetic rows in {time.perf_counter() - start:.1f}s")
+            return
+        washrooms = SCALES[args.scale]
+        users = args.users or max(1000, washrooms // 10)
+        print(f"generating {washrooms:,} washrooms, {users:,} users")
+        totals = load(engine, washrooms, args.reviews_per_washroom, users, args.chunk, args.seed)
+        elapsed = time.perf_counter() - start
+        print(
+            f"loaded {totals['washrooms']:,} washrooms, {totals['users']:,} users, "
+            f"{totals['reviews']:,} reviews in {elapsed:.1f}s"
+        )
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Mixed-endpoint load test with throughput, latency percentiles and a regression gate.
+
+    python -m benchmarks.load --duration 60 --concurrency 64
+    python -m benchmarks.load --rate 500 --duration 60 --json results.json
+    python -m benchmarks.load --token "$FIREBASE_ID_TOKEN" --mix bbox=5,detail=3,reviews=2,upsert=1
+    python -m benchmarks.load --compare baseline.json --tolerance 0.2
+
+Drives a running API (--base-url) whose database has been filled by
+benchmarks.dataset, with a weighted mix of:
+
+- bbox:    GET /washrooms/?min_lat=... viewports centred on the dataset's cities
+- detail:  GET /washrooms/{id}
+- reviews: GET /reviews/washroom/{id}
+- upsert:  POST /reviews/ (only with --token; the token's user must exist)
+
+Washroom ids are sampled from DATABASE_URL up front. By default the run is
+closed-loop: --concurrency workers each send a request as soon as the last one
+returns. With --rate, requests are scheduled open-loop at a fixed arrival rate
+and latency is measured from the scheduled time, so a stalled server shows up
+as queueing delay instead of a lower request rate (no coordinated omission).
+
+Prints throughput and p50/p95/p99 per endpoint. --json saves the results;
+--compare checks them against a saved run and exits 1 if any endpoint's p95
+grew by more than --tolerance or its error rate rose, so the script can gate a
+deploy.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from benchmarks.common import percentile, report
+from benchmarks.dataset import CITIES
+
+DEFAULT_MIX = "bbox=5,detail=3,reviews=2,upsert=1"
+
+
+def parse_mix(spec: str, with_writes: bool) -> dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    unknown = set(mix) - {"bbox", "detail", "reviews", "upsert"}
+    if unknown:
+        raise SystemExit(f"unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+    if not with_writes:
+        mix.pop("upsert", None)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def sample_washroom_ids(n: int) -> list[str]:
+    """Up to n washroom ids, sampled without scanning the whole table."""
+    from sqlalchemy import create_engine, text
+
+    from app.core.settings import settings
+
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            total = conn.execute(
+                text("SELECT GREATEST(reltuples, 1) FROM pg_class WHERE relname = 'washrooms'")
+            ).scalar() or 1
+            pct = min(100.0, 100.0 * n * 2 / total)
+            rows = conn.execute(
+                text(f"SELECT id::text FROM washrooms TABLESAMPLE BERNOULLI ({pct}) LIMIT :n"),
+                {"n": n},
+            ).fetchall()
+    finally:
+        engine.dispose()
+    return [row[0] for row in rows]
+
+
+class Scenario:
+    """Builds requests for each endpoint in the mix; deterministic for a given seed."""
+
+    def __init__(self, api: str, ids: list[str], mix: dict[str, int], span: float, seed: int):
+        self.api = api
+        self.ids = ids
+        self.span = span
+        self.rng = random.Random(seed)
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.city_weights = [c[3] for c in CITIES]
+
+    def next(self) -> tuple[str, str, str, Optional[dict]]:
+        """(endpoint, method, path, json body)."""
+        name = self.rng.choices(self.names, self.weights)[0]
+        if name == "bbox":
+            _, lat, lon, _, spread = self.rng.choices(CITIES, self.city_weights)[0]
+            lat = self.rng.gauss(lat, spread)
+            lon = self.rng.gauss(lon, spread / 0.65)
+            half = self.span / 2
+            path = (
+                f"{self.api}/washrooms/?min_lat={lat - half:.5f}&min_lon={lon - half * 2:.5f}"
+                f"&max_lat={lat + half:.5f}&max_lon={lon + half * 2:.5f}"
+            )
+            return name, "GET", path, None
+        washroom_id = self.rng.choice(self.ids)
+        if name == "detail":
+            return name, "GET", f"{self.api}/washrooms/{washroom_id}", None
+        if name == "reviews":
+            return name, "GET", f"{self.api}/reviews/washroom/{washroom_id}?limit=20", None
+        body = {
+            "washroom_id": washroom_id,
+            "rating": self.rng.randint(1, 5),
+            "title": "Load test",
+            "description": "benchmarks.load",
+        }
+        return name, "POST", f"{self.api}/reviews/", body
+
+
+async def _run(args, scenario: Scenario) -> tuple[dict, float]:
+    import httpx
+
+    results: dict[str, dict] = {name: {"samples": [], "errors": 0} for name in scenario.names}
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    deadline = time.perf_counter() + args.duration
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers=headers, limits=limits, timeout=args.timeout
+    ) as client:
+
+        async def send(request, scheduled: float) -> None:
+            name, method, path, body = request
+            try:
+                resp = await client.request(method, path, json=body)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            results[name]["samples"].append((time.perf_counter() - scheduled) * 1000)
+            results[name]["errors"] += not ok
+
+        start = time.perf_counter()
+        if args.rate:
+            # Open loop: fire on schedule regardless of outstanding responses
+            interval = 1.0 / args.rate
+            tasks = []
+            n = 0
+            while True:
+                scheduled = start + n * interval
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(scenario.next(), scheduled)))
+                n += 1
+            await asyncio.gather(*tasks)
+        else:
+
+            async def worker() -> None:
+                while time.perf_counter() < deadline:
+                    await send(scenario.next(), time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return results, elapsed
+
+
+def summarize(results: dict, elapsed: float) -> dict:
+    summary = {}
+    for name, r in results.items():
+        samples = r["samples"]
+        if not samples:
+            continue
+        summary[name] = {
+            "requests": len(samples),
+            "errors": r["errors"],
+            "rps": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 50),
+            "p95_ms": percentile(samples, 95),
+            "p99_ms": percentile(samples, 99),
+        }
+    return summary
+
+
+def compare(summary: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of summary against baseline, as printable lines."""
+    problems = []
+    for name, base in baseline.items():
+        now = summary.get(name)
+        if now is None:
+            continue
+        if now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(
+                f"{name}: p95 {now['p95_ms']:.1f}ms vs baseline {base['p95_ms']:.1f}ms "
+                f"(+{(now['p95_ms'] / base['p95_ms'] - 1) * 100:.0f}%)"
+            )
+        base_rate = base["errors"] / max(base["requests"], 1)
+        now_rate = now["errors"] / max(now["requests"], 1)
+        if now_rate > base_rate + 0.001:
+            problems.append(f"{name}: error rate {now_rate:.2%} vs baseline {base_rate:.2%}")
+    return problems
+
+
+def main() -> None:
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=64, help="closed-loop workers / max connections")
+    parser.add_argument("--rate", type=float, default=None, help="open-loop requests per second")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--token", default=None, help="Firebase ID token; enables the upsert endpoint")
+    parser.add_argument("--ids", type=int, default=5000, help="washroom ids to sample")
+    parser.add_argument("--span", type=float, default=0.02, help="viewport height in degrees")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_out", default=None, help="write results to this file")
+    parser.add_argument("--compare", default=None, help="baseline results from an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth vs baseline")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix, with_writes=bool(args.token))
+    ids = sample_washroom_ids(args.ids)
+    if not ids and set(mix) - {"bbox"}:
+        raise SystemExit("no washrooms found; run python -m benchmarks.dataset first")
+    scenario = Scenario(settings.API_V1_STR, ids, mix, args.span, args.seed)
+
+    mode = f"rate={args.rate:g}/s" if args.rate else f"concurrency={args.concurrency}"
+    print(f"{args.base_url} {mode} duration={args.duration:g}s mix={mix} ids={len(ids)}")
+    results, elapsed = asyncio.run(_run(args, scenario))
+
+    summary = summarize(results, elapsed)
+    total = sum(s["requests"] for s in summary.values())
+    for name, r in results.items():
+        if r["samples"]:
+            report(name, r["samples"], f"rps={summary[name]['rps']:,.0f} errors={r['errors']}")
+    print(f"total {total:,} requests in {elapsed:.1f}s, {total / elapsed:,.0f} req/s")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            problems = compare(summary, json.load(f), args.tolerance)
+        for line in problems:
+            print(f"REGRESSION {line}")
+        if problems:
+            sys.exit(1)
+        print(f"no regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
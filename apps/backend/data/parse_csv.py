@@ -9,30 +9,39 @@ import json
 import sys
 import os
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, List
 import uuid
 
 # Add the app directory to the Python path for imports
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 
-def parse_geom_coordinates(geom_str: str) -> tuple[Optional[float], Optional[float]]:
+# GeoJSON point, e.g. {"coordinates": [-123.13, 49.28], "type": "Point"}
+_COORDINATES = r'"coordinates"\s*:\s*\[\s*(?P<long>[-+0-9.eE]+)\s*,\s*(?P<lat>[-+0-9.eE]+)'
+
+
+def parse_geom_coordinates(geom: pd.Series) -> pd.DataFrame:
     """
-    Extract latitude and longitude from the Geom JSON field
-    Returns (lat, lon) tuple or (None, None) if parsing fails
+    Extract latitude and longitude from a column of Geom JSON strings in one
+    vectorized pass. Returns a DataFrame with float 'lat' and 'long' columns
+    (NaN where the value is missing or unparseable).
     """
-    if not geom_str or geom_str.strip() == '':
-        return None, None
+    coords = geom.fillna('').astype(str).str.extract(_COORDINATES)
+    return pd.DataFrame({
+        'lat': pd.to_numeric(coords['lat'], errors='coerce'),
+        'long': pd.to_numeric(coords['long'], errors='coerce'),
+    })
 
-    try:
-        geom_data = json.loads(geom_str)
-        if 'coordinates' in geom_data and len(geom_data['coordinates']) >= 2:
-            lon, lat = geom_data['coordinates'][:2]  # GeoJSON format: [longitude, latitude]
-            return float(lat), float(lon)
-    except (json.JSONDecodeError, ValueError, KeyError):
-        pass
 
-    return None, None
+def source_keys(parts: pd.DataFrame) -> pd.Series:
+    """
+    Stable keys from the given identifying columns (normalized and joined with
+    '|'). Repeats get a #2, #3, ... suffix in file order.
+    """
+    base = parts.fillna('').astype(str).apply(lambda col: col.str.strip().str.lower())
+    keys = base.agg('|'.join, axis=1)
+    ordinal = keys.groupby(keys).cumcount()
+    return keys.where(ordinal == 0, keys + '#' + (ordinal + 1).astype(str))
 
 
 def load_washroom_data(csv_file_path: str) -> pd.DataFrame:
@@ -48,9 +57,9 @@ def load_washroom_data(csv_file_path: str) -> pd.DataFrame:
         df.columns = df.columns.str.strip()
 
         # Parse coordinates from Geom field
-        geom_coords = df['Geom'].apply(parse_geom_coordinates)
-        df['lat'] = [coord[0] for coord in geom_coords]
-        df['long'] = [coord[1] for coord in geom_coords]
+        coords = parse_geom_coordinates(df['Geom'])
+        df['lat'] = coords['lat']
+        df['long'] = coords['long']
 
         # Clean and standardize the DataFrame for database insertion
         db_df = pd.DataFrame({
@@ -69,6 +78,10 @@ def load_washroom_data(csv_file_path: str) -> pd.DataFrame:
             'wheelchair_access': df['Wheelchair access'].fillna('').str.lower().isin(['yes', 'true', '1']).astype(bool)
         })
 
+        # The open data has no ids, and its names and descriptions get edited;
+        # the position (to ~1 m) identifies a washroom, so text edits update it in place
+        db_df['source_key'] = source_keys(db_df[['lat', 'long']].round(5))
+
         # Remove rows with invalid coordinates
         db_df = db_df.dropna(subset=['lat', 'long'])
 
@@ -82,6 +95,59 @@ def load_washroom_data(csv_file_path: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
+# The SFU room list has no coordinates; rooms are placed at their campus.
+# Buildings not listed here are on the Burnaby Mountain campus.
+SFU_BURNABY = ('Burnaby', 49.2781, -122.9199)
+SFU_BUILDING_CAMPUS = {
+    'Harbour Centre Campus': ('Vancouver', 49.2847, -123.1116),
+    'Harbour Centre Tower': ('Vancouver', 49.2847, -123.1116),
+    'Morris J Wosk Centre for Dialogue': ('Vancouver', 49.2849, -123.1109),
+    'Segal Graduate School of Business': ('Vancouver', 49.2852, -123.1144),
+    'Goldcorp Centre for the Arts': ('Vancouver', 49.2823, -123.1086),
+    '611 Alexander': ('Vancouver', 49.2836, -123.0937),
+    'Surrey Campus': ('Surrey', 49.1889, -122.8494),
+    'Sustainable Energy Engineering': ('Surrey', 49.1882, -122.8489),
+    'Surrey Memorial Hospital': ('Surrey', 49.1765, -122.8424),
+}
+
+
+def load_sfu_data(csv_file_path: str) -> pd.DataFrame:
+    """
+    Load the SFU washroom room list (Building, Room Number, Room Tags) into the
+    same cleaned shape as load_washroom_data
+    """
+    try:
+        df = pd.read_csv(csv_file_path, encoding='utf-8', dtype=str)
+        df.columns = df.columns.str.strip()
+
+        building = df['Building'].fillna('').str.strip()
+        room = df['Room Number'].fillna('').str.strip()
+        tags = df['Room Tags'].fillna('').str.strip()
+        campus = building.map(SFU_BUILDING_CAMPUS).map(lambda c: c if isinstance(c, tuple) else SFU_BURNABY)
+
+        db_df = pd.DataFrame({
+            'name': (building + ' ' + room).str.strip(),
+            # "Washroom, men's, accessible" -> "men's, accessible"
+            'description': tags.str.replace(r'^Washroom,?\s*', '', regex=True),
+            'address': 'Simon Fraser University, ' + building + ', Room ' + room,
+            'city': campus.str[0],
+            'country': 'Canada',
+            'lat': campus.str[1].astype('float64'),
+            'long': campus.str[2].astype('float64'),
+            'opening_hours': '',
+            'wheelchair_access': tags.str.lower().str.contains('accessible'),
+            'source_key': source_keys(pd.DataFrame({'building': building, 'room': room})),
+        })
+        return db_df[building != '']
+
+    except FileNotFoundError:
+        print(f"Error: CSV file not found: {csv_file_path}")
+        return pd.DataFrame()
+    except Exception as e:
+        print(f"Error reading CSV file: {e}")
+        return pd.DataFrame()
+
+
 def print_dataframe_summary(df: pd.DataFrame):
     """
     Print a summary of the DataFrame
@@ -101,44 +167,49 @@ def print_dataframe_summary(df: pd.DataFrame):
         print(f"Lon range: {df['long'].min():.4f} to {df['long'].max():.4f}")
 
 
+def opening_hours_json(hours: pd.Series) -> pd.Series:
+    """JSONB text ({"hours": ...}) for each non-empty opening hours value, else None."""
+    return hours.fillna('').astype(str).map(lambda h: json.dumps({"hours": h}) if h else None)
+
+
 def create_washroom_instances(df: pd.DataFrame) -> List[dict]:
     """
     Convert DataFrame to list of dictionaries that can be used to create Washroom model instances
     """
-    washrooms = []
+    if df.empty:
+        return []
 
-    for _, row in df.iterrows():
-        # Convert geom string to proper GeoJSON format for PostGIS
-        geom_json = json.loads(row['geom']) if row['geom'] else {"type": "Point", "coordinates": [0.0, 0.0]}
-
-        # Convert opening_hours string to JSONB format
-        opening_hours_json = {"hours": row['opening_hours']} if row['opening_hours'] else None
-
-        washroom_data = {
-            'id': uuid.uuid4(),
-            'name': str(row['name']),
-            'description': str(row['description']),
-            'address': str(row['address']),
-            'city': str(row['city']),
-            'country': str(row['country']),
-            'lat': float(row['lat']),
-            'long': float(row['long']),
-            'geom': geom_json,  # GeoJSON dict for PostGIS Geometry
-            'opening_hours': opening_hours_json,  # Dict for JSONB
-            'overall_rating': 0.0,
-            'rating_count': 0,
-            'floor': None,
-            'wheelchair_access': bool(row['wheelchair_access']),
-            'created_by': None
-        }
-        washrooms.append(washroom_data)
+    records = pd.DataFrame({
+        'id': [uuid.uuid4() for _ in range(len(df))],
+        'name': df['name'].astype(str),
+        'description': df['description'].astype(str),
+        'address': df['address'].astype(str),
+        'city': df['city'].astype(str),
+        'country': df['country'].astype(str),
+        'lat': df['lat'].astype(float),
+        'long': df['long'].astype(float),
+        'opening_hours': df['opening_hours'].fillna('').astype(str).map(
+            lambda h: {"hours": h} if h else None
+        ),
+        'wheelchair_access': df['wheelchair_access'].astype(bool),
+    }).to_dict('records')
 
-    return washrooms
+    for record in records:
+        # GeoJSON dict for PostGIS Geometry
+        record['geom'] = {"type": "Point", "coordinates": [record['long'], record['lat']]}
+        record.update(overall_rating=0.0, rating_count=0, floor=None, created_by=None)
 
+    return records
 
-def csv2Dict() -> List[dict]:
+
+# Sources whose source_key is the record's position (see load_washroom_data);
+# only for these can a changed key at an unchanged position be a re-key
+POSITION_KEYED_SOURCES = {'vancouver_public'}
+
+
+def load_sources() -> Dict[str, pd.DataFrame]:
     """
-    Main function to load CSV data and return list of dictionaries for database insertion
+    Load and clean every source CSV, keyed by the source name recorded in the import manifest
     """
     # File path
     van_public_csv_file = Path(__file__).parent / 'van-public-washroom-data.csv'
@@ -147,87 +218,80 @@ def csv2Dict() -> List[dict]:
     print("CSV data load into DB")
     print(f"CSV files: \n {van_public_csv_file} \n {sfu_csv_file}")
 
-    # Load the data
-    # TODO: Load and return SFU DATA
-    van_public_df = load_washroom_data(str(van_public_csv_file))
-
-    if van_public_df.empty:
-        print("vancouver public csv failed to load. exiting.")
-        return []
+    sources = {
+        'vancouver_public': load_washroom_data(str(van_public_csv_file)),
+        'sfu': load_sfu_data(str(sfu_csv_file)),
+    }
+    for source, df in sources.items():
+        if df.empty:
+            print(f"{source} csv failed to load, skipping it")
+            continue
+        print(f"--- {source} ---")
+        print_dataframe_summary(df)
+    return {source: df for source, df in sources.items() if not df.empty}
 
-    # Print summary
-    print_dataframe_summary(van_public_df)
 
-    # Create washroom instances for database insertion
-    washrooms = create_washroom_instances(van_public_df)
+def csv2Dict() -> List[dict]:
+    """
+    Main function to load CSV data and return list of dictionaries for database insertion
+    """
+    washrooms = []
+    for df in load_sources().values():
+        washrooms += create_washroom_instances(df)
     print(f"Created {len(washrooms)} washroom instances ready for database insertion")
-
     return washrooms
 
 
+def import_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The columns app.db.washroom_import diffs and loads, with opening_hours as JSONB text."""
+    return pd.DataFrame({
+        'source_key': df['source_key'],
+        'name': df['name'].astype(str),
+        'description': df['description'].astype(str),
+        'address': df['address'].astype(str),
+        'city': df['city'].astype(str),
+        'country': df['country'].astype(str),
+        'lat': df['lat'].astype(float),
+        'long': df['long'].astype(float),
+        'opening_hours': opening_hours_json(df['opening_hours']),
+        'wheelchair_access': df['wheelchair_access'].astype(bool),
+    })
+
+
+def accessible_amenity_id(connection) -> int:
+    """Id of the "Accessible" amenity, creating it if needed."""
+    from sqlalchemy import text
+
+    connection.execute(text(
+        "INSERT INTO amenities (name) VALUES ('Accessible') ON CONFLICT (name) DO NOTHING"
+    ))
+    return connection.execute(text("SELECT id FROM amenities WHERE name = 'Accessible'")).scalar_one()
+
+
 def load_data_to_database():
     """
-    Load CSV data directly into the database
+    Bring the database in line with the CSV files. Safe to re-run: each source
+    is diffed against its import manifest and only changed rows are written.
     """
     try:
         # Import here to avoid circular imports
-        from app.db.models import Washroom, Amenity
-        from app.db.session import SessionLocal
-        from geoalchemy2.shape import from_shape
-        from shapely.geometry import Point
-        
-        # Get washroom data using your csv2Dict function
-        washrooms_data = csv2Dict()
-        
-        if not washrooms_data:
+        from app.db.session import engine
+        from app.db.washroom_import import import_washrooms
+
+        sources = load_sources()
+
+        if not sources:
             print("No washroom data to seed")
             return True
-            
-        # Check if database already has washroom data
-        db = SessionLocal()
-        try:
-            existing_count = db.query(Washroom).count()
-            if existing_count > 0:
-                print(f"Database already has {existing_count} washrooms, skipping seed")
-                return True
-            
-            # Get or create "Accessible" amenity
-            accessible_amenity = db.query(Amenity).filter(Amenity.name == "Accessible").first()
-            if not accessible_amenity:
-                accessible_amenity = Amenity(name="Accessible")
-                db.add(accessible_amenity)
-                db.flush()  # Flush to get the ID
-            
-            # Insert washroom data
-            inserted_count = 0
-            for washroom_data in washrooms_data:
-                # Extract wheelchair_access before creating washroom
-                wheelchair_access = washroom_data.pop('wheelchair_access', False)
-                
-                # Create Point geometry from coordinates for PostGIS
-                geom_data = washroom_data.pop('geom', {})
-                if 'coordinates' in geom_data and len(geom_data['coordinates']) >= 2:
-                    lon, lat = geom_data['coordinates'][:2]
-                    point = Point(lon, lat)
-                    washroom_data['geom'] = from_shape(point, srid=4326)
-                
-                washroom = Washroom(**washroom_data)
-                db.add(washroom)
-                db.flush()  # Flush to get the washroom ID
-                
-                # Add accessible amenity if wheelchair access is available
-                if wheelchair_access:
-                    washroom.amenities.append(accessible_amenity)
-                
-                inserted_count += 1
-            
-            db.commit()
-            print(f"Successfully inserted {inserted_count} washroom records into database")
-            return True
-            
-        finally:
-            db.close()
-            
+
+        with engine.begin() as connection:
+            amenity_id = accessible_amenity_id(connection)
+
+        for source, df in sources.items():
+            import_washrooms(engine, source, import_frame(df), amenity_id,
+                             rekey_by_position=source in POSITION_KEYED_SOURCES)
+        return True
+
     except Exception as e:
         print(f"Error loading data to database: {e}")
         return False
@@ -237,7 +301,7 @@ if __name__ == "__main__":
     """
     Run this script directly to load data into the database
     """
-    print("🚀 Loading Vancouver washroom data into database...")
+    print("🚀 Loading washroom data into database...")
     success = load_data_to_database()
     if success:
         print("✅ Data loading completed successfully!")
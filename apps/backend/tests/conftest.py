@@ -0,0 +1,8 @@
+"""
+Shared test setup. Settings are read at import time, so the required
+environment is filled in before any app module is imported.
+"""
+
+import os
+
+os.environ.setdefault("GOOGLE_APPLICATION_CREDS", "/nonexistent/firebase-credentials.json")
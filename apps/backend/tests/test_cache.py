@@ -0,0 +1,101 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import MemoryBackend, RedisBackend, ResponseCache
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "memory":
+        return ResponseCache(MemoryBackend(max_entries=100, default_ttl=60))
+    return ResponseCache(RedisBackend(fakeredis.FakeRedis(), default_ttl=60, prefix="test:"))
+
+
+def test_set_get_and_delete(cache):
+    cache.set("a", b"1")
+    assert cache.get("a") == b"1"
+    assert cache.get_many(["a", "missing"]) == [b"1", None]
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_invalidate_tags_drops_only_tagged_entries(cache):
+    cache.set("w1", b"1", tags=["washroom:1", "region:10/1/1"])
+    cache.set("w2", b"2", tags=["washroom:2"])
+    cache.set("plain", b"3")
+    cache.invalidate_tags("region:10/1/1")
+    assert cache.get("w1") is None
+    assert cache.get("w2") == b"2"
+    assert cache.get("plain") == b"3"
+
+
+def test_response_round_trip(cache):
+    cache.set_response("r", b'{"x":1}', {"ETag": 'W/"v1"'})
+    assert cache.get_response("r") == (b'{"x":1}', {"ETag": 'W/"v1"'})
+    assert cache.get_response("other") is None
+
+
+def test_async_methods_match_sync_ones(cache):
+    async def run():
+        await cache.aset("k", b"v", tags=["t"])
+        assert await cache.aget("k") == b"v"
+        assert await cache.aget_many(["k", "x"]) == [b"v", None]
+        await cache.ainvalidate_tags("t")
+        assert await cache.aget("k") is None
+
+    asyncio.run(run())
+
+
+def test_stats_count_hits_and_misses(cache):
+    cache.set("a", b"1")
+    cache.get("a")
+    cache.get_many(["a", "b"])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (2, 1, 1)
+    assert stats["hit_ratio"] == pytest.approx(2 / 3)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2, default_ttl=60)
+    backend.set("a", b"1", tags=["t"])
+    backend.set("b", b"2")
+    backend.get("a")
+    backend.set("c", b"3")
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+    # The evicted entry's tag bookkeeping goes with it
+    backend.invalidate_tags(["t"])
+    assert backend._tags == {}
+
+
+def test_memory_backend_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    backend = MemoryBackend(max_entries=10, default_ttl=60)
+    backend.set("short", b"1", ttl=5)
+    backend.set("long", b"2")
+    now[0] += 10
+    assert backend.get("short") is None
+    assert backend.get("long") == b"2"
+
+
+def test_redis_backend_degrades_to_misses_when_redis_is_down():
+    server = fakeredis.FakeServer()
+    cache = ResponseCache(RedisBackend(fakeredis.FakeRedis(server=server), default_ttl=60))
+    cache.set("a", b"1")
+    server.connected = False
+    assert cache.get("a") is None
+    assert cache.get_many(["a"]) == [None]
+    cache.set("b", b"2")
+    cache.invalidate_tags("t")
+
+
+def test_redis_backend_entries_expire():
+    client = fakeredis.FakeRedis()
+    cache = ResponseCache(RedisBackend(client, default_ttl=60, prefix="test:"))
+    cache.set("a", b"1", tags=["t"], ttl=30)
+    assert 0 < client.ttl("test:a") <= 30
+    assert 0 < client.ttl("test:tag:t") <= 30
@@ -0,0 +1,122 @@
+"""
+bbox filters: the SQL they build, their in-process twin, and (with a
+database) that Postgres can answer each filter from its supporting index.
+
+The plan checks run against DATABASE_URL after init_db.py and are skipped
+when no database is reachable. Sequential scans are disabled for them, so
+they check that each predicate matches its index's definition (a partial
+index predicate, a composite GiST column) whatever the table size; whether
+the planner picks it unprompted on real data depends on the statistics.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.api.filters import WashroomFilters, bbox_query
+from app.core.opening_hours import OpenAt
+from app.core.settings import settings
+
+VANCOUVER_VIEWPORT = (49.255, -123.17, 49.305, -123.07)
+
+# Wednesday noon, sunrise 07:00, sunset 20:00
+NOON = OpenAt(2, 720, 420, 1200)
+
+
+def _sql(filters: WashroomFilters, **kwargs) -> tuple[str, dict]:
+    query, params = bbox_query(kwargs.get("bounds", VANCOUVER_VIEWPORT), filters, kwargs.get("after_id"), 51)
+    return " ".join(query.element.text.split()), params
+
+
+def test_no_filters_is_inactive():
+    filters = WashroomFilters()
+    assert not filters.active and not filters.sql_only
+    assert filters.sql() == ([], {})
+    assert filters.matches({"wheelchair_access": False, "overall_rating": None})
+
+
+def test_sql_predicates_and_params():
+    conditions, params = WashroomFilters(True, 4.5, ["Shower", "Accessible", "Shower"], NOON).sql("w")
+    assert conditions[:2] == ["w.wheelchair_access", "w.overall_rating >= :min_rating"]
+    # Amenities are deduplicated and sorted, so equal filters build identical SQL
+    assert params["amenity_0"] == "Accessible" and params["amenity_1"] == "Shower"
+    assert "amenity_2" not in params
+    assert "h.day = :open_day" in conditions[-1]
+    assert params["min_rating"] == 4.5
+    assert (params["open_day"], params["open_minute"], params["open_dawn"], params["open_dusk"]) == (2, 720, 420, 1200)
+
+    assert WashroomFilters(wheelchair_access=False).sql()[0] == ["NOT washrooms.wheelchair_access"]
+
+
+def test_matches_agrees_with_the_sql_filters():
+    payloads = [
+        {"wheelchair_access": access, "overall_rating": rating}
+        for access in (True, False) for rating in (None, 0.0, 3.9, 4.0, 5.0)
+    ]
+    filters = WashroomFilters(wheelchair_access=True, min_rating=4.0)
+    assert [p for p in payloads if filters.matches(p)] == [
+        {"wheelchair_access": True, "overall_rating": 4.0},
+        {"wheelchair_access": True, "overall_rating": 5.0},
+    ]
+
+
+def test_amenity_and_open_at_filters_are_sql_only():
+    assert WashroomFilters(amenities=["Accessible"]).sql_only
+    assert WashroomFilters(open_at=NOON).sql_only
+    assert not WashroomFilters(True, 3.0).sql_only
+
+
+def test_bbox_query_sql():
+    sql, params = _sql(WashroomFilters(min_rating=4.0), after_id="00000000-0000-0000-0000-000000000001")
+    assert "ST_Within( geom, ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326))" in sql
+    assert "washrooms.overall_rating >= :min_rating" in sql
+    assert "removed_at IS NULL" in sql
+    assert "id > CAST(:after_id AS uuid)" in sql
+    assert sql.endswith("ORDER BY id LIMIT :limit")
+    assert params["limit"] == 51 and params["min_lat"] == VANCOUVER_VIEWPORT[0]
+
+    unbounded, params = _sql(WashroomFilters(), bounds=None)
+    assert "ST_Within" not in unbounded and "min_lat" not in params
+    assert "WHERE removed_at IS NULL ORDER BY id" in unbounded
+
+
+# (filter kwargs, indexes of which at least one must appear in the plan; see init_db.py)
+PLAN_CASES = {
+    "wheelchair_access": ({"wheelchair_access": True}, ("idx_washrooms_geom_accessible",)),
+    "min_rating": ({"min_rating": 4.5}, ("idx_washrooms_geom_rating",)),
+    "amenity": ({"amenities": ["Accessible"]}, ("washroom_amenities_pkey", "idx_washroom_amenities_amenity")),
+    "open_at": ({"open_at": NOON}, ("washroom_hours_pkey", "idx_washroom_hours_day")),
+}
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _walk(child)
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine(settings.DATABASE_URL, connect_args={"connect_timeout": 3})
+    try:
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT to_regclass('washroom_hours')")).scalar() is None:
+                pytest.skip("database schema missing; run app/db/init_db.py")
+    except OperationalError:
+        pytest.skip("no database at DATABASE_URL")
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("case", PLAN_CASES)
+def test_filtered_bbox_plan_uses_its_index(db, case):
+    kwargs, expected = PLAN_CASES[case]
+    query, params = bbox_query(VANCOUVER_VIEWPORT, WashroomFilters(**kwargs), None, 501)
+    with db.begin() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        raw = conn.execute(text("EXPLAIN (FORMAT JSON) " + query.element.text), params).scalar()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    indexes = {node["Index Name"] for node in _walk(plan) if "Index Name" in node}
+    assert indexes & set(expected), f"{case}: expected one of {expected}, plan used {sorted(indexes) or 'none'}"
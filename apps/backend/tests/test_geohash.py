@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from app.core.geohash import _BASE32, cells_around, encode
+
+
+def _decode_box(cell: str) -> tuple[float, float, float, float]:
+    """Reference decoder: the (min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat, lon, even = [-90.0, 90.0], [-180.0, 180.0], True
+    for char in cell:
+        bits = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon if even else lat
+            mid = (rng[0] + rng[1]) / 2
+            rng[0 if bits >> shift & 1 else 1] = mid
+            even = not even
+    return lat[0], lon[0], lat[1], lon[1]
+
+
+@pytest.mark.parametrize("lat, lon, precision, expected", [
+    (57.64911, 10.40744, 11, "u4pruydqqvj"),
+    (49.2827, -123.1207, 5, "c2b2q"),
+    (-33.8688, 151.2093, 6, "r3gx2f"),
+    (0.0, 0.0, 4, "s000"),
+])
+def test_encode_known_cells(lat, lon, precision, expected):
+    cell, box = encode(lat, lon, precision)
+    assert cell == expected
+    assert box == _decode_box(expected)
+
+
+def test_cell_contains_the_point_and_longer_hashes_nest():
+    rng = random.Random(3)
+    for _ in range(500):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        cell, (min_lat, min_lon, max_lat, max_lon) = encode(lat, lon, 7)
+        assert min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+        assert encode(lat, lon, 8)[0].startswith(cell)
+
+
+def test_cells_around_is_the_centre_and_its_eight_neighbours():
+    cells = cells_around(49.2827, -123.1207, 5)
+    assert cells[0] == "c2b2q"
+    assert len(cells) == len(set(cells)) == 9
+    c_min_lat, c_min_lon, c_max_lat, c_max_lon = _decode_box(cells[0])
+    for cell in cells[1:]:
+        min_lat, min_lon, max_lat, max_lon = _decode_box(cell)
+        # Touches the centre cell along an edge or at a corner
+        assert max(min_lat, c_min_lat) == min(max_lat, c_max_lat) or max(min_lon, c_min_lon) == min(max_lon, c_max_lon)
+        assert max(min_lat, c_min_lat) <= min(max_lat, c_max_lat)
+        assert max(min_lon, c_min_lon) <= min(max_lon, c_max_lon)
+
+
+def test_cells_around_wraps_the_antimeridian_and_stops_at_the_poles():
+    cells = cells_around(0.01, 179.99, 2)
+    assert len(cells) == 9
+    assert {_decode_box(c)[1] for c in cells} >= {-180.0}  # neighbours east of 180 wrap to the west
+
+    polar = cells_around(89.99, 0.0, 3)
+    assert len(polar) == 6  # no row north of the pole
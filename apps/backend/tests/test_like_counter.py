@@ -0,0 +1,134 @@
+import asyncio
+import logging
+
+import fakeredis
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+
+from app.core.like_counter import LikeCounter, MemoryBackend, RedisBackend
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryBackend()
+    return RedisBackend(fakeredis.FakeRedis(), key="test:likes")
+
+
+def test_deltas_accumulate_per_review(backend):
+    backend.add("r1", 1)
+    backend.add("r1", 1)
+    backend.add("r1", -1)
+    backend.add("r2", -1)
+    assert backend.pending("r1") == 1
+    assert backend.pending("r2") == -1
+    assert backend.pending("r3") == 0
+
+
+def test_pending_reviews_counts_reviews_not_clicks(backend):
+    assert backend.pending_reviews() == 0
+    backend.add("r1", 1)
+    backend.add("r1", 1)
+    backend.add("r2", -1)
+    assert backend.pending_reviews() == 2
+
+
+def test_take_empties_the_buffer_and_restore_puts_it_back(backend):
+    assert backend.take() == {}
+    backend.add("r1", 2)
+    backend.add("r2", -1)
+    taken = backend.take()
+    assert taken == {"r1": 2, "r2": -1}
+    assert backend.pending("r1") == 0 and backend.take() == {}
+
+    # Clicks landing while a flush holds the deltas are kept separately
+    backend.add("r1", 1)
+    backend.restore(taken)
+    assert backend.take() == {"r1": 3, "r2": -1}
+
+
+def test_redis_take_leaves_no_keys_behind():
+    client = fakeredis.FakeRedis()
+    backend = RedisBackend(client, key="test:likes")
+    backend.add("r1", 1)
+    assert backend.take() == {"r1": 1}
+    assert client.keys("*") == []
+
+
+def test_redis_backend_is_shared_between_workers():
+    server = fakeredis.FakeServer()
+    first = RedisBackend(fakeredis.FakeRedis(server=server), key="test:likes")
+    second = RedisBackend(fakeredis.FakeRedis(server=server), key="test:likes")
+    first.add("r1", 1)
+    second.add("r1", 1)
+    assert first.pending("r1") == second.pending("r1") == 2
+    assert second.take() == {"r1": 2}
+    assert first.take() == {}
+
+
+def test_redis_errors_fall_back_to_the_local_buffer():
+    server = fakeredis.FakeServer()
+    backend = RedisBackend(fakeredis.FakeRedis(server=server), key="test:likes")
+    backend.add("r1", 1)
+    server.connected = False
+    backend.add("r1", 1)
+    assert backend.pending("r1") == 1
+    assert backend.take() == {"r1": 1}
+
+    server.connected = True
+    assert backend.take() == {"r1": 1}
+
+
+def test_current_adds_pending_deltas_and_never_goes_negative():
+    counter = LikeCounter(MemoryBackend())
+    counter.add("r1", 1)
+    counter.add("r1", 1)
+    counter.add("r2", -1)
+    assert counter.current("r1", stored=5) == 7
+    assert counter.current("r2", stored=0) == 0
+    assert counter.stats()["votes"] == 3
+    assert counter.stats()["backend"] == "MemoryBackend"
+
+
+def test_async_methods(backend):
+    counter = LikeCounter(backend)
+
+    async def run():
+        await counter.aadd("r1", 1)
+        return await counter.acurrent("r1", stored=4)
+
+    assert asyncio.run(run()) == 5
+
+
+def test_flush_without_deltas_does_not_touch_the_database():
+    counter = LikeCounter(MemoryBackend())
+    counter.add("r1", 1)
+    counter.add("r1", -1)
+    assert counter.flush(engine=None) == 0
+    assert counter.stats()["flushes"] == 0
+
+
+def test_failed_flush_restores_the_deltas(backend):
+    counter = LikeCounter(backend)
+    counter.add("r1", 2)
+    # SQLite cannot run the flush's uuid[] statements, so the transaction fails
+    engine = create_engine("sqlite://")
+    with pytest.raises(DBAPIError):
+        counter.flush(engine)
+    assert backend.pending("r1") == 2
+    assert counter.stats()["flush_errors"] == 1
+
+
+def test_failed_shutdown_flush_is_logged_not_raised(monkeypatch, caplog):
+    from app import main
+
+    counter = LikeCounter(MemoryBackend())
+    counter.add("r1", 1)
+    counter.add("r2", 1)
+    monkeypatch.setattr(main, "like_counter", counter)
+    monkeypatch.setattr(main, "engine", create_engine("sqlite://"))
+    with caplog.at_level(logging.ERROR, logger="app.main"):
+        main.flush_likes()
+    assert "like counts of 2 reviews were not written" in caplog.text
+    assert "recount_likes" in caplog.text
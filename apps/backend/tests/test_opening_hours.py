@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.core.opening_hours import (
+    ALL_DAYS, DAWN, DUSK, MINUTES_PER_DAY, OpenAt, compile_hours, hours_frame, hours_rows, parse_hours,
+)
+
+VANCOUVER = ZoneInfo("America/Vancouver")
+
+
+def _every_day(open_min, close_min, days=ALL_DAYS):
+    return [(day, open_min, close_min) for day in days]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Dawn to Dusk", _every_day(DAWN, DUSK)),
+    ("sunrise - sunset", _every_day(DAWN, DUSK)),
+    ("Tue - Sat 9:00 am - 8:00 pm", _every_day(540, 1200, range(1, 6))),
+    ("Fri-Mon 10am-6pm", _every_day(600, 1080, (0, 4, 5, 6))),
+    ("24 hours", _every_day(0, MINUTES_PER_DAY)),
+    ("Open 24/7", _every_day(0, MINUTES_PER_DAY)),
+    ("weekdays 7:30am to 4pm", _every_day(450, 960, range(5))),
+    ("Weekends 9:30am to sunset", _every_day(570, DUSK, (5, 6))),
+    ("Sundays noon to midnight", [(6, 720, MINUTES_PER_DAY)]),
+    ("Tuesdays and Thursdays 10am-2pm", [(1, 600, 840), (3, 600, 840)]),
+    ("8am (women) 6am (men) - 9pm", _every_day(360, 1260)),
+    ("Mon-Fri 8am-5pm, Sat 10-4", _every_day(480, 1020, range(5)) + [(5, 600, 960)]),
+    ("Mon, Wed, Fri 9-5", _every_day(540, 1020, (0, 2, 4))),
+    ("Mon-Sat 9am-5pm; Sun closed", _every_day(540, 1020, range(6))),
+])
+def test_parse_hours(text, expected):
+    assert parse_hours(text) == sorted(expected)
+
+
+def test_hours_past_midnight_continue_on_the_next_day():
+    assert parse_hours("Sat 6pm - 2am") == [(5, 1080, MINUTES_PER_DAY), (6, 0, 120)]
+    assert parse_hours("Sun 22:00-02:00") == [(0, 0, 120), (6, 1320, MINUTES_PER_DAY)]
+    assert parse_hours("Mon 8pm to midnight") == [(0, 1200, MINUTES_PER_DAY)]
+
+
+@pytest.mark.parametrize("text", [
+    "", "   ", "as per CC operating hours", "closed", "Seasonal", "9am",
+    "25:00 - 3:00", "13pm - 2pm", "9:75 - 17:00", "dusk to dawn",
+])
+def test_unreadable_hours_compile_to_nothing(text):
+    assert parse_hours(text) is None
+
+
+def test_compile_hours_accepts_dicts_json_and_none():
+    expected = tuple(_every_day(DAWN, DUSK))
+    assert compile_hours({"hours": "Dawn to Dusk"}) == expected
+    assert compile_hours('{"hours": "Dawn to Dusk"}') == expected
+    assert compile_hours("Dawn to Dusk") == expected
+    for value in (None, "", {}, {"hours": None}, {"hours": 9}, ["Dawn to Dusk"]):
+        assert compile_hours(value) is None
+
+
+def test_hours_frame_matches_hours_rows():
+    ids = ["a", "b", "c", "d", "e"]
+    # As the importers pass it: JSON text, repeated values parsed once
+    values = ['{"hours": "Dawn to Dusk"}', None, '{"hours": "Sat 6pm - 2am"}', '{"hours": "Dawn to Dusk"}', '{"hours": "?"}']
+    frame = hours_frame(ids, values)
+    expected = [row for i, v in zip(ids, values) for row in hours_rows(i, v)]
+    assert frame.to_dict("records") == expected
+
+
+def test_open_at_uses_local_time_and_that_days_sun():
+    # Saturday 12:30 in Vancouver, given naive (local) and as the same UTC instant
+    for when in (datetime(2026, 10, 17, 12, 30), datetime(2026, 10, 17, 19, 30, tzinfo=timezone.utc)):
+        at = OpenAt.resolve(when, 49.2827, -123.1207, VANCOUVER)
+        assert (at.day, at.minute) == (5, 750)
+        assert 420 < at.dawn < 480 and 1080 < at.dusk < 1110
+    assert set(at.params()) == {"open_day", "open_minute", "open_dawn", "open_dusk"}
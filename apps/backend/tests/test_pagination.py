@@ -0,0 +1,126 @@
+import base64
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, paginate
+from app.api.routers import washrooms as washrooms_router
+from app.api.serializers import washroom_to_dict
+from app.core import spatial_index
+from app.core.settings import settings
+from app.core.spatial_index import SpatialIndex
+from app.main import app
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2026-10-17T12:00:00", uuid.UUID(int=5))
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == ["2026-10-17T12:00:00", str(uuid.UUID(int=5))]
+
+
+def _raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!", encode_cursor("a", "b"), _raw_cursor({"a": 1}),
+    _raw_cursor([1]), _raw_cursor([None]), _raw_cursor([["x"]]),
+])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, 1)
+    assert exc.value.status_code == 400
+
+
+def test_paginate_sets_the_cursor_only_when_there_is_a_next_page():
+    response = Response()
+    assert paginate([1, 2, 3], 2, response, key=lambda r: (r,)) == [1, 2]
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER], 1) == ["2"]
+
+    last = Response()
+    assert paginate([1, 2], 2, last, key=lambda r: (r,)) == [1, 2]
+    assert NEXT_CURSOR_HEADER not in last.headers
+
+
+def _washroom(i: int, lat: float, long: float, **fields) -> dict:
+    row = dict(
+        id=uuid.UUID(int=i), name=f"Washroom {i}", description=None, address=None,
+        city="Vancouver", country="Canada", lat=lat, long=long, opening_hours=None,
+        wheelchair_access=i % 2 == 0, overall_rating=i % 5, rating_count=i, created_by=None,
+    )
+    row.update(fields)
+    return washroom_to_dict(SimpleNamespace(**row))
+
+
+@pytest.fixture
+def loaded_index(monkeypatch):
+    """Serve GET /washrooms/ from an in-memory index; no database is touched."""
+    index = SpatialIndex()
+    payloads = [_washroom(i, 49.2 + (i % 40) * 0.002, -123.1 - (i // 40) * 0.002) for i in range(1, 301)]
+    payloads.append(_washroom(999, 10.0, 10.0))  # outside the viewport
+    index.bulk_load(payloads)
+    monkeypatch.setattr(settings, "SPATIAL_INDEX_ENABLED", True)
+    monkeypatch.setattr(spatial_index, "washroom_index", index)
+    monkeypatch.setattr(washrooms_router, "washroom_index", index)
+    return payloads
+
+
+def _pages(client, params):
+    cursor, pages = None, []
+    while True:
+        response = client.get(
+            f"{settings.API_V1_STR}/washrooms/",
+            params={**params, **({"cursor": cursor} if cursor else {})},
+        )
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_bbox_pages_walk_the_viewport_in_id_order(loaded_index):
+    viewport = {"min_lat": 49.1, "min_lon": -123.3, "max_lat": 49.3, "max_lon": -123.0}
+    pages = _pages(TestClient(app), {**viewport, "limit": 70})
+
+    assert [len(p) for p in pages] == [70, 70, 70, 70, 20]
+    ids = [w["id"] for page in pages for w in page]
+    assert ids == sorted(w["id"] for w in loaded_index if w["lat"] < 49.3 and w["long"] < -123.0)
+
+
+def test_bbox_pages_apply_filters_before_the_limit(loaded_index):
+    params = {"min_lat": 49.1, "min_lon": -123.3, "max_lat": 49.3, "max_lon": -123.0,
+              "limit": 40, "wheelchair_access": True, "min_rating": 3}
+    ids = [w["id"] for page in _pages(TestClient(app), params) for w in page]
+    expected = sorted(
+        w["id"] for w in loaded_index
+        if w["lat"] < 49.3 and w["wheelchair_access"] and w["overall_rating"] >= 3
+    )
+    assert ids == expected and len(ids) == 60
+
+
+@pytest.mark.parametrize("cursor", [encode_cursor("not-a-uuid"), _raw_cursor([1]), _raw_cursor([1, 2])])
+def test_bbox_rejects_a_cursor_that_is_not_an_id(loaded_index, cursor):
+    response = TestClient(app).get(
+        f"{settings.API_V1_STR}/washrooms/",
+        params={"min_lat": 49.1, "min_lon": -123.3, "max_lat": 49.3, "max_lon": -123.0,
+                "cursor": cursor},
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.parametrize("cursor", [
+    encode_cursor("yesterday", uuid.UUID(int=1)), _raw_cursor([1, 2]), _raw_cursor(["2026-10-17T12:00:00", 2]),
+])
+def test_review_listing_rejects_a_malformed_cursor(monkeypatch, cursor):
+    monkeypatch.setitem(app.dependency_overrides, deps.get_current_user, lambda: {"id": "some-user"})
+    # Rejected while decoding, before any query runs
+    response = TestClient(app).get(f"{settings.API_V1_STR}/reviews/some-user", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
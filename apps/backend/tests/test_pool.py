@@ -0,0 +1,123 @@
+"""
+Connection pool saturation: once pool_size + max_overflow connections are
+checked out, further checkouts wait up to pool_timeout and then fail, and
+app/db/pool_stats.py records both the waits and the timeouts. Runs the
+instrumented QueuePool over SQLite; the API's engines use the same classes.
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.core.settings import settings
+from app.db import session
+from app.db.pool_stats import PoolStats, instrumented_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    stats = PoolStats()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool(QueuePool, stats),
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=0.2,
+    )
+    yield engine, stats
+    engine.dispose()
+
+
+def test_checkout_beyond_size_and_overflow_times_out(pool):
+    engine, stats = pool
+    held = [engine.connect() for _ in range(3)]
+    try:
+        snapshot = stats.snapshot(engine.pool)
+        assert (snapshot["checked_out"], snapshot["overflow"]) == (3, 1)
+
+        start = time.perf_counter()
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        assert time.perf_counter() - start >= 0.2
+    finally:
+        for conn in held:
+            conn.close()
+
+    snapshot = stats.snapshot(engine.pool)
+    assert (snapshot["checkouts"], snapshot["timeouts"]) == (3, 1)
+    assert snapshot["wait_max_ms"] >= 200
+    assert snapshot["wait_histogram"]["le_500ms"] == 1
+    assert snapshot["checked_out"] == 0
+
+
+def test_waiting_checkout_gets_the_next_released_connection(pool):
+    engine, stats = pool
+    held = [engine.connect() for _ in range(3)]
+    result = {}
+
+    def waiter():
+        with engine.connect() as conn:
+            result["value"] = conn.execute(text("SELECT 1")).scalar()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    held.pop().close()
+    thread.join()
+    for conn in held:
+        conn.close()
+
+    snapshot = stats.snapshot(engine.pool)
+    assert result["value"] == 1
+    assert (snapshot["checkouts"], snapshot["timeouts"]) == (4, 0)
+    assert 40 <= snapshot["wait_max_ms"] < 200
+
+
+def test_many_workers_on_a_small_pool_queue_without_timeouts(pool):
+    engine, stats = pool
+    engine.pool._timeout = 5
+
+    def worker():
+        for _ in range(5):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                time.sleep(0.005)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = stats.snapshot(engine.pool)
+    assert (snapshot["checkouts"], snapshot["timeouts"]) == (60, 0)
+    assert sum(snapshot["wait_histogram"].values()) == 60
+    # Never more than size + overflow at once, and the overflow is closed on return
+    assert snapshot["checked_out"] == 0 and snapshot["overflow"] <= 0
+
+
+def test_pool_stats_survive_recreate(pool):
+    engine, stats = pool
+    recreated = engine.pool.recreate()
+    assert recreated.stats is stats
+    assert recreated.size() == 2
+
+
+def test_api_engines_use_the_pool_settings():
+    for engine in (session.engine, session.async_engine):
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        assert engine.pool._max_overflow == settings.DB_MAX_OVERFLOW
+        assert engine.pool.timeout() == settings.DB_POOL_TIMEOUT
+
+
+def test_health_db_reports_both_pools():
+    from app.main import app
+
+    body = TestClient(app).get(f"{settings.API_V1_STR}/health/db").json()
+    assert set(body) == {"async", "sync"}
+    assert {"checkouts", "timeouts", "wait_histogram", "size", "checked_out", "overflow"} <= set(body["sync"])
@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.metrics import MetricsMiddleware
+from app.core.settings import settings
+from app.db import query_stats, versions
+from app.db.models import DataVersion
+from app.db.query_stats import QueryBudgetExceeded, assert_max_queries
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    query_stats.install(engine)
+    DataVersion.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_version_bumps_and_reads_are_batched(engine):
+    scopes = [f"washroom:{i}" for i in range(1500)]
+    with Session(engine) as db:
+        # One INSERT ... ON CONFLICT per 1000 scopes, one SELECT for any number
+        with assert_max_queries(2, "bump"):
+            versions.bump(db, *scopes)
+        db.commit()
+        with assert_max_queries(1, "current") as tracker:
+            current = versions.current(db, scopes + ["never-bumped"])
+    assert tracker.count == 1
+    assert current["washroom:7"] == 1 and current["never-bumped"] == 0
+
+
+def test_assert_max_queries_lists_the_statements_run(engine):
+    with pytest.raises(QueryBudgetExceeded) as exc:
+        with assert_max_queries(1, "two selects"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+    assert str(exc.value).startswith("two selects ran 2 queries, budget is 1:")
+    assert "1. SELECT 1" in str(exc.value) and "2. SELECT 2" in str(exc.value)
+
+
+def test_statements_outside_a_tracker_are_not_counted(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    with assert_max_queries(0):
+        pass
+
+
+@pytest.fixture
+def client(engine):
+    """An app with the API's middleware and budgets, over the SQLite engine."""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    def run(n: int) -> dict:
+        with engine.connect() as conn:
+            for i in range(n):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return {"ran": n}
+
+    @app.get("/async/{n}", dependencies=[Depends(deps.query_budget(2))])
+    async def async_endpoint(n: int):
+        return run(n)
+
+    # Threadpool endpoints run in a copy of the request context; still counted
+    @app.get("/sync/{n}", dependencies=[Depends(deps.query_budget(2))])
+    def sync_endpoint(n: int):
+        return run(n)
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("kind", ["async", "sync"])
+def test_strict_budget_fails_the_request(client, monkeypatch, kind):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", True)
+    assert client.get(f"/{kind}/2").json() == {"ran": 2}
+    with pytest.raises(QueryBudgetExceeded, match=rf"GET /{kind}/{{n}} ran 3 queries, budget is 2"):
+        client.get(f"/{kind}/3")
+
+
+def test_budget_overrun_is_logged_when_not_strict(client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", False)
+    with caplog.at_level(logging.WARNING, logger="app.db.query_stats"):
+        assert client.get("/async/3").status_code == 200
+    assert "ran 3 queries, budget is 2" in caplog.text
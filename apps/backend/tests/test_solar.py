@@ -0,0 +1,57 @@
+from datetime import date
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.core.solar import sun_times
+
+VANCOUVER = (49.2827, -123.1207, ZoneInfo("America/Vancouver"))
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@pytest.mark.parametrize("day, sunrise, sunset", [
+    # Published times for Vancouver, within a couple of minutes
+    (date(2026, 6, 21), "05:07", "21:21"),
+    (date(2026, 12, 21), "08:05", "16:16"),
+])
+def test_vancouver_sun_times(day, sunrise, sunset):
+    lat, lon, tz = VANCOUVER
+    got_rise, got_set = sun_times(day, lat, lon, tz)
+    for got, want in ((got_rise, sunrise), (got_set, sunset)):
+        hours, minutes = map(int, want.split(":"))
+        assert abs(got - (hours * 60 + minutes)) <= 2, f"{_hhmm(got)} != {want}"
+
+
+def test_equinox_day_is_a_little_over_twelve_hours():
+    lat, lon, tz = VANCOUVER
+    sunrise, sunset = sun_times(date(2026, 3, 20), lat, lon, tz)
+    # Refraction and the solar disc add several minutes to each end
+    assert 720 < sunset - sunrise < 740
+    # Solar noon in Vancouver (123.1 W, PDT) is about 13:20
+    assert abs((sunrise + sunset) / 2 - 800) <= 5
+
+
+@pytest.mark.parametrize("before, change", [
+    (date(2026, 3, 7), date(2026, 3, 8)),  # clocks go forward at 02:00
+    (date(2026, 10, 31), date(2026, 11, 1)),  # and back
+])
+def test_dst_change_day_uses_the_offset_at_sunrise(before, change):
+    lat, lon, tz = VANCOUVER
+    (rise0, set0), (rise1, set1) = sun_times(before, lat, lon, tz), sun_times(change, lat, lon, tz)
+    # Sunrise and sunset both come after 02:00, so both move by the full hour
+    shift = 60 if change.month == 3 else -60
+    assert abs(rise1 - rise0 - shift) <= 3
+    assert abs(set1 - set0 - shift) <= 3
+
+
+def test_polar_day_and_night():
+    tromso = (69.6492, 18.9553, ZoneInfo("Europe/Oslo"))
+    assert sun_times(date(2026, 6, 21), *tromso) == (0, 1440)
+    assert sun_times(date(2026, 12, 21), *tromso) == (720, 720)
+
+    mcmurdo = (-77.85, 166.67, ZoneInfo("Antarctica/McMurdo"))
+    assert sun_times(date(2026, 6, 21), *mcmurdo) == (720, 720)
+    assert sun_times(date(2026, 12, 21), *mcmurdo) == (0, 1440)
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from app.core.spatial_index import SpatialIndex
+
+
+def _point(i: int, lat: float, long: float) -> dict:
+    return {"id": f"w{i}", "lat": lat, "long": long}
+
+
+def _ids(payloads) -> set[str]:
+    return {p["id"] for p in payloads}
+
+
+def test_query_bbox_matches_brute_force():
+    rng = random.Random(7)
+    points = [_point(i, rng.uniform(49.0, 49.4), rng.uniform(-123.3, -122.8)) for i in range(2000)]
+    index = SpatialIndex(cell_deg=0.02)
+    index.bulk_load(points)
+    for _ in range(50):
+        lat0, lat1 = sorted(rng.uniform(48.9, 49.5) for _ in range(2))
+        lon0, lon1 = sorted(rng.uniform(-123.4, -122.7) for _ in range(2))
+        expected = {p["id"] for p in points if lat0 <= p["lat"] <= lat1 and lon0 <= p["long"] <= lon1}
+        assert _ids(index.query_bbox(lat0, lon0, lat1, lon1)) == expected
+
+
+def test_bbox_edges_are_inclusive_and_cells_handle_negative_coordinates():
+    index = SpatialIndex(cell_deg=0.05)
+    index.bulk_load([_point(1, -0.05, -0.05), _point(2, 0.0, 0.0)])
+    assert _ids(index.query_bbox(-0.05, -0.05, 0.0, 0.0)) == {"w1", "w2"}
+    assert _ids(index.query_bbox(-0.04, -0.04, 0.0, 0.0)) == {"w2"}
+
+
+def test_upsert_replaces_payload_and_moves_point():
+    index = SpatialIndex(cell_deg=0.05)
+    index.bulk_load([_point(1, 49.0, -123.0)])
+    index.upsert({"id": "w1", "lat": 49.0, "long": -123.0, "name": "renamed"})
+    assert index.query_bbox(48.9, -123.1, 49.1, -122.9)[0]["name"] == "renamed"
+
+    index.upsert(_point(1, 49.3, -123.2))
+    assert index.query_bbox(48.9, -123.1, 49.1, -122.9) == []
+    assert _ids(index.query_bbox(49.25, -123.25, 49.35, -123.15)) == {"w1"}
+    assert len(index) == 1
+
+
+def test_discard_removes_point_and_slot_is_reused():
+    index = SpatialIndex(cell_deg=0.05)
+    index.bulk_load([_point(1, 49.0, -123.0), _point(2, 49.01, -123.01)])
+    index.discard("w1")
+    index.discard("w1")  # unknown ids are ignored
+    assert _ids(index.query_bbox(48.9, -123.1, 49.1, -122.9)) == {"w2"}
+
+    index.upsert(_point(3, 49.02, -123.02))
+    assert len(index._payloads) == 2
+    assert _ids(index.query_bbox(48.9, -123.1, 49.1, -122.9)) == {"w2", "w3"}
+
+
+def test_repeated_moves_do_not_grow_the_index():
+    index = SpatialIndex(cell_deg=0.05)
+    index.bulk_load([_point(1, 49.0, -123.0)])
+    for step in range(1000):
+        index.upsert(_point(1, 49.0 + step * 0.001, -123.0))
+    assert len(index._payloads) == 1
+    assert sum(len(b) for b in index._cells.values()) == 1
+
+
+def test_every_change_bumps_the_version():
+    index = SpatialIndex()
+    index.bulk_load([])
+    versions = [index.version]
+    index.upsert(_point(1, 49.0, -123.0))
+    versions.append(index.version)
+    index.discard("w1")
+    versions.append(index.version)
+    assert versions == sorted(set(versions))
+
+
+def test_cell_size_must_be_positive():
+    with pytest.raises(ValueError):
+        SpatialIndex(cell_deg=0)
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from app.core.cache import MemoryBackend, ResponseCache
+from app.core.tile_cache import TILE_BUFFER, TILE_EXTENT, TileCache
+from app.core.tiles import (
+    MAX_TILE_ZOOM, tile_bounds, tile_count, tile_for_point, tiles_covering_bbox, tiles_for_point,
+)
+
+VANCOUVER = (49.2827, -123.1207)
+
+
+def test_tile_for_point_known_tiles():
+    assert tile_for_point(0, *VANCOUVER) == (0, 0)
+    assert tile_for_point(1, *VANCOUVER) == (0, 0)
+    assert tile_for_point(10, *VANCOUVER) == (161, 350)
+    # The antimeridian and the Mercator limit stay inside the grid
+    assert tile_for_point(3, 89.9, 180.0) == (7, 0)
+    assert tile_for_point(3, -89.9, -180.0) == (0, 7)
+
+
+@pytest.mark.parametrize("z", [0, 5, 12, MAX_TILE_ZOOM])
+def test_tile_bounds_contain_the_point(z):
+    rng = random.Random(z)
+    for _ in range(200):
+        lat, lon = rng.uniform(-85, 85), rng.uniform(-180, 179.999)
+        min_lat, min_lon, max_lat, max_lon = tile_bounds(z, *tile_for_point(z, lat, lon))
+        assert min_lat <= lat <= max_lat
+        assert min_lon <= lon <= max_lon
+
+
+def test_tiles_covering_bbox_covers_every_point_in_it():
+    bbox = (49.20, -123.25, 49.32, -123.02)
+    tiles = set(tiles_covering_bbox(14, *bbox))
+    rng = random.Random(1)
+    for _ in range(500):
+        lat, lon = rng.uniform(bbox[0], bbox[2]), rng.uniform(bbox[1], bbox[3])
+        assert (14, *tile_for_point(14, lat, lon)) in tiles
+    assert tiles_covering_bbox(0, *bbox) == [(0, 0, 0)]
+
+
+def test_tiles_for_point_without_margin_is_one_tile_per_zoom():
+    tiles = list(tiles_for_point(*VANCOUVER))
+    assert tiles == [(z, *tile_for_point(z, *VANCOUVER)) for z in range(MAX_TILE_ZOOM + 1)]
+
+
+def test_tiles_for_point_margin_reaches_neighbouring_tiles():
+    # Exactly on the corner shared by four zoom 1 tiles
+    assert set(tiles_for_point(0.0, 0.0, margin=0.01, zooms=range(1, 2))) == {
+        (1, 0, 0), (1, 0, 1), (1, 1, 0), (1, 1, 1),
+    }
+    # Well inside a tile the margin changes nothing
+    min_lat, min_lon, max_lat, max_lon = tile_bounds(10, 161, 350)
+    centre = ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+    assert list(tiles_for_point(*centre, margin=0.01, zooms=range(10, 11))) == [(10, 161, 350)]
+
+
+def test_invalidate_point_drops_tiles_that_draw_the_point():
+    cache = TileCache(ResponseCache(MemoryBackend(max_entries=1000, default_ttl=60)))
+    for z in range(MAX_TILE_ZOOM + 1):
+        x, y = tile_for_point(z, *VANCOUVER)
+        cache.set(z, x, y, b"tile")
+        cache.set(z, x + 3, y, b"far")
+
+    # A point just outside a tile but within its buffer is drawn by it too
+    min_lat, min_lon, max_lat, max_lon = tile_bounds(16, 10400, 22400)
+    nearby = ((min_lat + max_lat) / 2, max_lon + (max_lon - min_lon) * TILE_BUFFER / TILE_EXTENT / 2)
+    cache.set(16, 10400, 22400, b"buffered")
+
+    cache.invalidate_point(*VANCOUVER)
+    cache.invalidate_point(*nearby)
+    for z in range(MAX_TILE_ZOOM + 1):
+        x, y = tile_for_point(z, *VANCOUVER)
+        assert cache.get(z, x, y) is None
+        if x + 3 < 2 ** z:
+            assert cache.get(z, x + 3, y) == b"far"
+    assert cache.get(16, 10400, 22400) is None
+
+
+@pytest.mark.parametrize("bbox", [
+    (49.20, -123.25, 49.32, -123.02),
+    (49.2827, -123.1207, 49.2827, -123.1207),
+    (-10.0, -10.0, 10.0, 10.0),
+    (49.3, -123.0, 49.2, -123.1),  # inverted: no tiles
+])
+def test_tile_count_matches_the_tile_list(bbox):
+    for z in (0, 5, 10, 13):
+        assert tile_count(z, *bbox) == len(tiles_covering_bbox(z, *bbox))
+
+
+def test_tile_count_of_the_world_is_computed_not_listed():
+    assert tile_count(13, -90, -180, 90, 180) == 8192 ** 2
@@ -0,0 +1,33 @@
+import pytest
+
+from app.core.tiles import tile_for_point
+from app.db import versions
+from app.db.versions import REGION_ZOOM
+
+
+@pytest.mark.parametrize("bbox", [
+    (49.20, -123.25, 49.32, -123.02),
+    (49.2827, -123.1207, 49.2827, -123.1207),
+    (45.0, -125.0, 50.0, -120.0),
+])
+def test_region_count_matches_region_scopes(bbox):
+    scopes = versions.region_scopes(*bbox)
+    assert versions.region_count(*bbox) == len(scopes) == len(set(scopes))
+
+
+def test_region_count_of_the_world_is_computed_not_listed():
+    assert versions.region_count(-90, -180, 90, 180) == (2 ** REGION_ZOOM) ** 2
+
+
+def test_point_and_tile_regions_agree():
+    lat, lon = 49.2827, -123.1207
+    region = versions.region_scope(lat, lon)
+    assert region in versions.region_scopes(lat - 0.01, lon - 0.01, lat + 0.01, lon + 0.01)
+    for z in (REGION_ZOOM, 13, 16):
+        assert versions.tile_region_scope(z, *tile_for_point(z, lat, lon)) == region
+
+
+def test_digest_depends_on_versions_not_order():
+    a = versions.digest({"region:10/1/1": 3, "region:10/1/2": 0})
+    assert a == versions.digest({"region:10/1/2": 0, "region:10/1/1": 3})
+    assert a != versions.digest({"region:10/1/1": 4, "region:10/1/2": 0})
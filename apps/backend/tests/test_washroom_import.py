@@ -0,0 +1,97 @@
+"""
+The import diff (app/db/washroom_import.py _diff) against a manifest. Only
+the manifest read touches the database, so a stub connection that returns
+fixed manifest rows is enough; applying the diff needs Postgres.
+"""
+
+import pandas as pd
+import pytest
+
+from app.db.washroom_import import CONTENT_COLUMNS, _diff, fingerprints
+
+SFU_BURNABY = (49.2781, -122.9199)
+
+
+class ManifestConnection:
+    """Answers _diff's manifest query with the given rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, statement, params=None):
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+
+def _frame(records) -> pd.DataFrame:
+    df = pd.DataFrame([
+        {"source_key": key, "name": name, "description": "", "address": "", "city": "Burnaby",
+         "country": "Canada", "lat": lat, "long": long, "opening_hours": None, "wheelchair_access": False}
+        for key, name, (lat, long) in records
+    ])
+    df["fingerprint"] = fingerprints(df)
+    return df
+
+
+def _manifest(records):
+    """Manifest rows (source_key, washroom_id, old_lat, old_long, removed, old_fingerprint)."""
+    return [(key, washroom_id, lat, long, False, "stale") for key, washroom_id, (lat, long) in records]
+
+
+def test_unchanged_rows_are_skipped_and_changed_rows_updated():
+    df = _frame([("a|1", "Room 1", SFU_BURNABY), ("a|2", "Room 2", SFU_BURNABY)])
+    manifest = _manifest([("a|1", "w1", SFU_BURNABY), ("a|2", "w2", SFU_BURNABY)])
+    manifest[0] = manifest[0][:5] + (df.loc[0, "fingerprint"],)
+
+    ops, removed, rekeyed, unchanged = _diff(ManifestConnection(manifest), "sfu", df)
+    assert unchanged == 1 and removed == [] and rekeyed == []
+    assert ops[["source_key", "op", "id"]].values.tolist() == [["a|2", "update", "w2"]]
+    assert list(ops.columns[-len(CONTENT_COLUMNS):]) == list(CONTENT_COLUMNS)
+
+
+@pytest.mark.parametrize("rekey_by_position", [False, True])
+def test_co_located_rooms_are_never_rekeyed_onto_each_other(rekey_by_position):
+    # Two SFU rooms at the campus centroid; one is dropped and an unrelated one added
+    manifest = _manifest([("aq|3000", "w3000", SFU_BURNABY), ("aq|3001", "w3001", SFU_BURNABY)])
+    df = _frame([("aq|3000", "AQ 3000", SFU_BURNABY), ("tasc|9000", "TASC 9000", SFU_BURNABY)])
+
+    ops, removed, rekeyed, _ = _diff(ManifestConnection(manifest), "sfu", df, rekey_by_position)
+    new = ops.set_index("source_key").loc["tasc|9000"]
+    assert new["op"] == "insert" and new["id"] not in ("w3000", "w3001")
+    assert removed == ["w3001"]
+    assert rekeyed == []
+
+
+def test_position_keyed_source_adopts_a_unique_match():
+    here, there = (49.2827, -123.1207), (49.2600, -123.1000)
+    manifest = _manifest([("49.2827|-123.1207", "w1", here), ("49.26|-123.1", "w2", there)])
+    df = _frame([("49.28270|-123.12070", "Park", here), ("49.26|-123.1", "Other park", there)])
+
+    ops, removed, rekeyed, _ = _diff(ManifestConnection(manifest), "vancouver_public", df, True)
+    moved = ops.set_index("source_key").loc["49.28270|-123.12070"]
+    assert (moved["op"], moved["id"]) == ("update", "w1")
+    assert removed == [] and rekeyed == ["49.2827|-123.1207"]
+
+    # Without the flag the same change is a tombstone and an insert
+    ops, removed, rekeyed, _ = _diff(ManifestConnection(manifest), "vancouver_public", df)
+    assert ops.set_index("source_key").loc["49.28270|-123.12070", "op"] == "insert"
+    assert removed == ["w1"] and rekeyed == []
+
+
+def test_position_keyed_source_does_not_guess_between_several_matches():
+    here = (49.2827, -123.1207)
+    manifest = _manifest([("k1", "w1", here), ("k2", "w2", here)])
+    df = _frame([("k3", "A", here), ("k4", "B", here)])
+
+    ops, removed, rekeyed, _ = _diff(ManifestConnection(manifest), "vancouver_public", df, True)
+    assert set(ops["op"]) == {"insert"}
+    assert sorted(removed) == ["w1", "w2"] and rekeyed == []
+
+
+def test_first_import_inserts_everything():
+    df = _frame([("aq|3000", "AQ 3000", SFU_BURNABY), ("aq|3001", "AQ 3001", SFU_BURNABY)])
+    ops, removed, rekeyed, unchanged = _diff(ManifestConnection([]), "sfu", df, True)
+    assert set(ops["op"]) == {"insert"} and ops["id"].nunique() == 2
+    assert (removed, rekeyed, unchanged) == ([], [], 0)